@@ -0,0 +1,211 @@
+"""
+This module runs blocking work of JCConfigGen --async mode as asyncio tasks, with a concurrency limit per category,
+   so that DNS lookups, commands and template renders of many hosts overlap
+
+    JCAsyncParseLimits(limitsSpec) - parses <category>=<limit>,..., returns limits of all categories
+    JCAsyncOpen(limits) - starts async mode on the running event loop, executors and semaphores are made
+    JCAsyncClose() - stops async mode, executors are shut down
+    JCAsyncDrain(*executors) - awaitable, cancels work not started on executors, waits for work in progress
+    JCAsyncRequestExit(reason) - asks the coroutine that started async mode to stop, called by signal handler
+    JCAsyncExitReason() - returns reason passed to JCAsyncRequestExit(), None if exit is not requested
+    JCAsyncRun(category, function, *args) - awaitable, runs blocking function on executor of the category
+    JCAsyncGetHostByName(hostName) - returns IP address of the host, lookup is run on the event loop in async mode
+    JCAsyncSystem(command) - runs the command and returns exit status in os.system() form, command is run by
+        asyncio.create_subprocess_exec() in async mode
+
+Categories and default limits
+    host - hosts prepared ahead of the host whose config files are being written, 16
+    render - environment spec and templates of hosts rendered at the same time, one executor thread each,
+        defaults to CPU count + 4, max 32
+    dns - DNS lookups in progress, 32
+    command - commands run by JCSystem() in progress, 4
+
+Template functions called while rendering on an executor thread hand over DNS lookups and commands to the event
+   loop and wait for the result, so that limits apply across hosts. Same host name looked up by renders of
+   other hosts at the same time is looked up once, results are not cached after the lookup completes, same as
+   sequential mode.
+Templates calling these functions are rendered by the event loop with jinja2 enable_async, using awaitable
+   versions of the functions made by JCConfigGen on top of JCAsyncLookup() and JCAsyncCommand().
+Outside async mode, and on the event loop thread, lookups and commands are run directly.
+"""
+import os
+import sys
+import threading
+
+JCAsyncCategories = ['host', 'render', 'dns', 'command']
+
+### default limits, render limit is same as default thread pool size of python
+JCAsyncDefaultLimits = { 'host': 16, 'render': min(32, (os.cpu_count() or 1) + 4), 'dns': 32, 'command': 4 }
+
+### state of async mode, None when not in async mode
+###   { 'loop', 'loopThreadId', 'mainTask', 'exitReason', 'limits', 'semaphores': { category: asyncio.Semaphore },
+###     'executors': { category: executor }, 'pendingLookups': { hostName: asyncio.Future } }
+asyncState = None
+
+def JCAsyncParseLimits(limitsSpec:str):
+    """
+    Parses limits in the form <category>=<limit>,..., categories not given get default limits
+
+    Returns
+        limits - { category: limit }, None on error
+        errorMsg - error message on failure
+    """
+    limits = dict(JCAsyncDefaultLimits)
+    if limitsSpec == None or limitsSpec.strip() == '':
+        return limits, ''
+    for limitSpec in limitsSpec.split(','):
+        category, separator, limit = limitSpec.strip().partition('=')
+        if category not in JCAsyncCategories:
+            return None, "ERROR JCAsyncParseLimits() category:{0} is not one of {1}".format(category, JCAsyncCategories)
+        try:
+            limits[category] = int(limit)
+        except ValueError:
+            limits[category] = 0
+        if limits[category] < 1:
+            return None, "ERROR JCAsyncParseLimits() limit of category:{0} needs a positive integer value, passed:{1}".format(
+                category, limit)
+    return limits, ''
+
+def JCAsyncOpen(limits:dict):
+    """
+    Starts async mode on the running event loop, call from a coroutine
+    """
+    global asyncState
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    asyncState = {
+        'loop': asyncio.get_running_loop(),
+        'loopThreadId': threading.get_ident(),
+        'mainTask': asyncio.current_task(),
+        'exitReason': None,
+        'limits': dict(limits),
+        'semaphores': dict((category, asyncio.Semaphore(limits[category])) for category in JCAsyncCategories),
+        'executors': { 'render': ThreadPoolExecutor(max_workers=limits['render'], thread_name_prefix='JCRender'),
+                       'dns': ThreadPoolExecutor(max_workers=limits['dns'], thread_name_prefix='JCDNS') },
+        'pendingLookups': {},
+        }
+
+def JCAsyncClose():
+    """
+    Stops async mode, executors are shut down, work not started is cancelled
+    """
+    global asyncState
+    if asyncState == None:
+        return
+    for executor in asyncState['executors'].values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    asyncState = None
+
+async def JCAsyncDrain(*executors):
+    """
+    Cancels work not started on executors of async mode and on executors passed, waits for work in progress,
+       waits on a thread of default executor so that event loop keeps running lookups and commands of that work
+    """
+    import functools
+    loop = asyncState['loop']
+    for executor in list(executors) + list(asyncState['executors'].values()):
+        await loop.run_in_executor(None, functools.partial(executor.shutdown, wait=True, cancel_futures=True))
+
+def JCAsyncRequestExit(reason:str):
+    """
+    Asks the coroutine that started async mode to stop, it is cancelled on the event loop,
+       called by signal handler on the event loop thread, exit requested later is ignored
+    Returns True in async mode, False when not in async mode, caller exits in that case
+    """
+    tempAsyncState = asyncState
+    if tempAsyncState == None:
+        return False
+    if tempAsyncState['exitReason'] == None:
+        tempAsyncState['exitReason'] = reason
+        tempAsyncState['loop'].call_soon_threadsafe(tempAsyncState['mainTask'].cancel)
+    return True
+
+def JCAsyncExitReason():
+    """
+    Returns reason passed to JCAsyncRequestExit(), None if exit is not requested
+    """
+    tempAsyncState = asyncState
+    return tempAsyncState['exitReason'] if tempAsyncState != None else None
+
+async def JCAsyncRun(category:str, function, *args):
+    """
+    Runs blocking function on executor of the category, at most limit of the category at a time
+    Returns value returned by the function, exception raised by the function is raised
+    """
+    async with asyncState['semaphores'][category]:
+        return await asyncState['loop'].run_in_executor(asyncState['executors'].get(category), function, *args)
+
+async def JCAsyncLookup(hostName:str):
+    """
+    Looks up IP address of the host, lookup in progress for the same host name is shared
+    Returns IP address, raises socket error of the lookup
+    """
+    import socket
+    pendingLookup = asyncState['pendingLookups'].get(hostName)
+    if pendingLookup != None:
+        return await pendingLookup
+    pendingLookup = asyncState['loop'].create_future()
+    asyncState['pendingLookups'][hostName] = pendingLookup
+    try:
+        ### gethostbyname() gives same address as sequential mode, getaddrinfo() may sort addresses differently
+        ipAddress = await JCAsyncRun('dns', socket.gethostbyname, hostName)
+        pendingLookup.set_result(ipAddress)
+    except Exception as error:
+        pendingLookup.set_exception(error)
+    finally:
+        asyncState['pendingLookups'].pop(hostName, None)
+    return await pendingLookup
+
+async def JCAsyncCommand(command:str):
+    """
+    Runs the command by OS shell, at most command limit at a time, output of the command is not captured
+    Returns exit status in os.system() form
+    """
+    import asyncio
+    if sys.platform == 'win32':
+        shellName = shellFileName = os.environ.get('COMSPEC', 'cmd.exe')
+        commandArgs = [ '/c', command ]
+    else:
+        ### same shell and program name as os.system(), messages of the shell are same
+        shellName, shellFileName = 'sh', '/bin/sh'
+        commandArgs = [ '-c', command ]
+    async with asyncState['semaphores']['command']:
+        process = await asyncio.create_subprocess_exec(shellName, *commandArgs, executable=shellFileName)
+        returnCode = await process.wait()
+    if sys.platform == 'win32':
+        return returnCode
+    ### wait status, exit code in high byte, signal number in low byte
+    if returnCode < 0:
+        return -returnCode
+    return returnCode << 8
+
+def JCAsyncCall(coroutine):
+    """
+    Runs the coroutine on the event loop from an executor thread and waits for the result
+    """
+    import asyncio
+    return asyncio.run_coroutine_threadsafe(coroutine, asyncState['loop']).result()
+
+def JCAsyncIsWorkerThread():
+    """
+    Returns True in async mode when called from a thread other than the event loop thread
+    """
+    tempAsyncState = asyncState
+    return tempAsyncState != None and threading.get_ident() != tempAsyncState['loopThreadId']
+
+def JCAsyncGetHostByName(hostName:str):
+    """
+    Returns IP address of the host, raises socket error of the lookup, same as socket.gethostbyname()
+    """
+    if JCAsyncIsWorkerThread() == True:
+        return JCAsyncCall(JCAsyncLookup(hostName))
+    import socket
+    return socket.gethostbyname(hostName)
+
+def JCAsyncSystem(command:str):
+    """
+    Runs the command, returns exit status, same as os.system()
+    """
+    if JCAsyncIsWorkerThread() == True:
+        return JCAsyncCall(JCAsyncCommand(command))
+    return os.system(command)
@@ -14,24 +14,25 @@ Execution flow
    Get OSType, OSName, OSVersion
    Based on python version, check for availability of yml module
    Read JCEnvironment.yml and allow commands config file
-   Delete log files older than 7 days (not supported on windows yet)
-   Read configuration spec file
-   Replace variable names with variable values in template config file(s)
+   Delete log files older than 7 days on background thread, optionally compress old log files and limit total size
+   For each host passed, or each host of the shard when --shard is passed
+     Read configuration spec file
+     Replace variable names with variable values in template config file(s), 
+       template rendered once for hosts having same values of the variables read by that template
 """
 
 import os
 import sys, signal
 import re
-import time
-import platform
-from collections import defaultdict
-
-from jinja2 import Environment, FileSystemLoader
-from jinja2 import exceptions
-from jinja2 import StrictUndefined
+from collections import ChainMap, defaultdict, deque
+from types import MappingProxyType
 
+### jinja2 and modules used to generate config files are imported after version and help requests are handled
+###   so that those return without loading them, modules of optional features are imported when enabled
 import JCGlobalLib
 import JCReadEnvironmentConfig
+import JCTimings
+import JCTrace
 
 ### define global variables
 JCVersion = "JC01.00.01"
@@ -45,12 +46,97 @@ logFileName  = 'JCConfigGen.log'
 # default parameters read from app config file name
 defaultParameters = {}
 
+# run report file name, set when --timings is passed
+timingsReportFileName = None
+
+# diff summary file name and diff summary written as config files are compared, set when --diff is passed
+diffSummaryFileName = None
+diffSummary = None
+
+# shard of the hosts rendered by this run, set when --shard is passed
+shardIndex = shardCount = None
+shardSuffix = ''
+
+# run manifest, set when --manifest or --shard is passed
+runManifest = None
+
+# journal of config files written by multi-host run, used by --resume
+runJournal = None
+
+# output sink of config files, None when config files are written under config path
+outputSink = None
+
+# metrics file name, set when --metrics is passed
+metricsFileName = None
+
+# async mode, set when --async is passed
+asyncMode = False
+
+# multi host mode, set when more than one host or inventory file is passed
+multiHostMode = False
+
+# config files rendered, deduplicated, failed, hosts skipped by --resume and hosts processed
+renderedCount = dedupedCount = failedCount = resumedCount = hostCount = 0
+
+def JCWriteTimingsReport():
+    """
+    Writes the timings report if --timings is passed
+    Returns one line summary of timings, returns None if timings are not enabled or report could not be written
+    """
+    if JCTimings.timingsEnabled == False or timingsReportFileName == None:
+        return None
+    returnStatus, errorMsg = JCTimings.JCTimingsWriteReport(
+        timingsReportFileName,
+        { 'version': JCVersion, 'hostName': defaultParameters.get('JCHostName'), 
+          'command': defaultParameters.get('JCCommand'), 'shard': shardSuffix })
+    if returnStatus == False:
+        print(errorMsg)
+        return None
+    return "INFO JCConfigGen() Timings {0}, report:{1}".format(JCTimings.JCTimingsSummary(), timingsReportFileName)
+
+def JCWriteMetrics(success:bool):
+    """
+    Writes metrics of the run in Prometheus text format if --metrics is passed
+    Returns error message on failure, None otherwise
+    """
+    if metricsFileName == None:
+        return None
+    import JCMetrics
+    ### component and environment are of the first host, hosts of a multi host run may differ in those
+    metricsLabels = {}
+    if multiHostMode == False:
+        metricsLabels = { 'component': defaultParameters.get('Component', ''), 
+            'environment': defaultParameters.get('Environment', '') }
+    if shardIndex != None:
+        metricsLabels['shard'] = shardSuffix
+    runCounters = { 'rendered': renderedCount, 'skipped': dedupedCount + resumedCount * len(templateFileNamesList),
+        'failed': failedCount, 'hosts': hostCount, 'success': success }
+    returnStatus, errorMsg = JCMetrics.JCMetricsWrite(metricsFileName, JCTimings.JCTimingsReport(),
+        JCTimings.JCTimingsHistograms(), runCounters, metricsLabels)
+    if returnStatus == False:
+        return errorMsg
+    return None
+
 def JCConfigExit(reason):
     """
     convenient functoin print & log error and exit.
     """
     print(reason)
     JCGlobalLib.LogMsg(reason,  logFileName, True, True)
+    JCWriteTimingsReport()
+    JCWriteMetrics(False)
+    JCTrace.JCTraceWrite()
+    ### modules of these are imported when the run opens them, exit before that has nothing to close
+    if runManifest != None:
+        JCShard.JCManifestClose(runManifest, { 'exitReason': reason })
+    if diffSummary != None:
+        JCDiff.JCDiffSummaryClose(diffSummary, { 'exitReason': reason })
+    ### entries of hosts completed before exit are kept so that the run can be resumed
+    if runJournal != None:
+        JCJournal.JCJournalClose(runJournal)
+    ### archive of the run not completed is removed
+    if outputSink != None:
+        JCOutputSink.JCOutputSinkClose(outputSink, True)
     sys.exit()
 
 def JCHelp():
@@ -75,10 +161,74 @@ def JCHelp():
     [-e <environmentSpec>] - file contaning the variable definitions at OS, component, and environment level. 
         Optional parameter, defaults to JCEnvironment.yml file in current path
 
-    [-h <hostName>] - short hostname based on how the variable substituion need to occur
+    [-h <hostName1>[,<hostName2>,...]] - short hostname based on how the variable substituion need to occur
         Optional parameter, if not passed, derived from current hostname where the this rool runs. 
         Using the hostname, OS, component and environment are derived as specified in environment spec file.
           After that, applicable specs based on OS, component and environment are read from environment spec file.
+        When more than one host name is passed in CSV form, config files of all hosts are generated in one run,
+          host name is appended to config file name passed via -c so that config file of each host is unique.
+        Host whose environment spec or template can not be rendered is logged and added to the manifest as failed,
+          remaining templates of that host are skipped and the run continues with the next host.
+          Run exits with status 1 when config file of any host or template failed.
+
+    [--inventory <inventoryFileName>] - generate config files of hosts listed in inventory file, one host per row,
+        in CSV (.csv), JSON Lines (.jsonl, .ndjson) or YAML (.yml, .yaml) form, -h is not used when this is passed.
+        Each row has hostName, optional siteNamePrefix, OS facts OSType, OSName, OSVersion and parameter overrides,
+          refer JCInventory.py for the format. Rows are read one by one while config files are generated,
+          rows with error are reported and skipped.
+
+    [--hosts <hostListFileName>] - generate config files of hosts listed in host list file, one host name per line
+        or host names in CSV form, lines starting with # are skipped. -h is not used when this is passed.
+
+    [--shard K/N] - split the hosts passed via -h, --hosts or --inventory into N shards and generate config files
+        of the hosts in shard K only, K being 1 to N. Shard of a host depends only on its host name and N, 
+          so that N runs, on same or different machines, with same host list and K of 1 to N, together generate 
+          config files of all hosts, each host in one shard.
+        Shard id, shard<K>of<N>, is used in place of <hostName> in default timings, trace, diff and manifest file names
+          and is added to log file name.
+        Merge the manifests and timings reports of all shards using
+          python3 JCShard.py -m <manifest1>,<manifest2>,... -o <mergedManifest> [-r <report1>,... -R <mergedReport>]
+
+    [--manifest [<manifestFileName>]] - write the list of config files generated, with host name, template file name
+        and status, in JSON Lines form. Written when --shard is passed even if --manifest is not passed.
+        Defaults to <logFilePath>/JCConfigGen.manifest.<hostName>.jsonl
+
+    [--journal <journalFileName>] - journal of config files written when more than one host is passed, host name,
+        template file name, config file name and SHA-256 of config file are added as each host completes.
+        Defaults to <logFilePath>/JCConfigGen.journal.<hostName>.jsonl
+
+    [--resume] - resume the run stopped before completion, pass same parameters as that run.
+        Hosts whose config files are all in the journal and are not changed after written are skipped.
+        Journal of earlier run is not used when command, inventory file, environment spec or templates are changed.
+        Journal is written when config files are written under config path, not with other --output types.
+
+    [--output dir|tar|tar.gz|tar.zst|zip|ndjson|store[:<fileName>]] - write config files under config path (dir, default),
+        to one tar archive, gzip or zstd compressed tar archive, zip archive, or as JSON Lines, one config file per line,
+        with configFileName, hostName, templateFileName, content. ndjson is written to stdout when file name is not 
+          given, log lines are written to stderr in that case.
+        store writes config files to content addressed store at <fileName> path, each unique content is stored once,
+          with a manifest per host per run, refer JCContentStore.py to compare runs, materialize config files and
+          remove old runs. Defaults to <configPath>/JCContentStore
+        Config file names in the archive are relative to config path.
+        Archive defaults to <configPath>/JCConfigGen.<hostName>.<type>
+        tar.zst needs zstandard module, or python 3.14 or later
+
+    [--compress-level <level>] - compression level of tar.gz (1 to 9), tar.zst (1 to 22) and zip (0 to 9, 0 to store)
+        Defaults to 6 for tar.gz, 3 for tar.zst, default of zlib for zip
+
+    [--buffer-size <KB>] - write buffer size of --output file in KB, defaults to 1024
+
+    [--async [<category>=<limit>,...]] - when more than one host is passed, render hosts concurrently using asyncio,
+        DNS lookups and commands run by templates of many hosts overlap, templates render on executor threads,
+        config files are written in host order on one thread, output is same as without --async.
+        Templates calling JCHostNameToIPAddress(), JCHostNamesToIPAddresses(), JCHostNameToIPSegment() or JCSystem()
+          are rendered by the event loop with jinja2 enable_async, host names passed to JCHostNamesToIPAddresses()
+          are looked up together, other templates render on executor threads as before.
+        Log lines written while rendering, like DNS errors, may come before log lines of earlier hosts.
+        On Control-C, kill or error that stops the run, hosts not started are cancelled and hosts in progress are
+          completed before the run exits.
+        Categories and default limits - host=16 hosts in progress, render=CPU count + 4 (max 32) hosts rendering,
+          dns=32 lookups, command=4 commands
 
     [-T <templatePath>] - absolute or relative path where template files are present
         Optional parameter, defaults to JCTemplatePath defined in environment spec
@@ -100,6 +250,40 @@ def JCHelp():
     [-l <logFileName>] - log file name
         Defaults to the terminal in the interactive mode
         Defaults to JCConfigGen.log.YYYYmmddHHMMSS in non-interactive mode
+
+    [--timings [<reportFileName>]] - measure wall time and CPU time of each phase and each template render,
+        write the report in JSON form to <reportFileName> and one line summary to the log.
+        Defaults to <logFilePath>/JCConfigGen.timings.<hostName>.json
+
+    [--facts [<factsFileName>]] - read OS type, OS name and OS version of the host from facts file in JSON form,
+        facts not present in the file or stale are detected on current host and saved to the file.
+        Facts of remote hosts may be added to this file to generate their configs on current host (off line config generation),
+            { "<hostName>": { "OSType": "Linux", "OSName": "rhel", "OSVersion": "8" } }
+        Defaults to ./temp/JCHostFacts.json
+
+    [--dedupe copy|hardlink|none] - when more than one host is passed, render each template once for the hosts
+        having same values of the variables read by that template, and write that output to config files of
+        other hosts by copying it or as hard link to it. 
+        Templates including a template by a name known at render time only and templates calling JCSetVariable()
+          or JCSystem() are rendered for each host.
+        Defaults to copy, pass none to render each template for each host
+
+    [--metrics [<metricsFileName>]] - write metrics of the run in Prometheus text format at the end of the run, to be read
+        by node exporter textfile collector. Counts of config files rendered, skipped and failed, histograms of
+          template render time and phase time, output bytes, DNS lookups and commands run, cache hit ratios,
+          labeled with component and environment when one host is passed. File is written to a temp file and renamed.
+        Defaults to <logFilePath>/JCConfigGen.<hostName>.prom
+
+    [--diff [<summaryFileName>]] - dry run, render the templates in memory and compare to existing config files,
+        print differences in unified diff form, config files are not written.
+        Write summary of changed, unchanged and new config files in JSON Lines form to <summaryFileName>,
+          a line per config file as it is compared and a line with counts at the end
+        Defaults to <logFilePath>/JCConfigGen.diff.<hostName>.jsonl
+
+    [--trace [<traceFileName>]] - write timeline of the run in Chrome trace event format with spans for 
+        each host, template render, file write, command execution and DNS lookup.
+        View it using chrome://tracing or https://ui.perfetto.dev
+        Defaults to <logFilePath>/JCConfigGen.trace.<hostName>.json
     """
 
     helpString3 = """
@@ -171,7 +355,7 @@ def JCHelp():
                 {% set myIPSegment = JCHostNameToIPSegment( JCHostName ) -%} 
             JCSetVariable( name, value )
                 set the variable value in the memory to be carried forward while processing other
-                   templates read via include
+                   templates read via include and templates rendered after that for the same host
             JCSystem( command )
                 run system command and return the response
                 use it to run any windows or linux command and get the response back
@@ -181,11 +365,19 @@ def JCHelp():
     print(helpString3)
     return None
 
-### install signal handler to exit upon ctrl-C
+### install signal handler to exit upon ctrl-C or kill, JCConfigExit() flushes the journal, manifest and reports
+###   in --async mode, hosts in progress are completed first and JCConfigExit() is called after the event loop stops
 def JCSignalHandler(sig, frame):
-    JCConfigExit("Control-C pressed")
+    if sig == signal.SIGINT:
+        reason = "Control-C pressed"
+    else:
+        reason = "ERROR JCConfigGen() received signal:{0}, exiting".format(sig)
+    if asyncMode == True and JCAsync.JCAsyncRequestExit(reason) == True:
+        return
+    JCConfigExit(reason)
 
 signal.signal(signal.SIGINT, JCSignalHandler)
+signal.signal(signal.SIGTERM, JCSignalHandler)
 
 ### display help if no arg passed
 if len(sys.argv) < 2:
@@ -199,6 +391,35 @@ argsPassed = {}
 
 JCGlobalLib.JCParseArgs(argsPassed)
 
+### version and help do not need template processing, return before OS detection and module loading
+if '-V' in argsPassed:
+    print(JCVersion)
+    sys.exit()
+    
+if '-H' in argsPassed:
+    JCHelp()
+    sys.exit()
+
+import JCHostFacts
+import JCInventory
+import JCLogRetention
+import JCShard
+import JCTemplateAnalysis
+
+### diff mode, config files are not written, rendered text is compared to existing config files
+diffMode = ('--diff' in argsPassed)
+if diffMode == True:
+    import JCDiff
+
+if '--timings' in argsPassed or '--metrics' in argsPassed:
+    ### metrics are made from timings, timings report is written only when --timings is passed
+    JCTimings.JCTimingsEnable()
+if argsPassed.get('--metrics', '') != '':
+    metricsFileName = argsPassed['--metrics']
+if '--trace' in argsPassed:
+    ### when trace file name is not passed, it is set after log file path is known
+    JCTrace.JCTraceEnable(argsPassed['--trace'] if argsPassed['--trace'] != '' else None)
+
 ### formulate the command so that the command used to generate the output file can be added to the 
 ###   config file header for traceability / debugging any issues
 JCCommand = 'python3 JCConfigGen.py '
@@ -272,23 +493,93 @@ if '-s' in argsPassed:
 else:
     siteNamePrefix = 5
 
-if '-h' in argsPassed:
-    thisHostName = argsPassed['-h']
-    JCCommand += " -h {0}".format(thisHostName)
-else:
-    thisHostName = platform.node()
-
-# if hostname has domain name, strip it
-hostNameParts = thisHostName.split('.')
-defaultParameters['JCHostName'] = thisHostName = hostNameParts[0]
-if siteNamePrefix != None:
-    defaultParameters['JCSiteName'] = thisHostName[ :siteNamePrefix]
+def JCSetHostNameParameters( parameters, hostName, hostSiteNamePrefix=None ):
+    """
+    Sets the host name and site name parameters of given host in parameters dictionary
+        hostSiteNamePrefix - site name length of the host, defaults to siteNamePrefix
+    Returns short host name, domain name stripped
+    """
+    if hostSiteNamePrefix == None:
+        hostSiteNamePrefix = siteNamePrefix
+    # if hostname has domain name, strip it
+    hostNameParts = hostName.split('.')
+    parameters['JCHostName'] = hostName = hostNameParts[0]
+    if hostSiteNamePrefix != None:
+        parameters['JCSiteName'] = hostName[ :hostSiteNamePrefix]
+    else:
+        parameters['JCSiteName'] = ''
+    parameters['JCSiteName3Chars'] = hostName[ :3]
+    parameters['JCSiteName4Chars'] = hostName[ :4]
+    parameters['JCSiteName5Chars'] = hostName[ :5]
+    parameters['JCSiteName6Chars'] = hostName[ :6]
+    return hostName
+
+if '--shard' in argsPassed:
+    shardIndex, shardCount, errorMsg = JCShard.JCShardParse(argsPassed['--shard'])
+    if shardIndex == None:
+        print(errorMsg)
+        sys.exit()
+    shardSuffix = JCShard.JCShardSuffix(shardIndex, shardCount)
+
+### host records are read one by one from inventory file or host list file or made from host names passed
+###   errors in inventory rows read before first host are reported after log file is opened
+inventoryErrors = []
+if '--inventory' in argsPassed or '--hosts' in argsPassed:
+    if '--inventory' in argsPassed:
+        inventoryFileName, inventoryFormat = argsPassed['--inventory'], None
+        JCCommand += " --inventory {0}".format(inventoryFileName)
+    else:
+        inventoryFileName, inventoryFormat = argsPassed['--hosts'], 'list'
+        JCCommand += " --hosts {0}".format(inventoryFileName)
+    hostRecords = JCInventory.JCInventoryStream(inventoryFileName, JCGlobalLib.JCIsYamlModulePresent(),
+        inventoryFormat=inventoryFormat)
+    if shardIndex != None:
+        hostRecords = JCShard.JCShardFilter(hostRecords, shardIndex, shardCount)
+    firstHostRecord = None
+    for lineNumber, hostRecord, errorMsg in hostRecords:
+        if hostRecord == None:
+            inventoryErrors.append(errorMsg)
+            continue
+        firstHostRecord = hostRecord
+        break
+    if firstHostRecord == None:
+        for errorMsg in inventoryErrors:
+            print(errorMsg)
+        if shardIndex != None:
+            ### hosts are not spread evenly when there are few hosts, a shard may not have any host
+            print("WARN JCConfigGen() no host of inventory file:{0} is in shard:{1}".format(inventoryFileName, argsPassed['--shard']))
+        else:
+            print("ERROR JCConfigGen() no host found in inventory file:{0}".format(inventoryFileName))
+        sys.exit()
+    multiHostMode = True
 else:
-    defaultParameters['JCSiteName'] = ''
-defaultParameters['JCSiteName3Chars'] = thisHostName[ :3]
-defaultParameters['JCSiteName4Chars'] = thisHostName[ :4]
-defaultParameters['JCSiteName5Chars'] = thisHostName[ :5]
-defaultParameters['JCSiteName6Chars'] = thisHostName[ :6]
+    if '-h' in argsPassed:
+        JCCommand += " -h {0}".format(argsPassed['-h'])
+        hostNamesList = [ hostName.strip() for hostName in argsPassed['-h'].split(',') if hostName.strip() != '' ]
+    else:
+        import platform
+        hostNamesList = [ platform.node() ]
+    ### same host passed more than once is processed once
+    hostNamesList = list(dict.fromkeys( hostName.split('.')[0] for hostName in hostNamesList ))
+    ### config files of a shard are named same as in a run of all hosts
+    multiHostMode = len(hostNamesList) > 1 or shardIndex != None
+    hostRecords = JCInventory.JCInventoryHostRecords(hostNamesList)
+    if shardIndex != None:
+        hostRecords = JCShard.JCShardFilter(hostRecords, shardIndex, shardCount)
+    firstHostRecord = next(hostRecords, (0, None, ''))[1]
+    if firstHostRecord == None:
+        print("WARN JCConfigGen() no host of host names:{0} is in shard:{1}".format(
+            ','.join(hostNamesList), argsPassed['--shard']))
+        sys.exit()
+if shardIndex != None:
+    JCCommand += " --shard {0}".format(argsPassed['--shard'])
+if argsPassed.get('--manifest', '') != '':
+    JCCommand += " --manifest {0}".format(argsPassed['--manifest'])
+
+### first host is current host of the run, its name is used in temp, report and log file names
+thisHostName = JCSetHostNameParameters( defaultParameters, firstHostRecord['hostName'], firstHostRecord['siteNamePrefix'] )
+### report file names of a shard have shard id so that those are known before the run, to merge
+runFileTag = shardSuffix if shardIndex != None else thisHostName
 
 if '-c' in argsPassed:
     outputFileNames = argsPassed['-c']
@@ -302,6 +593,61 @@ else:
         tempOutputFileName = "{0}.{1}".format( tempTemplateFileName, thisHostName )
         outputFileNamesList.append( tempOutputFileName )
 
+def JCHostOutputFileNames( hostName ):
+    """
+    Returns output file names of given host in the same order as template file names
+    """
+    if '-c' in argsPassed:
+        if multiHostMode == False:
+            return outputFileNamesList
+        ### config file names passed are same for all hosts, append host name to make these unique
+        return [ "{0}.{1}".format( tempOutputFileName, hostName ) for tempOutputFileName in outputFileNamesList ]
+    return [ "{0}.{1}".format( tempTemplateFileName, hostName ) for tempTemplateFileName in templateFileNamesList ]
+
+### render each template once for hosts with same values of variables read by that template
+dedupeMethod = 'copy'
+if multiHostMode == True or '--dedupe' in argsPassed:
+    import JCDedupe
+if '--dedupe' in argsPassed:
+    if argsPassed['--dedupe'] != '':
+        dedupeMethod = argsPassed['--dedupe']
+    if dedupeMethod not in JCDedupe.JCDedupeMethods:
+        print("ERROR JCConfigGen() --dedupe value:{0} is not one of {1}".format(dedupeMethod, JCDedupe.JCDedupeMethods))
+        sys.exit()
+    JCCommand += " --dedupe {0}".format(dedupeMethod)
+if multiHostMode == False:
+    dedupeMethod = 'none'
+
+### async mode, hosts after the first host are rendered by asyncio tasks, output is same as sequential mode
+asyncMode = ('--async' in argsPassed)
+asyncLimits = None
+if asyncMode == True:
+    import JCAsync
+    asyncLimits, errorMsg = JCAsync.JCAsyncParseLimits(argsPassed['--async'])
+    if asyncLimits == None:
+        print(errorMsg)
+        sys.exit()
+
+### output sink of config files, sink is opened after config path is known
+outputSinkType, outputSinkFileName = 'dir', None
+if '--output' in argsPassed:
+    import JCOutputSink
+    outputSinkType, outputSinkFileName, errorMsg = JCOutputSink.JCOutputSinkParse(argsPassed['--output'])
+    if outputSinkType == None:
+        print(errorMsg)
+        sys.exit()
+    try:
+        outputSinkCompressLevel = int(argsPassed['--compress-level']) if '--compress-level' in argsPassed else None
+        outputSinkBufferSize = int(argsPassed.get('--buffer-size', JCOutputSink.JCOutputSinkBufferSize // 1024)) * 1024
+    except ValueError:
+        print("ERROR JCConfigGen() --compress-level and --buffer-size need integer values")
+        sys.exit()
+outputSinkStream = None
+if outputSinkType == 'ndjson' and outputSinkFileName in (None, '-') and diffMode == False:
+    ### stdout has config files only, messages printed are written to stderr
+    outputSinkStream = sys.stdout
+    sys.stdout = sys.stderr
+
 if '-l' in argsPassed:
     JCCommand += " -l {0}".format(argsPassed['-l'])
     try:
@@ -319,20 +665,34 @@ if '-D' in argsPassed:
 if debugLevel > 0 :
     print("DEBUG-1 JCConfigGen() Version {0}\nParameters passed: {1}".format(JCVersion, argsPassed))
 
-if '-V' in argsPassed:
-    print(JCVersion)
-    sys.exit()
-    
-if '-H' in argsPassed:
-    JCHelp()
-    sys.exit()
-
 # get OSType, OSName, and OSVersion. These are used to execute different python
 # functions based on compatibility to the environment
-OSType, OSName, OSVersion = JCGlobalLib.JCGetOSInfo(sys.version_info, debugLevel)
+### facts of the host are read from facts file when passed, facts not present in the file or stale are probed
+###   and saved back to the file for next run
+factsFileName = None
+if '--facts' in argsPassed:
+    if argsPassed['--facts'] != '':
+        factsFileName = argsPassed['--facts']
+    else:
+        factsFileName = './temp/JCHostFacts.json'
+    JCCommand += " --facts {0}".format(factsFileName)
+with JCTimings.JCTimer('osDetection'):
+    if factsFileName != None:
+        returnStatus, errorMsg = JCHostFacts.JCHostFactsLoad(factsFileName)
+        if returnStatus == False:
+            print(errorMsg)
+    hostFacts = JCHostFacts.JCHostFactsGet(thisHostName, JCHostFacts.JCOSFactNames, debugLevel)
+    OSType, OSName, OSVersion = hostFacts['OSType'], hostFacts['OSName'], hostFacts['OSVersion']
+    if factsFileName != None and JCHostFacts.hostFactsChanged == True:
+        if os.path.exists(os.path.dirname(factsFileName) or '.') == False:
+            os.makedirs(os.path.dirname(factsFileName))
+        returnStatus, errorMsg = JCHostFacts.JCHostFactsSave(factsFileName)
+        if returnStatus == False:
+            print(errorMsg)
 
 ### check whether yaml module is present
-yamlModulePresent = JCGlobalLib.JCIsYamlModulePresent()
+with JCTimings.JCTimer('yamlModuleCheck'):
+    yamlModulePresent = JCGlobalLib.JCIsYamlModulePresent()
 
 ### save the command used to generate the output file so that it can be added to the config file header if opted
 defaultParameters['JCCommand'] = JCCommand
@@ -399,7 +759,7 @@ if environmentTERM == '' or environmentTERM == 'dumb':
     if outputFileHandle == None:
         tempOutputFileName = '{0}/{1}.{2}'.format(
             defaultParameters['JCLogFilePath'],
-            logFileName,
+            logFileName if shardIndex == None else "{0}.{1}".format(logFileName, shardSuffix),
             JCGlobalLib.UTCDateForFileName())
         try:
             outputFileHandle = open ( tempOutputFileName, "a")
@@ -412,14 +772,18 @@ if environmentTERM == '' or environmentTERM == 'dumb':
 else:
     interactiveMode = True
 
-import socket
 def JCHostNameToIPAddress( hostName):
     """
     This function returns the IP address of hostName
     """
+    import socket
     tempIPAddress = None
     try:
-        tempIPAddress = socket.gethostbyname(hostName)
+        with JCTimings.JCTimer('JCHostNameToIPAddress', 'call', hostName, 'dns'):
+            if asyncMode == True:
+                tempIPAddress = JCAsync.JCAsyncGetHostByName(hostName)
+            else:
+                tempIPAddress = socket.gethostbyname(hostName)
     except socket.gaierror:
         JCGlobalLib.LogLine(
                 "ERROR JCHostNameToIPAddress() socket.gethostbyname() resulted in gaierror, error getting IP address of hostName:{0} ".format( hostName ),
@@ -473,127 +837,271 @@ def JCString(myString, startPos, endPos):
     
     return myString[startPos:endPos]
 
-def JCSetVariable( name, value ):
+def JCSystem( command ):
     """
-    This function stores the value of key in defaultParameters dictionary
+    This function executes the given system command or OS command and returns the response
     """
-    global defaultParameters, templateEnvironment
-    templateEnvironment.globals[name] = value
-    # defaultParameters[name] = value
-    return True
+    result = None
+    try:
+        with JCTimings.JCTimer('JCSystem', 'call', 'JCSystem', 'command', {'command': command}):
+            if asyncMode == True:
+                result = JCAsync.JCAsyncSystem( command)
+            else:
+                result = os.system( command)
+    except OSError as error:
+        result = "ERROR executing the command:|{0}|, error:|{1}|".format( command, error)
+    return result
 
-def JCSystem( command ):
+### awaitable versions of template functions, used by templates rendered with enable_async in --async mode
+###   values returned and errors logged are same as functions above
+async def JCHostNameToIPAddressAsync( hostName):
     """
-    This function executes the given system command or OS command and returns the response
+    This function returns the IP address of hostName, lookup is run by the event loop
+    """
+    import socket
+    tempIPAddress = None
+    try:
+        with JCTimings.JCTimer('JCHostNameToIPAddress', 'call', hostName, 'dns'):
+            tempIPAddress = await JCAsync.JCAsyncLookup(hostName)
+    except socket.gaierror:
+        JCGlobalLib.LogLine(
+                "ERROR JCHostNameToIPAddress() socket.gethostbyname() resulted in gaierror, error getting IP address of hostName:{0} ".format( hostName ),
+                interactiveMode,
+                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    except Exception as error:
+        JCGlobalLib.LogLine(
+                "ERROR JCHostNameToIPAddress() socket.gethostbyname() resulted in error: {0}, error getting IP address of hostName:{1} ".format(error, hostName ),
+                interactiveMode,
+                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+    return tempIPAddress
+
+async def JCHostNameToIPSegmentAsync( hostname ):
+    """
+    Return the first three octects of IP address (skip last octet)
+    """
+    tempIPAddress = await JCHostNameToIPAddressAsync( hostname)
+    if ( tempIPAddress != None ):
+        lastDotPosition = tempIPAddress.rfind( '.')
+        return ( tempIPAddress[0:lastDotPosition])
+    else:
+        return("ERROR xlating hostname to IP")
+
+async def JCHostNamesToIPAddressesAsync( hostNames):
+    """
+    This function returns the IP addresses array of hostNames passed in array, host names are looked up together
+    """
+    import asyncio
+    ipAddressArray = []
+    for tempIPAddress in await asyncio.gather(*[ JCHostNameToIPAddressAsync( hostName) for hostName in hostNames ]):
+        if tempIPAddress != None:
+            ipAddressArray.append( tempIPAddress )
+        else:
+            ipAddressArray.append( "ERROR xlating hostname to IP" )
+    return ipAddressArray
+
+async def JCSystemAsync( command ):
+    """
+    This function executes the given system command or OS command and returns the response,
+       command is run by the event loop
     """
     result = None
     try:
-        result = os.system( command)
+        with JCTimings.JCTimer('JCSystem', 'call', 'JCSystem', 'command', {'command': command}):
+            result = await JCAsync.JCAsyncCommand( command)
     except OSError as error:
         result = "ERROR executing the command:|{0}|, error:|{1}|".format( command, error)
     return result
 
+### 
+from jinja2 import FileSystemLoader
+from jinja2 import exceptions
+from jinja2 import StrictUndefined
+import JCRenderContext
+
 ### below functions can be called within the template
+###   JCSetVariable() is bound to the render context of each host by JCRenderContext
 JCFunctions = {
     "JCHostNameToIPAddress": JCHostNameToIPAddress,
     "JCString": JCString,
-    "JCSetVariable": JCSetVariable,
+    "JCSetVariable": JCRenderContext.JCRenderContext.JCSetVariable,
     "JCHostNameToIPSegment": JCHostNameToIPSegment,
     "JCHostNamesToIPAddresses": JCHostNamesToIPAddresses,
     "JCSystem": JCSystem,
 }
-### 
+
+### functions replaced by awaitable versions when the template is rendered with enable_async
+JCAsyncFunctions = {
+    "JCHostNameToIPAddress": JCHostNameToIPAddressAsync,
+    "JCHostNameToIPSegment": JCHostNameToIPSegmentAsync,
+    "JCHostNamesToIPAddresses": JCHostNamesToIPAddressesAsync,
+    "JCSystem": JCSystemAsync,
+}
+
 PATH = os.path.dirname(os.path.abspath(__file__))
-templateEnvironment = Environment(
+### template environment is shared by all hosts, it is not changed after this, values set by JCSetVariable()
+###   are kept in render context of each host
+templateEnvironment = JCRenderContext.JCEnvironment(
     autoescape=False,
     loader=FileSystemLoader(defaultParameters['JCTemplatePath']),
     undefined=StrictUndefined,
     trim_blocks=False)
 
+### in --async mode, templates calling functions in JCAsyncFunctions are rendered by the event loop using this
+###   environment, so that lookups and commands of many templates overlap, other templates use templateEnvironment
+templateAsyncEnvironment = None
+if asyncMode == True:
+    templateAsyncEnvironment = JCRenderContext.JCEnvironment(
+        autoescape=False,
+        loader=templateEnvironment.loader,
+        undefined=StrictUndefined,
+        trim_blocks=False,
+        enable_async=True)
+
+def JCTemplateCallsAsyncFunctions(templateEnvironment, templateFileName):
+    """
+    Returns True if the template or templates it includes call functions in JCAsyncFunctions
+    """
+    with JCTimings.JCTimer('templateAnalysis'):
+        analysis = JCTemplateAnalysis.JCTemplateAnalyze(templateEnvironment, templateFileName, JCFunctions)
+    return analysis != None and len(analysis['functions'].intersection(JCAsyncFunctions)) > 0
+
+def JCRenderErrorContext(templateEnvironment, templateFileName, templateVariables ):
+    """
+    Returns values of variables read by the template in name: value lines, all variables if template 
+       can not be analyzed. Called on render error only.
+    """
+    analysis = JCTemplateAnalysis.JCTemplateAnalyze(templateEnvironment, templateFileName, JCFunctions)
+    if analysis == None:
+        return JCTemplateAnalysis.JCTemplateFormatVariables(templateVariables)
+    return JCTemplateAnalysis.JCTemplateFormatVariables(templateVariables, analysis['variables'])
+
 ### render environment spec file to include other files within the main file
-def JCRenderTemplateFile(templateEnvironment, templateFileName, configFileName, function_dict ):
+def JCRenderTemplate(templateEnvironment, templateFileName, renderContext, templateVariables=None ):
+    """
+    Renders the template to memory using templateVariables, defaults to defaultParameters,
+       template functions and values set by JCSetVariable() in renderContext of the host
+    Returns
+        returnStatus - True on success, False on error, error is logged
+        outputText - rendered text, None on error
+    """
     global defaultParameters, interactiveMode, myColors, colorIndex, outputFileHandle, HTMLBRTag, OSType
     returnStatus = False
-    sortedDefaultParameters = ''
-    for key, value in sorted(defaultParameters.items()):
-        sortedDefaultParameters += "{0}: {1}\n".format(key, value)
+    outputText = None
+    if templateVariables == None:
+        templateVariables = defaultParameters
     try:
-        with open(configFileName, 'w') as outputFile:
-            try:
+        if ( templateAsyncEnvironment != None and JCAsync.JCAsyncIsWorkerThread() == True and
+             JCTemplateCallsAsyncFunctions(templateEnvironment, templateFileName) == True ):
+            with JCTimings.JCTimer(templateFileName, 'template'):
+                tempTemplate = templateAsyncEnvironment.get_template(templateFileName)
+                outputText = JCAsync.JCAsyncCall(JCRenderContext.JCRenderContextRenderAsync(
+                    tempTemplate, templateVariables, renderContext, JCAsyncFunctions))
+        else:
+            with JCTimings.JCTimer(templateFileName, 'template'):
                 tempTemplate = templateEnvironment.get_template(templateFileName)
-                tempTemplate.globals.update(function_dict)
-                outputText = tempTemplate.render(defaultParameters)
-                outputFile.write(outputText)
-                outputFile.close()
-                if debugLevel > 0:
-                    JCGlobalLib.LogLine(
-                        "DEBUG-1 JCRenderTemplateFile() Generated output file:|{0}| from template file:|{1}|".format(
-                                configFileName, templateFileName ),
-                                interactiveMode,
-                                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
-                returnStatus = True
+                outputText = JCRenderContext.JCRenderContextRender(tempTemplate, templateVariables, renderContext)
+        returnStatus = True
 
-            except exceptions.FilterArgumentError:
-                JCGlobalLib.LogLine(
-                    "ERROR JCRenderTemplateFile() - FilterArgumentError - Error processing the template file:{0} using jinja2 get_template()".format(
-                            templateFileName ),
-                            interactiveMode,
-                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    except exceptions.FilterArgumentError:
+        JCGlobalLib.LogLine(
+            "ERROR JCRenderTemplateFile() - FilterArgumentError - Error processing the template file:{0} using jinja2 get_template()".format(
+                    templateFileName ),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
 
-            except exceptions.SecurityError as error:
-                JCGlobalLib.LogLine(
-                    "ERROR JCRenderTemplateFile() - SecurityError - Error processing the template file:{0} using jinja2 get_template(), error:{1}".format(
-                            templateFileName, error ),
-                            interactiveMode,
-                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    except exceptions.SecurityError as error:
+        JCGlobalLib.LogLine(
+            "ERROR JCRenderTemplateFile() - SecurityError - Error processing the template file:{0} using jinja2 get_template(), error:{1}".format(
+                    templateFileName, error ),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
 
-            except exceptions.TemplateAssertionError:
-                JCGlobalLib.LogLine(
-                    "ERROR JCRenderTemplateFile() - TemplateAssertionError - Error opening the template file:{0} using jinja2 get_template()".format(
-                            templateFileName ),
-                            interactiveMode,
-                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    except exceptions.TemplateAssertionError:
+        JCGlobalLib.LogLine(
+            "ERROR JCRenderTemplateFile() - TemplateAssertionError - Error opening the template file:{0} using jinja2 get_template()".format(
+                    templateFileName ),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
 
-            except exceptions.TemplateError as error:
-                tempLineNumber =  tempMessage = ''
+    except exceptions.TemplateError as error:
+        tempLineNumber =  tempMessage = ''
 
-                if hasattr(error, 'lineno') and error.lineno is not None:
-                    tempLineNumber = error.lineno
-                if hasattr(error, 'message') and error.message is not None:
-                    tempMessage = error.message
-                
-                JCGlobalLib.LogLine(
-                    " JCRenderTemplateFile() - TemplateError - Error rendering template file:{0} using variable values:{1}\nERROR {2}, lineno: {3}, message:{4}".format(
-                            templateFileName, sortedDefaultParameters, error, tempLineNumber, tempMessage ),
-                            interactiveMode,
-                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+        if hasattr(error, 'lineno') and error.lineno is not None:
+            tempLineNumber = error.lineno
+        if hasattr(error, 'message') and error.message is not None:
+            tempMessage = error.message
+        
+        JCGlobalLib.LogLine(
+            " JCRenderTemplateFile() - TemplateError - Error rendering template file:{0} using variable values:{1}\nERROR {2}, lineno: {3}, message:{4}".format(
+                    templateFileName, JCRenderErrorContext(templateEnvironment, templateFileName, templateVariables), error, tempLineNumber, tempMessage ),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
 
-            except exceptions.TemplateSyntaxError as error:
-                JCGlobalLib.LogLine(
-                    " JCRenderTemplateFile() - TemplateSyntaxError - Error rendering template file:{0} using variable values:{1}\nERROR {2}".format(
-                            templateFileName, sortedDefaultParameters, error ),
-                            interactiveMode,
-                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    except exceptions.TemplateSyntaxError as error:
+        JCGlobalLib.LogLine(
+            " JCRenderTemplateFile() - TemplateSyntaxError - Error rendering template file:{0} using variable values:{1}\nERROR {2}".format(
+                    templateFileName, JCRenderErrorContext(templateEnvironment, templateFileName, templateVariables), error ),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
 
-            except exceptions.TemplateRuntimeError:
-                JCGlobalLib.LogLine(
-                    "ERROR JCRenderTemplateFile() - TemplateRuntimeError - Error opening the template file:{0} using jinja2 get_template()".format(
-                            templateFileName ),
-                            interactiveMode,
-                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
-            except exceptions.UndefinedError as error:
-                JCGlobalLib.LogLine(
-                    " JCRenderTemplateFile() - UndefinedError - Error rendering the template file:{0} using variable values:{1}\nERROR {2}".format(
-                            templateFileName,  sortedDefaultParameters, error),
-                            interactiveMode,
-                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
-            except OSError as error:
-                JCGlobalLib.LogLine(
-                    "ERROR JCRenderTemplateFile() unknown error while processing the template file:{0}, error:{1}".format(
-                            templateFileName, error ),
-                            interactiveMode,
-                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
-            
+    except exceptions.TemplateRuntimeError:
+        JCGlobalLib.LogLine(
+            "ERROR JCRenderTemplateFile() - TemplateRuntimeError - Error opening the template file:{0} using jinja2 get_template()".format(
+                    templateFileName ),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    except exceptions.UndefinedError as error:
+        JCGlobalLib.LogLine(
+            " JCRenderTemplateFile() - UndefinedError - Error rendering the template file:{0} using variable values:{1}\nERROR {2}".format(
+                    templateFileName,  JCRenderErrorContext(templateEnvironment, templateFileName, templateVariables), error),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    except OSError as error:
+        JCGlobalLib.LogLine(
+            "ERROR JCRenderTemplateFile() unknown error while processing the template file:{0}, error:{1}".format(
+                    templateFileName, error ),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+    return returnStatus, outputText
+
+def JCWriteConfigFile(templateFileName, configFileName, outputText, outputSink=None, entryInfo=None ):
+    """
+    Writes rendered text to config file, or adds it to outputSink when passed
+        entryInfo - hostName, templateFileName of the config file, added to ndjson output
+    Returns True on success, False on error, error is logged
+    """
+    global defaultParameters, interactiveMode, myColors, colorIndex, outputFileHandle, HTMLBRTag, OSType
+    if outputSink != None:
+        with JCTimings.JCTimer(templateFileName, 'write'):
+            returnStatus, errorMsg = JCOutputSink.JCOutputSinkWrite(outputSink, configFileName, outputText, entryInfo)
+        if returnStatus == False:
+            JCGlobalLib.LogLine(
+                errorMsg,
+                interactiveMode,
+                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+        elif JCTimings.timingsEnabled == True:
+            JCTimings.JCTimingsAddOutputBytes(templateFileName, len(outputText.encode()))
+        return returnStatus
+    returnStatus = False
+    try:
+        with JCTimings.JCTimer(templateFileName, 'write'):
+            ### config file hard linked to config file of other host by --dedupe hardlink, 
+            ###   remove the link so that config file of other host is not changed
+            if os.path.isfile(configFileName) and os.stat(configFileName).st_nlink > 1:
+                os.remove(configFileName)
+            with open(configFileName, 'w') as outputFile:
+                outputFile.write(outputText)
+        if JCTimings.timingsEnabled == True:
+            JCTimings.JCTimingsAddOutputBytes(templateFileName, len(outputText.encode()))
+        if debugLevel > 0:
+            JCGlobalLib.LogLine(
+                "DEBUG-1 JCRenderTemplateFile() Generated output file:|{0}| from template file:|{1}|".format(
+                        configFileName, templateFileName ),
+                        interactiveMode,
+                        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+        returnStatus = True
     except OSError as error:
         JCGlobalLib.LogLine(
             "ERROR JCRenderTemplateFile() Could not open config file:{0}, error:{1}".format(configFileName, error ),
@@ -601,6 +1109,17 @@ def JCRenderTemplateFile(templateEnvironment, templateFileName, configFileName,
                     myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
     return returnStatus
 
+def JCRenderTemplateFile(templateEnvironment, templateFileName, configFileName, renderContext, templateVariables=None,
+        outputSink=None, entryInfo=None ):
+    """
+    Renders the template and writes config file, or adds it to outputSink when passed
+    Returns True on success, False on error, error is logged
+    """
+    returnStatus, outputText = JCRenderTemplate(templateEnvironment, templateFileName, renderContext, templateVariables)
+    if returnStatus == False:
+        return returnStatus
+    return JCWriteConfigFile(templateFileName, configFileName, outputText, outputSink, entryInfo)
+
 def JCMergeIncludeFile( fileName, outputFile):
     """
     This function reads all lines from fileName,
@@ -684,69 +1203,223 @@ if sys.version_info.major < 3:
     JCConfigExit("ERROR minimum python version needed is 3.6, current host has python:{0}".format(sys.version_info))
 
 
-if sys.version_info.minor < 2:
-    mergedEnvironmentFileName = os.path.join(defaultParameters['JCTemplatePath'] , environmentFileName)
-    ### if python version is less than 3.10, jinja2 3.0 does not carry the context forward.
-    ###   read all include files to a single file and process it together so that context is properly available for jinja2
-    ### this file needs to be in template folder for jinja2 rendering to occur
-    mergedFileName = "{0}/{1}.include.{2}".format(
-            defaultParameters['JCTemplatePath'], 
-            environmentFileName,
-            thisHostName )
-    if( JCMergeAllIncludeFiles(mergedEnvironmentFileName, mergedFileName) == True ):
-        ### If merge is successful, process the included file
-        ### If merge not successful, process the original file as is.
-
-        ### create temp cofig file using original environmentFileName, not with include spec
-        tempConfigFile = "./temp/{0}.{1}".format( 
-                    environmentFileName,
-                    thisHostName )
-        ### this file is in template folder
-        environmentFileName = "{0}.include.{1}".format(
-            environmentFileName,
-            thisHostName )
- 
-else:
+def JCResolveHostParameters( hostRecord ):
+    """
+    Renders the environment spec file for given host and reads the parameters of that host
+        hostRecord - host record made by JCInventory with hostName, siteNamePrefix, facts and overrides
+    Parameters common to all hosts are taken from baseParameters, host name, site name and OS facts of 
+       the host are set before rendering so that environment spec can use those
+    OS facts not in host record are taken from JCHostFacts, overrides in host record are applied last
+    Values set by JCSetVariable() while rendering environment spec are kept in render context of the host
+
+    Parameters of the host are a ChainMap of host layer over layers of environment spec, host built-in
+       layer and baseParameters, layers other than host layer are shared with other hosts and are not changed
+
+    Returns 
+        hostParameters - parameters of the host, values set are stored in host layer, None on error
+        renderContext - render context of the host, pass it to render the templates of the host
+        errorMsg - error message when environment spec could not be rendered or read
+    """
+    hostName = hostRecord['hostName']
+    ### host name, site name and OS facts of this host, over parameters common to all hosts
+    hostBuiltins = {}
+    hostParameters = ChainMap(hostBuiltins, baseParameters)
+    JCSetHostNameParameters( hostParameters, hostName, hostRecord['siteNamePrefix'] )
+    hostFacts = {}
+    missingFactNames = [ factName for factName in JCHostFacts.JCOSFactNames if factName not in hostRecord['facts'] ]
+    if len(missingFactNames) > 0:
+        hostFacts.update(JCHostFacts.JCHostFactsGet(hostName, missingFactNames, debugLevel))
+    hostFacts.update(hostRecord['facts'])
+    hostParameters['JCOSType'] = hostFacts['OSType']
+    hostParameters['JCOSName'] = hostFacts['OSName']
+    hostParameters['JCOSVersion'] = hostFacts['OSVersion']
+    renderContext = JCRenderContext.JCRenderContext(JCFunctions)
+
+    hostEnvironmentFileName = environmentFileName
+    if sys.version_info.minor < 2:
+        mergedEnvironmentFileName = os.path.join(hostParameters['JCTemplatePath'] , environmentFileName)
+        ### if python version is less than 3.10, jinja2 3.0 does not carry the context forward.
+        ###   read all include files to a single file and process it together so that context is properly available for jinja2
+        ### this file needs to be in template folder for jinja2 rendering to occur
+        mergedFileName = "{0}/{1}.include.{2}".format(
+                hostParameters['JCTemplatePath'], 
+                environmentFileName,
+                hostName )
+        with JCTimings.JCTimer('mergeIncludes'):
+            mergeStatus = JCMergeAllIncludeFiles(mergedEnvironmentFileName, mergedFileName)
+        if( mergeStatus == True ):
+            ### If merge is successful, process the included file
+            ### If merge not successful, process the original file as is.
+
+            ### this file is in template folder
+            hostEnvironmentFileName = "{0}.include.{1}".format(
+                environmentFileName,
+                hostName )
+
     ### process environment spec file as template file so that any include, import type of tasks
     ###   are performed before reading variable values from that file
+    ### create temp cofig file using original environmentFileName, not with include spec
     tempConfigFile = "./temp/{0}.{1}".format( 
                 environmentFileName,
-                thisHostName )
-
-returnStatus = JCRenderTemplateFile(
-    templateEnvironment,  
-    environmentFileName, 
-    tempConfigFile, 
-    JCFunctions )
-if ( returnStatus == False ):
-    JCConfigExit('ERROR JCConfigGen() error rendering the environment spec file:{0}, exiting'.format(environmentFileName))
-else:
+                hostName )
+
+    with JCTimings.JCTimer('environmentRender'):
+        returnStatus = JCRenderTemplateFile(
+            templateEnvironment,  
+            hostEnvironmentFileName, 
+            tempConfigFile, 
+            renderContext,
+            hostParameters )
+    if ( returnStatus == False ):
+        return None, renderContext, 'ERROR JCConfigGen() error rendering the environment spec file:{0} of host:{1}'.format(
+            hostEnvironmentFileName, hostName)
+    else:
+        JCGlobalLib.LogLine(
+            "INFO JCConfigGen() Created temporary variable file: {0}, after processing environment file: {1}".format(
+                    hostEnvironmentFileName,
+                    os.path.join(hostParameters['JCTemplatePath'] , hostEnvironmentFileName) ),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+    ### read environment definitions from rendered file (expanded with includes / imports etc)
+    with JCTimings.JCTimer('environmentParse'):
+        hostParameters = JCReadEnvironmentConfig.JCReadEnvironmentLayers( 
+            tempConfigFile, 
+            [ hostBuiltins, baseParameters ], 
+            yamlModulePresent, 
+            debugLevel,  logFileName, hostName, hostBuiltins['JCOSType'] )
+    if hostParameters == None:
+        return None, renderContext, 'ERROR JCConfigGen() error reading the environment spec file:{0} of host:{1}'.format(
+            tempConfigFile, hostName)
+    hostParameters.update(hostRecord['overrides'])
+    return hostParameters, renderContext, ''
+
+def JCHostFailed( hostName, errorMsg ):
+    """
+    Logs error of the host whose environment spec could not be rendered or read, config files of the host 
+       are added to the manifest as failed, run continues with the next host
+    """
+    global failedCount
     JCGlobalLib.LogLine(
-        "INFO JCConfigGen() Created temporary variable file: {0}, after processing environment file: {1}".format(
-                environmentFileName,
-                os.path.join(defaultParameters['JCTemplatePath'] , environmentFileName) ),
-                interactiveMode,
-                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+        errorMsg,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    hostOutputFileNamesList = JCHostOutputFileNames( hostName )
+    for index in range( len(templateFileNamesList)):
+        JCShard.JCManifestAdd(runManifest, hostName, templateFileNamesList[index], 
+            os.path.join( defaultParameters['JCConfigPath'], hostOutputFileNamesList[index]), 'failed')
+        failedCount += 1
+
+### host span covers environment render and parse, log purge and template renders for this host
+hostSpan = JCTrace.JCTraceStart(thisHostName, 'host')
+
+### parameters common to all hosts, read-only layer shared by parameters of all hosts
+baseParameters = MappingProxyType(dict(defaultParameters))
+defaultParameters, defaultRenderContext, errorMsg = JCResolveHostParameters( firstHostRecord )
+if defaultParameters == None:
+    ### parameters of first host give log path, config path etc. of the run, can not continue without those
+    JCConfigExit(errorMsg + ', exiting')
+
+if '--timings' in argsPassed:
+    if argsPassed['--timings'] != '':
+        timingsReportFileName = argsPassed['--timings']
+    else:
+        timingsReportFileName = '{0}/{1}'.format(
+            defaultParameters['JCLogFilePath'], 
+            'JCConfigGen.timings.{0}.json'.format(runFileTag))
+if '--metrics' in argsPassed and metricsFileName == None:
+    metricsFileName = '{0}/{1}'.format(
+        defaultParameters['JCLogFilePath'], 
+        'JCConfigGen.{0}.prom'.format(runFileTag))
+if JCTrace.traceEnabled == True and JCTrace.traceFileName == None:
+    JCTrace.traceFileName = '{0}/{1}'.format(
+        defaultParameters['JCLogFilePath'], 
+        'JCConfigGen.trace.{0}.json'.format(runFileTag))
+if diffMode == True:
+    if argsPassed['--diff'] != '':
+        diffSummaryFileName = argsPassed['--diff']
+    else:
+        diffSummaryFileName = '{0}/{1}'.format(
+            defaultParameters['JCLogFilePath'], 
+            'JCConfigGen.diff.{0}.jsonl'.format(runFileTag))
+    diffSummary, errorMsg = JCDiff.JCDiffSummaryOpen(diffSummaryFileName,
+        { 'version': JCVersion, 'hostName': thisHostName, 'command': JCCommand, 'shard': shardSuffix })
+    if diffSummary == None:
+        JCConfigExit(errorMsg)
+if '--manifest' in argsPassed or shardIndex != None:
+    if argsPassed.get('--manifest', '') != '':
+        manifestFileName = argsPassed['--manifest']
+    else:
+        manifestFileName = '{0}/{1}'.format(
+            defaultParameters['JCLogFilePath'], 
+            'JCConfigGen.manifest.{0}.jsonl'.format(runFileTag))
+    runManifest, errorMsg = JCShard.JCManifestOpen(manifestFileName,
+        { 'version': JCVersion, 'hostName': thisHostName, 'command': JCCommand, 'diffMode': diffMode,
+          'shard': "{0}/{1}".format(shardIndex, shardCount) if shardIndex != None else '',
+          'shardIndex': shardIndex, 'shardCount': shardCount })
+    if runManifest == None:
+        JCConfigExit(errorMsg)
 
-### read environment definitions from rendered file (expanded with includes / imports etc)
-if JCReadEnvironmentConfig.JCReadEnvironmentConfig( 
-        tempConfigFile, 
-        defaultParameters, 
-        yamlModulePresent, 
-        debugLevel,  logFileName, thisHostName, OSType ) == False:
-    JCConfigExit('Fatal ERROR, exiting')
+if outputSinkType != 'dir':
+    if diffMode == True:
+        JCGlobalLib.LogLine(
+            "WARN JCConfigGen() --output is not used with --diff, rendered config files are compared to config files under config path",
+            interactiveMode,
+            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    else:
+        if outputSinkFileName == None and outputSinkType == 'store':
+            ### store is shared by runs so that config files same as earlier run are not written again
+            outputSinkFileName = '{0}/JCContentStore'.format(defaultParameters['JCConfigPath'])
+        elif outputSinkFileName == None and outputSinkType != 'ndjson':
+            outputSinkFileName = '{0}/JCConfigGen.{1}.{2}'.format(
+                defaultParameters['JCConfigPath'], runFileTag, outputSinkType)
+        outputSink, errorMsg = JCOutputSink.JCOutputSinkOpen(outputSinkType, outputSinkFileName, 
+            defaultParameters['JCConfigPath'], outputSinkCompressLevel, outputSinkBufferSize,
+            outputSinkStream.buffer if outputSinkStream != None else None, JCCommand)
+        if outputSink == None:
+            JCConfigExit(errorMsg)
 
+### config files written by hosts completed so far are journaled so that the run can be resumed
+resumeMode = ('--resume' in argsPassed)
+completedHosts = {}
+if multiHostMode == True and diffMode == False and outputSink == None:
+    if argsPassed.get('--journal', '') != '':
+        journalFileName = argsPassed['--journal']
+    else:
+        journalFileName = '{0}/{1}'.format(
+            defaultParameters['JCLogFilePath'], 
+            'JCConfigGen.journal.{0}.jsonl'.format(runFileTag))
+    import JCJournal
+    journalRunKey = JCJournal.JCJournalRunKey(JCCommand,
+        [ commandLineTemplatePath, defaultParameters['JCTemplatePath'] ] + 
+        ([ inventoryFileName ] if '--inventory' in argsPassed or '--hosts' in argsPassed else []))
+    if resumeMode == True and os.path.isfile(journalFileName):
+        completedHosts, journalEntryCount, errorMsg = JCJournal.JCJournalRead(journalFileName, journalRunKey)
+        if errorMsg == '':
+            errorMsg = "INFO JCConfigGen() Resuming the run, config files completed:{0} of hosts:{1}, journal:{2}".format(
+                journalEntryCount, len(completedHosts), journalFileName)
+        JCGlobalLib.LogLine(
+            errorMsg,
+            interactiveMode,
+            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    runJournal, errorMsg = JCJournal.JCJournalOpen(journalFileName, journalRunKey, JCCommand, resumeMode)
+    if runJournal == None:
+        JCConfigExit(errorMsg)
+elif resumeMode == True:
+    JCGlobalLib.LogLine(
+        "WARN JCConfigGen() --resume is used when more than one host is passed, --diff is not passed and --output is dir, ignored",
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
 
 errorMsg  = "INFO JCConfigGen() Version:{0}, OSType: {1}, OSName: {2}, OSVersion: {3}".format(
     JCVersion, OSType, OSName, OSVersion)
+if shardIndex != None:
+    errorMsg += ", shard:{0}".format(shardSuffix)
 JCGlobalLib.LogLine(
 	errorMsg, 
     interactiveMode,
     myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
 
-### get current time in seconds
-currentTime = time.time()
-
 ### if PATH and LD_LIBRARY are defined, set those environment variables
 if 'PATH' in defaultParameters:
     os.environ['PATH'] = defaultParameters['PATH']
@@ -759,67 +1432,540 @@ if 'JCFileRetencyDurationInDays' in defaultParameters:
 else:
     JCFileRetencyDurationInDays = defaultParameters['JCFileRetencyDurationInDays'] = 7
 
-if OSType == 'Windows':
-    ### get list of files older than retency period
-    filesToDelete = JCGlobalLib.JCFindModifiedFiles(
-            '{0}/{1}*'.format(defaultParameters['JCLogFilePath'], logFileName), 
-            currentTime - (JCFileRetencyDurationInDays*3600*24), ### get files modified before this time
-            debugLevel, thisHostName)
-    if len(filesToDelete) > 0:
-        for fileName in filesToDelete:
-            try:
-                os.remove(fileName)
-                if debugLevel > 3:
-                    JCGlobalLib.LogLine(
-                        "DEBUG-4 JCConfigGen() Deleting the file:{0}".format(fileName),
-                        interactiveMode,
-                        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
-            except OSError as err:
-                JCGlobalLib.LogLine(
-			        "ERROR JCConfigGen() Error deleting old log file:{0}, errorMsg:{1}".format(fileName, err), 
-                	interactiveMode,
-                	myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
-                
-else:
-    # delete log files covering logs of operations also.
-    command = 'find {0} -name "{1}*" -mtime +{2} |xargs rm'.format(
-        defaultParameters['JCLogFilePath'], logFileName, JCFileRetencyDurationInDays)
+### optional limits on log files, total size in MB and age in days after which log files are compressed
+JCLogMaxTotalSizeMB = float(defaultParameters.get('JCLogMaxTotalSizeMB', 0))
+JCLogCompressAfterDays = float(defaultParameters.get('JCLogCompressAfterDays', 0))
+
+### purge old log files on background thread while templates are rendered, skip the log file currently open
+with JCTimings.JCTimer('logPurge'):
+    if outputFileHandle != None:
+        excludeFileNames = [ os.path.basename(outputFileHandle.name) ]
+    else:
+        excludeFileNames = []
     if debugLevel > 1:
         JCGlobalLib.LogLine(
-            "DEBUG-2 JCConfigGen() purging files with command:{0}".format(command),
+            "DEBUG-2 JCConfigGen() purging files in:{0} with name:{1}*, retency days:{2}, max total size MB:{3}, compress after days:{4}".format(
+                defaultParameters['JCLogFilePath'], logFileName, JCFileRetencyDurationInDays, 
+                JCLogMaxTotalSizeMB, JCLogCompressAfterDays),
             interactiveMode,
             myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    logRetentionThread = JCLogRetention.JCLogRetentionStart(
+        defaultParameters['JCLogFilePath'], logFileName, float(JCFileRetencyDurationInDays),
+        int(JCLogMaxTotalSizeMB * 1024 * 1024), JCLogCompressAfterDays, excludeFileNames, debugLevel)
+
+### config files rendered to memory in diff mode
+diffItems = []
+
+### output of templates rendered so far by fingerprint, config file name written, rendered text in diff mode
+###   and when config files are written to output sink, least recently used outputs are dropped
+dedupeOutputs = None
+if dedupeMethod != 'none':
+    dedupeOutputs = JCDedupe.JCDedupeCacheOpen()
+
+def JCAnalyzeHostTemplate( templateFileName, hostParameters, templateGlobals ):
+    """
+    Returns 
+        analysis - analysis of the template, None if it can not be analyzed
+        missingVariables - variables read by the template, not defined for the host
+        fingerprint - fingerprint of variable values read by the template, None when template is not deduplicated
+    """
+    with JCTimings.JCTimer('templateAnalysis'):
+        analysis = JCTemplateAnalysis.JCTemplateAnalyze(templateEnvironment, templateFileName, JCFunctions)
+    missingVariables = []
+    fingerprint = None
+    if analysis != None:
+        ### report variables not defined before render, render fails on first such variable
+        missingVariables = JCTemplateAnalysis.JCTemplateMissingVariables(
+            analysis, hostParameters, templateGlobals)
+        if dedupeMethod != 'none':
+            ### output of a command run by JCSystem() can differ from host to host, like time or host specific state
+            if ( analysis['dynamicIncludes'] == False and analysis['callsSetVariable'] == False and
+                 'JCSystem' not in analysis['functions'] ):
+                fingerprint = JCDedupe.JCDedupeFingerprint(
+                    templateFileName, analysis['variables'], hostParameters, templateGlobals)
+    return analysis, missingVariables, fingerprint
+
+def JCRenderHostOutputs( hostName, hostParameters, renderContext ):
+    """
+    Renders the templates for given host to memory in template order, used by --async mode on executor thread
+    Template having output of same fingerprint rendered already for other host is not rendered, 
+       rendering stops at first template that fails
+    Returns list of rendered outputs, one per template, to be passed to JCRenderHostTemplates()
+        { 'templateFound', 'analysis', 'missingVariables', 'fingerprint', 'rendered', 'returnStatus', 'outputText' }
+    """
+    templateGlobals = ChainMap(templateEnvironment.globals, renderContext.variables)
+    renderedOutputs = []
+    for templateFileName in templateFileNamesList:
+        renderedOutput = { 'templateFound': os.path.isfile(os.path.join( hostParameters['JCTemplatePath'], templateFileName)),
+            'analysis': None, 'missingVariables': [], 'fingerprint': None, 'rendered': False, 
+            'returnStatus': False, 'outputText': None }
+        renderedOutputs.append(renderedOutput)
+        if renderedOutput['templateFound'] == False:
+            continue
+        renderedOutput['analysis'], renderedOutput['missingVariables'], renderedOutput['fingerprint'] = JCAnalyzeHostTemplate(
+            templateFileName, hostParameters, templateGlobals)
+        ### output dropped from dedupe cache before config files of this host are written is rendered then
+        if renderedOutput['fingerprint'] != None and renderedOutput['fingerprint'] in dedupeOutputs['outputs']:
+            continue
+        renderedOutput['rendered'] = True
+        renderedOutput['returnStatus'], renderedOutput['outputText'] = JCRenderTemplate(
+            templateEnvironment, templateFileName, renderContext, hostParameters )
+        if renderedOutput['returnStatus'] == False:
+            break
+    return renderedOutputs
+
+def JCHostTemplateRender( renderedOutput, templateFileName, renderContext, hostParameters ):
+    """
+    Returns output of the template rendered by JCRenderHostOutputs(), renders the template if not rendered yet
+    """
+    if renderedOutput != None and renderedOutput['rendered'] == True:
+        return renderedOutput['returnStatus'], renderedOutput['outputText']
+    return JCRenderTemplate(templateEnvironment, templateFileName, renderContext, hostParameters )
+
+def JCRenderHostTemplates( hostName, hostParameters, renderContext, renderedOutputs=None ):
+    """
+    Renders the templates for given host using parameters and render context of the host,
+       writes config files or, in diff mode, saves rendered text in diffItems
+    When deduplication is enabled, a template is rendered once for hosts having same values of the variables 
+       read by that template, config file of first host is copied or linked for other hosts
+        renderedOutputs - outputs rendered by JCRenderHostOutputs() in --async mode, None to render here
+    Returns error message when the run can not continue, journal could not be written, '' otherwise
+    """
+    global renderedCount, dedupedCount, failedCount
+    hostOutputFileNamesList = JCHostOutputFileNames( hostName )
+    ### globals, then values set by JCSetVariable(), same order as lookup while rendering
+    templateGlobals = ChainMap(templateEnvironment.globals, renderContext.variables)
+    with JCTimings.JCTimer('templateRender'):
+        for index in range( len(templateFileNamesList)):
+            configFileName = os.path.join( hostParameters['JCConfigPath'], hostOutputFileNamesList[index])
+            templateFileNameWithPath = os.path.join( hostParameters['JCTemplatePath'], templateFileNamesList[index])
+            templateFileName = templateFileNamesList[index]
+            renderedOutput = None
+            if renderedOutputs != None and index < len(renderedOutputs):
+                renderedOutput = renderedOutputs[index]
+                templateFound = renderedOutput['templateFound']
+            else:
+                templateFound = os.path.isfile(templateFileNameWithPath)
+            if templateFound == False:
+                JCGlobalLib.LogLine(
+                        "ERROR JCConfigGen() template file {0} not found".format(templateFileName),
+                        interactiveMode,
+                        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+                JCShard.JCManifestAdd(runManifest, hostName, templateFileName, configFileName, 'templateNotFound')
+                failedCount += 1
+                continue
+
+            if renderedOutput != None:
+                missingVariables, fingerprint = renderedOutput['missingVariables'], renderedOutput['fingerprint']
+            else:
+                analysis, missingVariables, fingerprint = JCAnalyzeHostTemplate(templateFileName, hostParameters, templateGlobals)
+            if len(missingVariables) > 0:
+                JCGlobalLib.LogLine(
+                    "WARN JCConfigGen() template file:{0} reads variables not defined for host:{1}, variables:{2}".format(
+                        templateFileName, hostName, ', '.join(missingVariables)),
+                    interactiveMode,
+                    myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
 
-    returnResult, returnOutput, errorMsg = JCGlobalLib.JCExecuteCommand(
-            defaultParameters['JCCommandShell'],
-            command, debugLevel, OSType)
-    if returnResult == False:
-        if re.match(r'File not found', errorMsg) != True:
-            if debugLevel > 1:
+            dedupeOutput = None
+            if fingerprint != None:
+                dedupeOutput = JCDedupe.JCDedupeCacheGet(dedupeOutputs, fingerprint)
+                JCTimings.JCTimingsCount('renderDedupe', dedupeOutput != None)
+            if dedupeOutput != None:
+                dedupedCount += 1
+            else:
+                renderedCount += 1
+
+            if diffMode == True:
+                ### render to memory, compared to existing config file after all templates are rendered
+                if dedupeOutput != None:
+                    returnStatus, outputText = True, dedupeOutput
+                else:
+                    returnStatus, outputText = JCHostTemplateRender(renderedOutput, templateFileName, renderContext, hostParameters )
+                if returnStatus == True:
+                    if fingerprint != None:
+                        JCDedupe.JCDedupeCacheAdd(dedupeOutputs, fingerprint, outputText)
+                    diffItems.append({ 'configFileName': configFileName, 'newText': outputText, 
+                        'templateFileName': templateFileName, 'hostName': hostName })
+                    continue
+            elif outputSink != None:
+                ### config files in archive or stream can not be copied, rendered text is kept for deduplication
+                if dedupeOutput != None:
+                    returnStatus, outputText = True, dedupeOutput
+                else:
+                    returnStatus, outputText = JCHostTemplateRender(renderedOutput, templateFileName, renderContext, hostParameters )
+                if returnStatus == True:
+                    returnStatus = JCWriteConfigFile(templateFileName, configFileName, outputText, outputSink,
+                        { 'hostName': hostName, 'templateFileName': templateFileName })
+                if returnStatus == True and fingerprint != None:
+                    JCDedupe.JCDedupeCacheAdd(dedupeOutputs, fingerprint, outputText)
+            elif dedupeOutput != None:
+                returnStatus, errorMsg = JCDedupe.JCDedupeWriteFile(dedupeOutput, configFileName, dedupeMethod)
+                if returnStatus == True:
+                    JCGlobalLib.LogLine(
+                        "INFO JCConfigGen() Created config file: {0}, same as config file: {1} of template file: {2}".format(
+                            configFileName,
+                            dedupeOutput,
+                            templateFileName),
+                            interactiveMode,
+                            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+                    JCShard.JCManifestAdd(runManifest, hostName, templateFileName, configFileName, 'deduplicated')
+                    if runJournal != None:
+                        JCJournal.JCJournalAdd(runJournal, hostName, templateFileName, configFileName, 
+                            JCJournal.JCJournalFileHash(configFileName))
+                    continue
                 JCGlobalLib.LogLine(
-                    "DEBUG-2 JCConfigGen() No older log files to delete, {0}".format(errorMsg), 
+                        errorMsg,
+                        interactiveMode,
+                        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+                ### render for this host
+                returnStatus, outputText = JCHostTemplateRender(renderedOutput, templateFileName, renderContext, hostParameters )
+                if returnStatus == True:
+                    returnStatus = JCWriteConfigFile(templateFileName, configFileName, outputText)
+            else:
+                returnStatus, outputText = JCHostTemplateRender(renderedOutput, templateFileName, renderContext, hostParameters )
+                if returnStatus == True:
+                    returnStatus = JCWriteConfigFile(templateFileName, configFileName, outputText)
+                if returnStatus == True and fingerprint != None:
+                    JCDedupe.JCDedupeCacheAdd(dedupeOutputs, fingerprint, configFileName)
+            if ( returnStatus == False ):
+                ### config files of other hosts are generated, run exits with non-zero status at the end
+                JCShard.JCManifestAdd(runManifest, hostName, templateFileName, configFileName, 'failed')
+                failedCount += 1
+                JCGlobalLib.LogLine(
+                    "ERROR JCConfigGen() error rendering the template file: {0} of host: {1}, remaining templates of the host are skipped".format(
+                        templateFileName, hostName),
                     interactiveMode,
                     myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+                break
+            else:
+                JCGlobalLib.LogLine(
+                    "INFO JCConfigGen() Created config file: {0}, after processing template file: {1}".format(
+                        configFileName,
+                        templateFileName),
+                        interactiveMode,
+                        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+                JCShard.JCManifestAdd(runManifest, hostName, templateFileName, configFileName,
+                    'deduplicated' if dedupeOutput != None and outputSink != None else 'rendered')
+                if runJournal != None:
+                    JCJournal.JCJournalAdd(runJournal, hostName, templateFileName, configFileName, 
+                        JCJournal.JCJournalFileHash(configFileName))
+    if runJournal == None:
+        return ''
+    ### entries of the host are flushed together, host with some config files in the journal is rendered again on resume
+    returnStatus, errorMsg = JCJournal.JCJournalHostDone(runJournal)
+    return errorMsg
+
+def JCProcessDiffItems():
+    """
+    Compares config files rendered to memory so far to existing config files, logs the differences,
+       writes diff results to the diff summary and clears diffItems so that memory used stays within limit
+    """
+    with JCTimings.JCTimer('diff'):
+        tempDiffResults = JCDiff.JCDiffFiles(diffItems)
+    diffItems.clear()
+    for diffResult in tempDiffResults:
+        if diffResult['status'] == JCDiff.JCDiffStatusError:
+            JCGlobalLib.LogLine(
+                diffResult['errorMsg'],
+                interactiveMode,
+                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+        elif diffResult['status'] == JCDiff.JCDiffStatusUnchanged:
+            JCGlobalLib.LogLine(
+                "PASS JCConfigGen() config file: {0} unchanged, template file: {1}".format(
+                    diffResult['configFileName'], diffResult['templateFileName']),
+                interactiveMode,
+                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+        else:
+            JCGlobalLib.LogLine(
+                "DIFF JCConfigGen() config file: {0} {1}, template file: {2}, lines added: {3}, removed: {4}".format(
+                    diffResult['configFileName'], diffResult['status'], diffResult['templateFileName'],
+                    diffResult['addedLines'], diffResult['removedLines']),
+                interactiveMode,
+                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+            JCGlobalLib.LogLine(
+                diffResult['diffText'],
+                interactiveMode,
+                myColors, colorIndex, outputFileHandle, HTMLBRTag, True, OSType)
+        JCDiff.JCDiffSummaryAdd(diffSummary, diffResult)
+        JCShard.JCManifestAdd(runManifest, diffResult['hostName'], diffResult['templateFileName'],
+            diffResult['configFileName'], diffResult['status'])
 
+### number of config files rendered to memory in diff mode before comparing those to existing config files
+diffBatchSize = 256
 
+def JCResumeHost( hostName, configFileNames=None ):
+    """
+    Returns True if config files of the host were written by the run being resumed and are not changed after that,
+       config files are added to the manifest of this run
+        configFileNames - config files of the host found completed by JCJournalHostCompleted(), checked here when None
+    """
+    global resumedCount
+    if configFileNames == None:
+        if resumeMode == False or len(completedHosts) == 0:
+            return False
+        configFileNames = JCJournal.JCJournalHostCompleted(completedHosts, hostName, templateFileNamesList)
+        if configFileNames == None:
+            return False
+    resumedCount += 1
+    for index in range( len(templateFileNamesList)):
+        JCShard.JCManifestAdd(runManifest, hostName, templateFileNamesList[index], configFileNames[index], 'resumed')
+    if debugLevel > 0:
+        JCGlobalLib.LogLine(
+            "DEBUG-1 JCConfigGen() Skipped host:{0}, config files completed by the run resumed:{1}".format(
+                hostName, ', '.join(configFileNames)),
+            interactiveMode,
+            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    return True
 
-for index in range( len(templateFileNamesList)):
-    configFileName = os.path.join( defaultParameters['JCConfigPath'], outputFileNamesList[index])
-    templateFileNameWithPath = os.path.join( defaultParameters['JCTemplatePath'], templateFileNamesList[index])
-    templateFileName = templateFileNamesList[index]
-    if os.path.isfile(templateFileNameWithPath) == False:
+def JCPrepareHost( hostRecord ):
+    """
+    Resolves parameters of the host and renders its templates to memory, used by --async mode on executor thread
+    Returns host result to be passed to JCCommitHost()
+    """
+    hostName = hostRecord['hostName']
+    if resumeMode == True and len(completedHosts) > 0:
+        configFileNames = JCJournal.JCJournalHostCompleted(completedHosts, hostName, templateFileNamesList)
+        if configFileNames != None:
+            return { 'hostName': hostName, 'resumedFileNames': configFileNames }
+    with JCTrace.JCTraceSpan(hostName, 'host'):
+        hostParameters, renderContext, errorMsg = JCResolveHostParameters( hostRecord )
+        if hostParameters == None:
+            return { 'hostName': hostName, 'resumedFileNames': None, 'hostErrorMsg': errorMsg }
+        renderedOutputs = JCRenderHostOutputs( hostName, hostParameters, renderContext )
+    return { 'hostName': hostName, 'resumedFileNames': None, 'hostParameters': hostParameters, 
+        'renderContext': renderContext, 'renderedOutputs': renderedOutputs }
+
+def JCCommitHost( hostResult ):
+    """
+    Writes config files of the host prepared by JCPrepareHost(), or logs the inventory error,
+       called in host order on one thread so that log, manifest and journal are in same order as sequential mode
+    Returns error message when the run can not continue, '' otherwise
+    """
+    if 'errorMsg' in hostResult:
         JCGlobalLib.LogLine(
-                "ERROR JCConfigGen() template file {0} not found".format(templateFileName),
+            hostResult['errorMsg'],
+            interactiveMode,
+            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+        return ''
+    if hostResult['resumedFileNames'] != None:
+        JCResumeHost( hostResult['hostName'], hostResult['resumedFileNames'] )
+        return ''
+    if 'hostErrorMsg' in hostResult:
+        JCHostFailed( hostResult['hostName'], hostResult['hostErrorMsg'] )
+        return ''
+    errorMsg = JCRenderHostTemplates( hostResult['hostName'], hostResult['hostParameters'], hostResult['renderContext'],
+        hostResult['renderedOutputs'] )
+    if diffMode == True and len(diffItems) >= diffBatchSize:
+        JCProcessDiffItems()
+    return errorMsg
+
+async def JCAsyncCommitHost( hostResult, prepareTask, previousCommitTask, commitExecutor ):
+    """
+    Waits for host to be prepared and for config files of previous host to be written, writes config files of the host
+    Returns error message returned by JCCommitHost()
+    """
+    import asyncio
+    if prepareTask != None:
+        hostResult = await prepareTask
+    if previousCommitTask != None:
+        await previousCommitTask
+    return await asyncio.get_running_loop().run_in_executor(commitExecutor, JCCommitHost, hostResult)
+
+async def JCAsyncRenderHosts( hostRecordsIterator ):
+    """
+    Renders hosts read from hostRecordsIterator in --async mode
+    Hosts are prepared by JCPrepareHost() on executor threads, at most asyncLimits['host'] hosts ahead of
+       the host being written, config files are written by JCCommitHost() in host order on one thread
+    When JCCommitHost() returns an error or exit is requested by signal handler, hosts not started are cancelled,
+       hosts being prepared or written are completed, caller exits on main thread after the event loop stops
+    Returns exit reason, '' when all hosts are completed
+    """
+    global hostCount, inventoryErrorCount
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    loop = asyncio.get_running_loop()
+    JCAsync.JCAsyncOpen(asyncLimits)
+    commitExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='JCCommit')
+    ### prepare and commit tasks of hosts in progress, in host order
+    hostTasks = deque()
+    previousCommitTask = None
+    exitReason = ''
+    try:
+        while exitReason == '':
+            ### inventory reader waits for rows read by its thread, wait on executor so that tasks keep running
+            hostRecordItem = await loop.run_in_executor(None, next, hostRecordsIterator, None)
+            if hostRecordItem == None:
+                break
+            lineNumber, hostRecord, errorMsg = hostRecordItem
+            if hostRecord == None:
+                inventoryErrorCount += 1
+                hostResult, prepareTask = { 'errorMsg': errorMsg }, None
+            else:
+                hostCount += 1
+                hostResult, prepareTask = None, loop.create_task(JCAsync.JCAsyncRun('render', JCPrepareHost, hostRecord))
+            previousCommitTask = loop.create_task(
+                JCAsyncCommitHost(hostResult, prepareTask, previousCommitTask, commitExecutor))
+            hostTasks.append((prepareTask, previousCommitTask))
+            while exitReason == '' and len(hostTasks) >= asyncLimits['host']:
+                exitReason = await hostTasks.popleft()[1]
+        while exitReason == '' and len(hostTasks) > 0:
+            exitReason = await hostTasks.popleft()[1]
+    except asyncio.CancelledError:
+        ### cancelled by JCAsyncRequestExit()
+        exitReason = JCAsync.JCAsyncExitReason()
+        if exitReason == None:
+            raise
+        if hasattr(asyncio.current_task(), 'uncancel'):
+            asyncio.current_task().uncancel()
+    finally:
+        for prepareTask, commitTask in hostTasks:
+            if prepareTask != None:
+                prepareTask.cancel()
+            commitTask.cancel()
+        await asyncio.gather(*[ commitTask for prepareTask, commitTask in hostTasks ], return_exceptions=True)
+        await JCAsync.JCAsyncDrain(commitExecutor)
+        JCAsync.JCAsyncClose()
+    return exitReason
+
+for errorMsg in inventoryErrors:
+    JCGlobalLib.LogLine(
+        errorMsg,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+if JCResumeHost( thisHostName ) == False:
+    errorMsg = JCRenderHostTemplates( thisHostName, defaultParameters, defaultRenderContext )
+    if errorMsg != '':
+        JCConfigExit(errorMsg)
+hostCount = 1
+inventoryErrorCount = len(inventoryErrors)
+### rest of the hosts are read one by one, host record is not kept after its config files are generated
+if asyncMode == True:
+    import asyncio
+    errorMsg = asyncio.run(JCAsyncRenderHosts(iter(hostRecords)))
+    if errorMsg != '':
+        JCConfigExit(errorMsg)
+else:
+    for lineNumber, hostRecord, errorMsg in hostRecords:
+        if hostRecord == None:
+            inventoryErrorCount += 1
+            JCGlobalLib.LogLine(
+                errorMsg,
                 interactiveMode,
                 myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
-        continue
-    returnStatus =  JCRenderTemplateFile(templateEnvironment, templateFileName, configFileName, JCFunctions )
-    if ( returnStatus == False ):
-        JCConfigExit('ERROR JCConfigGen() error rendering the environment spec file: {0}, exiting'.format(templateFileName))
-    else:
+            continue
+        hostCount += 1
+        if JCResumeHost( hostRecord['hostName'] ) == True:
+            continue
+        with JCTrace.JCTraceSpan(hostRecord['hostName'], 'host'):
+            hostParameters, renderContext, errorMsg = JCResolveHostParameters( hostRecord )
+            if hostParameters == None:
+                JCHostFailed( hostRecord['hostName'], errorMsg )
+            else:
+                errorMsg = JCRenderHostTemplates( hostRecord['hostName'], hostParameters, renderContext )
+                if errorMsg != '':
+                    JCConfigExit(errorMsg)
+        if diffMode == True and len(diffItems) >= diffBatchSize:
+            JCProcessDiffItems()
+
+if multiHostMode == True:
+    JCGlobalLib.LogLine(
+        "INFO JCConfigGen() Hosts:{0}, inventory rows skipped:{1}, templates rendered:{2}, config files deduplicated:{3}, dedupe method:{4}{5}".format(
+            hostCount, inventoryErrorCount, renderedCount, dedupedCount, dedupeMethod,
+            (", shard:{0}".format(shardSuffix) if shardIndex != None else '') +
+            (", hosts resumed:{0}".format(resumedCount) if resumeMode == True else '') +
+            (", config files failed:{0}".format(failedCount) if failedCount > 0 else '')),
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+if diffMode == True:
+    JCProcessDiffItems()
+
+    returnStatus, errorMsg = JCDiff.JCDiffSummaryClose(diffSummary, { 'hostCount': hostCount })
+    if returnStatus == True:
+        errorMsg = "INFO JCConfigGen() Diff summary changed:{0}, unchanged:{1}, new:{2}, written to:{3}".format(
+            diffSummary['counts'][JCDiff.JCDiffStatusChanged], diffSummary['counts'][JCDiff.JCDiffStatusUnchanged],
+            diffSummary['counts'][JCDiff.JCDiffStatusNew], diffSummaryFileName)
+    diffSummary = None
+    JCGlobalLib.LogLine(
+        errorMsg,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+if runManifest != None:
+    returnStatus, errorMsg = JCShard.JCManifestClose(runManifest, { 'inventoryRowsSkipped': inventoryErrorCount })
+    if returnStatus == True:
+        errorMsg = "INFO JCConfigGen() Manifest of {0} config files written to:{1}".format(
+            runManifest['configFiles'], runManifest['fileName'])
+    JCGlobalLib.LogLine(
+        errorMsg,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    runManifest = None
+
+if outputSink != None:
+    outputSinkStore = outputSink['store']
+    returnStatus, errorMsg = JCOutputSink.JCOutputSinkClose(outputSink)
+    if returnStatus == True:
+        errorMsg = "INFO JCConfigGen() Output:{0}, config files:{1}, bytes:{2}, written to:{3}".format(
+            outputSink['type'], outputSink['fileCount'], outputSink['outputBytes'],
+            outputSink['fileName'] if outputSink['fileName'] != None else 'stdout')
+        if outputSink['type'] == 'store':
+            errorMsg += ", blobs written:{0}, bytes:{1}, blobs already stored:{2}, host manifests:{3}, run:{4}".format(
+                outputSinkStore['blobsWritten'], outputSinkStore['bytesWritten'], outputSinkStore['blobsPresent'],
+                outputSinkStore['manifests'], outputSinkStore['runId'])
+    JCGlobalLib.LogLine(
+        errorMsg,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+    outputSink = None
+
+if runJournal != None:
+    returnStatus, errorMsg = JCJournal.JCJournalClose(runJournal)
+    if returnStatus == False:
         JCGlobalLib.LogLine(
-            "INFO JCConfigGen() Created config file: {0}, after processing template file: {1}".format(
-                configFileName,
-                templateFileName),
-                interactiveMode,
-                myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+            errorMsg,
+            interactiveMode,
+            myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+with JCTimings.JCTimer('logPurgeWait'):
+    logRetentionStats = JCLogRetention.JCLogRetentionWait(logRetentionThread)
+for errorMsg in logRetentionStats['debugMessages'] + logRetentionStats['errors']:
+    JCGlobalLib.LogLine(
+        errorMsg,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+if debugLevel > 1:
+    JCGlobalLib.LogLine(
+        "DEBUG-2 JCConfigGen() Log files scanned:{0}, deleted:{1}, compressed:{2}, bytes freed:{3}".format(
+            logRetentionStats['scannedFiles'], logRetentionStats['deletedFiles'], 
+            logRetentionStats['compressedFiles'], logRetentionStats['bytesFreed']),
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+JCTrace.JCTraceStop(hostSpan)
+
+timingsSummary = JCWriteTimingsReport()
+if timingsSummary != None:
+    JCGlobalLib.LogLine(
+        timingsSummary,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+errorMsg = JCWriteMetrics(failedCount == 0)
+if errorMsg != None:
+    JCGlobalLib.LogLine(
+        errorMsg,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+returnStatus, errorMsg = JCTrace.JCTraceWrite()
+if returnStatus == False:
+    JCGlobalLib.LogLine(
+        errorMsg,
+        interactiveMode,
+        myColors, colorIndex, outputFileHandle, HTMLBRTag, False, OSType)
+
+if failedCount > 0:
+    ### config files of some hosts or templates are not generated, caller sees the run as failed
+    sys.exit(1)
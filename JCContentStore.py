@@ -0,0 +1,365 @@
+"""
+This module keeps generated config files in a content addressed store, each unique config file content is stored
+   once as a blob named by SHA-256 of its bytes, and a manifest of each host and run maps config file names to blobs
+
+    JCContentStoreOpen(storePath, command, runId) - opens the store for a run, returns store dictionary
+    JCContentStoreAdd(store, hostName, configFileName, outputBytes) - stores config file of the host
+    JCContentStoreClose(store) - writes manifest of last host, returns counts of the run
+    JCContentStoreReadManifest(storePath, hostName, runId) - returns manifest of the host, latest run if runId is None
+    JCContentStoreDiff(oldManifest, newManifest) - returns config files added, removed, changed, unchanged
+    JCContentStoreGC(storePath, keepRuns, minBlobAgeSeconds) - removes old manifests and blobs not referenced
+    JCContentStoreMaterialize(storePath, hostName, targetPath, runId) - makes config files of the host under
+        targetPath as hard links to blobs
+
+Store layout
+    <storePath>/blobs/<first 2 hex digits of sha256>/<sha256> - config file content, read only
+    <storePath>/manifests/<hostName>/<runId>.json - manifest of the host for the run
+        {"hostName": ..., "runId": ..., "command": ..., "files": { "<configFileName>": "<sha256>", ... }}
+
+Blob is written only when not present, config file same as that of other host or of earlier run is not
+   written again. Blob and manifest are written to a temp file and renamed so that a partial file is never seen.
+Run id is UTC time of the run start with microseconds and process id, manifests of a host sort by run id in
+   the order of runs, including runs started within same second.
+Manifests list hashes of config files, two manifests are compared without reading the config files.
+GC keeps latest keepRuns manifests of each host, removes blobs not referenced by the manifests kept, blobs
+   modified within minBlobAgeSeconds are kept so that blobs of a run in progress, whose manifest is
+   not written yet, are not removed. Modified time of a blob present already is updated when a run reuses it.
+
+Commands
+    python3 JCContentStore.py -c materialize -S <storePath> -h <hostName> -d <targetPath> [-r <runId>]
+    python3 JCContentStore.py -c diff -S <storePath> -h <hostName> [-a <oldRunId>] [-b <newRunId>]
+        defaults to previous and latest run of the host
+    python3 JCContentStore.py -c gc -S <storePath> [-k <keepRuns>] [-m <minBlobAgeSeconds>]
+"""
+import os
+import sys
+import time
+
+### manifests of each host kept by GC
+JCContentStoreKeepRuns = 5
+
+### blobs modified within this time are not removed by GC
+JCContentStoreMinBlobAgeSeconds = 3600
+
+def JCContentStoreBlobName(storePath:str, blobHash:str):
+    """
+    Returns file name of the blob
+    """
+    return os.path.join(storePath, 'blobs', blobHash[:2], blobHash)
+
+def JCContentStoreWriteFile(fileName:str, fileBytes:bytes, fileMode=None):
+    """
+    Writes fileBytes to temp file and renames it to fileName, makes parent directory when not present
+    Raises OSError
+    """
+    os.makedirs(os.path.dirname(fileName), exist_ok=True)
+    tempFileName = "{0}.{1}.tmp".format(fileName, os.getpid())
+    try:
+        with open(tempFileName, 'wb') as tempFile:
+            tempFile.write(fileBytes)
+        if fileMode != None:
+            os.chmod(tempFileName, fileMode)
+        os.replace(tempFileName, fileName)
+    except OSError:
+        if os.path.exists(tempFileName):
+            os.remove(tempFileName)
+        raise
+
+def JCContentStoreOpen(storePath:str, command='', runId=None):
+    """
+    Opens the store for a run
+        runId - defaults to UTC time with microseconds and process id
+
+    Returns
+        store - dictionary to be passed to JCContentStoreAdd(), JCContentStoreClose(), None on error
+        errorMsg - error message on failure
+    """
+    if runId == None:
+        startTime = time.time()
+        runId = "{0}.{1:06d}.{2}".format(time.strftime('%Y%m%dT%H%M%S', time.gmtime(startTime)),
+            int(startTime % 1 * 1000000), os.getpid())
+    try:
+        os.makedirs(os.path.join(storePath, 'blobs'), exist_ok=True)
+        os.makedirs(os.path.join(storePath, 'manifests'), exist_ok=True)
+    except OSError as err:
+        return None, "ERROR JCContentStoreOpen() Can not make store:{0}, OS error:{1}".format(storePath, err)
+    return { 'storePath': storePath, 'runId': runId, 'command': command, 'hostName': None, 'files': {},
+        'blobsWritten': 0, 'blobsPresent': 0, 'bytesWritten': 0, 'manifests': 0 }, ''
+
+def JCContentStoreWriteManifest(store:dict):
+    """
+    Writes manifest of current host of the run
+    Raises OSError
+    """
+    import json
+    if store['hostName'] == None:
+        return
+    manifest = { 'hostName': store['hostName'], 'runId': store['runId'], 'command': store['command'],
+        'files': store['files'] }
+    JCContentStoreWriteFile(
+        os.path.join(store['storePath'], 'manifests', store['hostName'], "{0}.json".format(store['runId'])),
+        json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+    store['manifests'] += 1
+    store['hostName'] = None
+    store['files'] = {}
+
+def JCContentStoreAdd(store:dict, hostName:str, configFileName:str, outputBytes:bytes):
+    """
+    Stores config file of the host, blob is written when not present
+    Config files of a host are to be added one after other, manifest of the host is written when
+       config file of next host is added or the store is closed
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    import hashlib
+    blobHash = hashlib.sha256(outputBytes).hexdigest()
+    try:
+        if store['hostName'] != hostName:
+            JCContentStoreWriteManifest(store)
+            store['hostName'] = hostName
+        blobName = JCContentStoreBlobName(store['storePath'], blobHash)
+        try:
+            ### blob reused by this run is not old for GC while manifest of the run is not written yet
+            os.utime(blobName)
+            blobPresent = True
+        except FileNotFoundError:
+            blobPresent = False
+        if blobPresent == True:
+            store['blobsPresent'] += 1
+        else:
+            ### blob is read only, materialized config files are hard links to it
+            JCContentStoreWriteFile(blobName, outputBytes, 0o444)
+            store['blobsWritten'] += 1
+            store['bytesWritten'] += len(outputBytes)
+    except OSError as err:
+        return False, "ERROR JCContentStoreAdd() Can not store config file:{0} of host:{1}, OS error:{2}".format(
+            configFileName, hostName, err)
+    store['files'][configFileName] = blobHash
+    return True, ''
+
+def JCContentStoreClose(store:dict):
+    """
+    Writes manifest of last host of the run
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    try:
+        JCContentStoreWriteManifest(store)
+    except OSError as err:
+        return False, "ERROR JCContentStoreClose() Can not write manifest of host:{0}, OS error:{1}".format(
+            store['hostName'], err)
+    return True, ''
+
+def JCContentStoreRunIds(storePath:str, hostName:str):
+    """
+    Returns run ids of the host sorted from oldest to latest
+    """
+    try:
+        fileNames = os.listdir(os.path.join(storePath, 'manifests', hostName))
+    except OSError:
+        return []
+    return sorted(fileName[:-5] for fileName in fileNames if fileName.endswith('.json'))
+
+def JCContentStoreReadManifest(storePath:str, hostName:str, runId=None):
+    """
+    Returns
+        manifest - manifest of the host for the run, latest run if runId is None, None on error
+        errorMsg - error message on failure
+    """
+    import json
+    if runId == None:
+        runIds = JCContentStoreRunIds(storePath, hostName)
+        if len(runIds) == 0:
+            return None, "ERROR JCContentStoreReadManifest() no manifest of host:{0} in store:{1}".format(hostName, storePath)
+        runId = runIds[-1]
+    manifestFileName = os.path.join(storePath, 'manifests', hostName, "{0}.json".format(runId))
+    try:
+        with open(manifestFileName, 'r') as manifestFile:
+            return json.load(manifestFile), ''
+    except (OSError, ValueError) as err:
+        return None, "ERROR JCContentStoreReadManifest() Can not read manifest:{0}, error:{1}".format(manifestFileName, err)
+
+def JCContentStoreDiff(oldManifest:dict, newManifest:dict):
+    """
+    Compares config file hashes of two manifests, config files are not read
+
+    Returns dictionary of sorted config file name lists
+        added, removed, changed, unchanged
+    """
+    oldFiles = oldManifest['files'] if oldManifest != None else {}
+    newFiles = newManifest['files']
+    result = { 'added': [], 'removed': [], 'changed': [], 'unchanged': [] }
+    for configFileName, blobHash in newFiles.items():
+        oldHash = oldFiles.get(configFileName)
+        if oldHash == None:
+            result['added'].append(configFileName)
+        elif oldHash == blobHash:
+            result['unchanged'].append(configFileName)
+        else:
+            result['changed'].append(configFileName)
+    result['removed'] = [ configFileName for configFileName in oldFiles if configFileName not in newFiles ]
+    for key in result:
+        result[key].sort()
+    return result
+
+def JCContentStoreGC(storePath:str, keepRuns=JCContentStoreKeepRuns, minBlobAgeSeconds=JCContentStoreMinBlobAgeSeconds):
+    """
+    Removes manifests older than latest keepRuns of each host and blobs not referenced by the manifests kept
+
+    Returns
+        stats - dictionary with manifestsRemoved, blobsRemoved, bytesFreed, blobsKept
+        errors - list of error messages
+    """
+    import json
+    stats = { 'manifestsRemoved': 0, 'blobsRemoved': 0, 'bytesFreed': 0, 'blobsKept': 0 }
+    errors = []
+    referencedHashes = set()
+    manifestsPath = os.path.join(storePath, 'manifests')
+    try:
+        hostNames = os.listdir(manifestsPath)
+    except OSError as err:
+        return stats, [ "ERROR JCContentStoreGC() Can not read store:{0}, OS error:{1}".format(storePath, err) ]
+    for hostName in hostNames:
+        runIds = JCContentStoreRunIds(storePath, hostName)
+        for runId in runIds[:max(0, len(runIds) - keepRuns)]:
+            try:
+                os.remove(os.path.join(manifestsPath, hostName, "{0}.json".format(runId)))
+                stats['manifestsRemoved'] += 1
+            except OSError as err:
+                errors.append("ERROR JCContentStoreGC() Can not remove manifest of host:{0}, run:{1}, OS error:{2}".format(
+                    hostName, runId, err))
+        for runId in runIds[max(0, len(runIds) - keepRuns):]:
+            manifestFileName = os.path.join(manifestsPath, hostName, "{0}.json".format(runId))
+            try:
+                with open(manifestFileName, 'r') as manifestFile:
+                    referencedHashes.update(json.load(manifestFile)['files'].values())
+            except (OSError, ValueError, KeyError) as err:
+                ### blobs of a manifest that can not be read may be referenced, do not remove any blob
+                errors.append("ERROR JCContentStoreGC() Can not read manifest:{0}, error:{1}, blobs are not removed".format(
+                    manifestFileName, err))
+                return stats, errors
+
+    minBlobTime = time.time() - minBlobAgeSeconds
+    blobsPath = os.path.join(storePath, 'blobs')
+    try:
+        blobDirNames = os.listdir(blobsPath)
+    except OSError:
+        blobDirNames = []
+    for blobDirName in blobDirNames:
+        try:
+            with os.scandir(os.path.join(blobsPath, blobDirName)) as entries:
+                for entry in entries:
+                    if entry.name in referencedHashes:
+                        stats['blobsKept'] += 1
+                        continue
+                    try:
+                        blobStat = entry.stat()
+                        if blobStat.st_mtime > minBlobTime:
+                            stats['blobsKept'] += 1
+                            continue
+                        os.remove(entry.path)
+                        stats['blobsRemoved'] += 1
+                        stats['bytesFreed'] += blobStat.st_size
+                    except OSError as err:
+                        errors.append("ERROR JCContentStoreGC() Can not remove blob:{0}, OS error:{1}".format(entry.path, err))
+        except OSError as err:
+            errors.append("ERROR JCContentStoreGC() Can not read blobs:{0}, OS error:{1}".format(blobDirName, err))
+    return stats, errors
+
+def JCContentStoreMaterialize(storePath:str, hostName:str, targetPath:str, runId=None):
+    """
+    Makes config files of the host in the manifest under targetPath, as hard links to blobs,
+       blob is copied when hard link can not be made (different file system)
+
+    Returns
+        fileCount - number of config files made
+        errors - list of error messages
+    """
+    import shutil
+    manifest, errorMsg = JCContentStoreReadManifest(storePath, hostName, runId)
+    if manifest == None:
+        return 0, [ errorMsg ]
+    fileCount = 0
+    errors = []
+    for configFileName, blobHash in sorted(manifest['files'].items()):
+        targetFileName = os.path.join(targetPath, configFileName)
+        tempFileName = "{0}.{1}.tmp".format(targetFileName, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(targetFileName), exist_ok=True)
+            try:
+                os.link(JCContentStoreBlobName(storePath, blobHash), tempFileName)
+            except OSError:
+                shutil.copyfile(JCContentStoreBlobName(storePath, blobHash), tempFileName)
+            os.replace(tempFileName, targetFileName)
+            fileCount += 1
+        except OSError as err:
+            if os.path.exists(tempFileName):
+                os.remove(tempFileName)
+            errors.append("ERROR JCContentStoreMaterialize() Can not make config file:{0}, OS error:{1}".format(
+                targetFileName, err))
+    return fileCount, errors
+
+if __name__ == '__main__':
+    import JCGlobalLib
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    storeCommand = argsPassed.get('-c')
+    if storeCommand not in ('materialize', 'diff', 'gc') or '-S' not in argsPassed:
+        print("""
+    python3 JCContentStore.py -c materialize -S <storePath> -h <hostName> -d <targetPath> [-r <runId>]
+        make config files of the host under targetPath as hard links to blobs, latest run if runId is not passed
+    python3 JCContentStore.py -c diff -S <storePath> -h <hostName> [-a <oldRunId>] [-b <newRunId>]
+        list config files added, removed, changed between two runs, defaults to previous and latest run
+    python3 JCContentStore.py -c gc -S <storePath> [-k <keepRuns>] [-m <minBlobAgeSeconds>]
+        keep latest keepRuns manifests of each host, defaults to {0}, remove blobs not referenced by those,
+        blobs modified within minBlobAgeSeconds are kept, defaults to {1}
+    """.format(JCContentStoreKeepRuns, JCContentStoreMinBlobAgeSeconds))
+        sys.exit()
+    storePath = argsPassed['-S']
+    exitStatus = 0
+    if storeCommand == 'materialize':
+        if '-h' not in argsPassed or '-d' not in argsPassed:
+            print("ERROR JCContentStore() materialize needs -h <hostName> -d <targetPath>")
+            sys.exit(1)
+        fileCount, errors = JCContentStoreMaterialize(storePath, argsPassed['-h'], argsPassed['-d'], argsPassed.get('-r'))
+        for errorMsg in errors:
+            print(errorMsg)
+        print("INFO JCContentStore() config files made:{0} under:{1}".format(fileCount, argsPassed['-d']))
+        exitStatus = 1 if len(errors) > 0 else 0
+    elif storeCommand == 'diff':
+        if '-h' not in argsPassed:
+            print("ERROR JCContentStore() diff needs -h <hostName>")
+            sys.exit(1)
+        hostName = argsPassed['-h']
+        runIds = JCContentStoreRunIds(storePath, hostName)
+        newRunId = argsPassed.get('-b', runIds[-1] if len(runIds) > 0 else None)
+        oldRunId = argsPassed.get('-a')
+        if oldRunId == None and newRunId in runIds and runIds.index(newRunId) > 0:
+            oldRunId = runIds[runIds.index(newRunId) - 1]
+        newManifest, errorMsg = JCContentStoreReadManifest(storePath, hostName, newRunId)
+        oldManifest = None
+        if newManifest != None and oldRunId != None:
+            oldManifest, errorMsg = JCContentStoreReadManifest(storePath, hostName, oldRunId)
+        if newManifest == None or (oldRunId != None and oldManifest == None):
+            print(errorMsg)
+            sys.exit(1)
+        diffResult = JCContentStoreDiff(oldManifest, newManifest)
+        for key in ('added', 'removed', 'changed'):
+            for configFileName in diffResult[key]:
+                print("DIFF JCContentStore() config file:{0} {1}".format(configFileName, key))
+        print("INFO JCContentStore() host:{0}, run:{1} compared to run:{2}, added:{3}, removed:{4}, changed:{5}, unchanged:{6}".format(
+            hostName, newRunId, oldRunId, len(diffResult['added']), len(diffResult['removed']),
+            len(diffResult['changed']), len(diffResult['unchanged'])))
+    else:
+        stats, errors = JCContentStoreGC(storePath, int(argsPassed.get('-k', JCContentStoreKeepRuns)),
+            float(argsPassed.get('-m', JCContentStoreMinBlobAgeSeconds)))
+        for errorMsg in errors:
+            print(errorMsg)
+        print("INFO JCContentStore() manifests removed:{0}, blobs removed:{1}, bytes freed:{2}, blobs kept:{3}".format(
+            stats['manifestsRemoved'], stats['blobsRemoved'], stats['bytesFreed'], stats['blobsKept']))
+        exitStatus = 1 if len(errors) > 0 else 0
+    sys.exit(exitStatus)
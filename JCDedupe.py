@@ -0,0 +1,120 @@
+"""
+This module finds hosts whose config files, rendered from a template, are the same so that the template is
+rendered once for those hosts, used when configs of many hosts are generated in one run
+
+    JCDedupeFingerprint(templateFileName, variableNames, templateVariables, templateGlobals) - returns fingerprint
+    JCDedupeWriteFile(sourceFileName, targetFileName, dedupeMethod) - copies or hard links the config file
+    JCDedupeCacheOpen(maxEntries, maxBytes) - returns cache of outputs by fingerprint, least recently used is dropped
+    JCDedupeCacheGet(cache, fingerprint) - returns output of the fingerprint, None if not in cache
+    JCDedupeCacheAdd(cache, fingerprint, output) - adds output of the fingerprint to cache
+
+Rendered output of a template depends only on the values of variables it reads, directly or via included
+   templates, found by JCTemplateAnalysis.JCTemplateAnalyze(). Hosts with same values of those variables get
+   the same output, JCHostName and other host level values that the template does not read do not make the
+   output different.
+Fingerprint is SHA-256 of template file name and values of variables the template reads, values are taken
+   from the variables passed to render and from template environment globals set using JCSetVariable().
+
+A template is not deduplicated, that is, it is rendered for each host when
+    it includes, imports or extends a template whose name is known only at render time
+    it calls JCSetVariable(), value set is to be carried forward to the templates rendered after it
+    it calls JCSystem(), output of the command does not depend on the variables read by the template
+
+Outputs kept for deduplication, config file name written or rendered text when config files are not written
+   under config path, are bounded by number and by size so that memory used does not grow with number of hosts,
+   like for templates reading JCHostName that have a fingerprint per host. Template whose output is dropped
+   from the cache is rendered again for next host having same fingerprint.
+"""
+import os
+from collections import OrderedDict
+
+### dedupe methods
+JCDedupeMethods = ['copy', 'hardlink', 'none']
+
+### default max outputs and max bytes of outputs kept in dedupe cache
+JCDedupeCacheEntries = 4096
+JCDedupeCacheBytes = 64 * 1024 * 1024
+
+def JCDedupeFingerprint(templateFileName:str, variableNames, templateVariables:dict, templateGlobals):
+    """
+    Returns SHA-256 of template file name and values of given variables in hex form
+    Value of a variable is taken from templateVariables, then from templateGlobals, functions in globals are
+       same for all hosts and are skipped, variables not defined are marked as undefined
+    """
+    import hashlib
+    import json
+    fingerprintValues = [ templateFileName ]
+    for variableName in sorted(variableNames):
+        if variableName in templateVariables:
+            fingerprintValues.append([ variableName, templateVariables[variableName] ])
+        elif variableName in templateGlobals:
+            if callable(templateGlobals[variableName]):
+                continue
+            fingerprintValues.append([ variableName, templateGlobals[variableName] ])
+        else:
+            fingerprintValues.append([ variableName, None, 'undefined' ])
+    return hashlib.sha256(
+        json.dumps(fingerprintValues, sort_keys=True, default=repr).encode('utf-8')).hexdigest()
+
+def JCDedupeCacheOpen(maxEntries=JCDedupeCacheEntries, maxBytes=JCDedupeCacheBytes):
+    """
+    Returns cache of outputs by fingerprint, to be passed to JCDedupeCacheGet(), JCDedupeCacheAdd()
+    """
+    return { 'outputs': OrderedDict(), 'bytes': 0, 'maxEntries': maxEntries, 'maxBytes': maxBytes }
+
+def JCDedupeCacheGet(cache:dict, fingerprint:str):
+    """
+    Returns output of the fingerprint, None if not in cache, output returned becomes most recently used
+    """
+    output = cache['outputs'].get(fingerprint)
+    if output != None:
+        cache['outputs'].move_to_end(fingerprint)
+    return output
+
+def JCDedupeCacheAdd(cache:dict, fingerprint:str, output:str):
+    """
+    Adds output of the fingerprint, least recently used outputs are dropped when cache is full
+    """
+    previousOutput = cache['outputs'].pop(fingerprint, None)
+    if previousOutput != None:
+        cache['bytes'] -= len(previousOutput)
+    if len(output) > cache['maxBytes']:
+        return
+    cache['outputs'][fingerprint] = output
+    cache['bytes'] += len(output)
+    while len(cache['outputs']) > cache['maxEntries'] or cache['bytes'] > cache['maxBytes']:
+        fingerprint, output = cache['outputs'].popitem(last=False)
+        cache['bytes'] -= len(output)
+
+def JCDedupeWriteFile(sourceFileName:str, targetFileName:str, dedupeMethod='copy'):
+    """
+    Writes targetFileName with the contents of sourceFileName
+        dedupeMethod - copy, or hardlink to link targetFileName to sourceFileName,
+            when hard link can not be made (different file system, not supported), file is copied
+    Target is written to a temp file first and renamed so that it is replaced in one step
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    import shutil
+    if os.path.abspath(sourceFileName) == os.path.abspath(targetFileName):
+        return True, ''
+    tempFileName = "{0}.{1}.tmp".format(targetFileName, os.getpid())
+    try:
+        linked = False
+        if dedupeMethod == 'hardlink':
+            try:
+                os.link(sourceFileName, tempFileName)
+                linked = True
+            except OSError:
+                linked = False
+        if linked == False:
+            shutil.copyfile(sourceFileName, tempFileName)
+        os.replace(tempFileName, targetFileName)
+    except OSError as err:
+        if os.path.exists(tempFileName):
+            os.remove(tempFileName)
+        return False, "ERROR JCDedupeWriteFile() Can not write config file:{0} from:{1}, OS error:{2}".format(
+            targetFileName, sourceFileName, err)
+    return True, ''
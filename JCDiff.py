@@ -0,0 +1,243 @@
+"""
+This module compares rendered config text in memory to the config file deployed before, used by --diff
+
+    JCDiffText(oldLines, newLines, oldName, newName, contextLines) - returns unified diff of two lists of lines
+    JCDiffFile(configFileName, newText, templateFileName, hostName) - compares new text to the file, returns diff result
+    JCDiffFiles(items, maxWorkers) - compares many files in parallel, returns diff results in the order of items
+    JCDiffSummaryOpen(fileName, headerInfo) - opens diff summary in JSON Lines form, writes header line
+    JCDiffSummaryAdd(summary, result) - writes line of the diff result, diff text is not written
+    JCDiffSummaryClose(summary, summaryInfo) - writes counts of changed, unchanged, new files and closes the summary
+
+Each file is read once and compared to new text as a whole, lines are compared only when the text differs.
+   Lines are compared using hash of each line, common lines at the start and end are skipped before the
+   remaining lines are matched using difflib.SequenceMatcher on the line hashes.
+
+Diff result is a dictionary
+    configFileName, templateFileName, hostName
+    status - unchanged, changed, new or error
+    addedLines, removedLines - number of lines
+    diffText - unified diff, empty if unchanged
+    errorMsg - error reading the file
+
+Diff summary has a line per config file as diff results are added, summary is not kept in memory
+    { "diffSummary": "header", "version", "hostName", "command", "shard" }
+    { "configFileName", "templateFileName", "hostName", "status", "addedLines", "removedLines", "errorMsg" }
+    { "diffSummary": "summary", "counts": { "changed", "unchanged", "new", "error" }, "hostCount" }
+"""
+import os
+
+JCDiffStatusUnchanged = 'unchanged'
+JCDiffStatusChanged = 'changed'
+JCDiffStatusNew = 'new'
+JCDiffStatusError = 'error'
+
+def JCDiffRange(start:int, length:int):
+    """
+    Returns line range in unified diff hunk header, 1 based
+    """
+    if length == 1:
+        return '{0}'.format(start + 1)
+    if length == 0:
+        ### empty range is shown at line before the range
+        return '{0},0'.format(start)
+    return '{0},{1}'.format(start + 1, length)
+
+def JCDiffGroupOpcodes(opcodes, contextLines:int):
+    """
+    Groups opcodes into hunks with up to contextLines equal lines around the changes, same as
+       difflib.SequenceMatcher.get_grouped_opcodes()
+    Adjacent equal opcodes are merged first
+    """
+    mergedOpcodes = []
+    for opcode in opcodes:
+        if opcode[1] == opcode[2] and opcode[3] == opcode[4]:
+            continue
+        if len(mergedOpcodes) > 0 and opcode[0] == 'equal' and mergedOpcodes[-1][0] == 'equal':
+            mergedOpcodes[-1] = ('equal', mergedOpcodes[-1][1], opcode[2], mergedOpcodes[-1][3], opcode[4])
+        else:
+            mergedOpcodes.append(opcode)
+    if len(mergedOpcodes) == 0 or ( len(mergedOpcodes) == 1 and mergedOpcodes[0][0] == 'equal' ):
+        return []
+
+    ### trim equal lines at the start and end to context lines
+    tag, oldFrom, oldTo, newFrom, newTo = mergedOpcodes[0]
+    if tag == 'equal':
+        mergedOpcodes[0] = (tag, max(oldFrom, oldTo - contextLines), oldTo, max(newFrom, newTo - contextLines), newTo)
+    tag, oldFrom, oldTo, newFrom, newTo = mergedOpcodes[-1]
+    if tag == 'equal':
+        mergedOpcodes[-1] = (tag, oldFrom, min(oldTo, oldFrom + contextLines), newFrom, min(newTo, newFrom + contextLines))
+
+    ### split at equal ranges longer than two times context lines
+    groups = []
+    group = []
+    for tag, oldFrom, oldTo, newFrom, newTo in mergedOpcodes:
+        if tag == 'equal' and oldTo - oldFrom > contextLines * 2:
+            group.append((tag, oldFrom, min(oldTo, oldFrom + contextLines), newFrom, min(newTo, newFrom + contextLines)))
+            groups.append(group)
+            group = []
+            oldFrom, newFrom = max(oldFrom, oldTo - contextLines), max(newFrom, newTo - contextLines)
+        group.append((tag, oldFrom, oldTo, newFrom, newTo))
+    if len(group) > 0 and not ( len(group) == 1 and group[0][0] == 'equal' ):
+        groups.append(group)
+    return groups
+
+def JCDiffText(oldLines, newLines, oldName:str, newName:str, contextLines=3):
+    """
+    Returns
+        diffText - unified diff of oldLines and newLines, empty string when same
+        addedLines - number of lines added
+        removedLines - number of lines removed
+    """
+    import difflib
+    oldHashes = [ hash(line) for line in oldLines ]
+    newHashes = [ hash(line) for line in newLines ]
+
+    ### skip common lines at the start and the end, keep context lines around the change
+    prefixLength = 0
+    maxPrefixLength = min(len(oldHashes), len(newHashes))
+    while prefixLength < maxPrefixLength and oldHashes[prefixLength] == newHashes[prefixLength]:
+        prefixLength += 1
+    suffixLength = 0
+    maxSuffixLength = maxPrefixLength - prefixLength
+    while suffixLength < maxSuffixLength and oldHashes[-1 - suffixLength] == newHashes[-1 - suffixLength]:
+        suffixLength += 1
+    if prefixLength == len(oldHashes) and prefixLength == len(newHashes):
+        return '', 0, 0
+
+    oldEnd = len(oldHashes) - suffixLength
+    newEnd = len(newHashes) - suffixLength
+    sequenceMatcher = difflib.SequenceMatcher(
+        None, oldHashes[prefixLength:oldEnd], newHashes[prefixLength:newEnd], autojunk=False)
+
+    ### opcodes of all lines, common lines at the start and end added as equal
+    opcodes = [ ('equal', 0, prefixLength, 0, prefixLength) ]
+    for tag, oldFrom, oldTo, newFrom, newTo in sequenceMatcher.get_opcodes():
+        opcodes.append((tag, oldFrom + prefixLength, oldTo + prefixLength, newFrom + prefixLength, newTo + prefixLength))
+    opcodes.append(('equal', oldEnd, len(oldHashes), newEnd, len(newHashes)))
+
+    diffLines = [ '--- {0}'.format(oldName), '+++ {0}'.format(newName) ]
+    addedLines = removedLines = 0
+    for group in JCDiffGroupOpcodes(opcodes, contextLines):
+        oldStart = group[0][1]
+        newStart = group[0][3]
+        diffLines.append('@@ -{0} +{1} @@'.format(
+            JCDiffRange(oldStart, group[-1][2] - oldStart), JCDiffRange(newStart, group[-1][4] - newStart)))
+        for tag, oldFrom, oldTo, newFrom, newTo in group:
+            if tag == 'equal':
+                diffLines.extend(' ' + line for line in oldLines[oldFrom:oldTo])
+                continue
+            if tag == 'replace' or tag == 'delete':
+                diffLines.extend('-' + line for line in oldLines[oldFrom:oldTo])
+                removedLines += oldTo - oldFrom
+            if tag == 'replace' or tag == 'insert':
+                diffLines.extend('+' + line for line in newLines[newFrom:newTo])
+                addedLines += newTo - newFrom
+    return '\n'.join(diffLines), addedLines, removedLines
+
+def JCDiffFile(configFileName:str, newText:str, templateFileName='', hostName='', contextLines=3):
+    """
+    Compares newText to the contents of configFileName
+    Returns diff result dictionary
+    """
+    result = { 'configFileName': configFileName, 'templateFileName': templateFileName, 'hostName': hostName,
+        'status': JCDiffStatusUnchanged, 'addedLines': 0, 'removedLines': 0, 'diffText': '', 'errorMsg': '' }
+    try:
+        with open(configFileName, "r") as file:
+            oldText = file.read()
+    except FileNotFoundError:
+        oldText = None
+    except (OSError, UnicodeDecodeError) as err:
+        result['status'] = JCDiffStatusError
+        result['errorMsg'] = "ERROR JCDiffFile() Can not read config file:{0}, error:{1}".format(configFileName, err)
+        return result
+
+    if oldText == newText:
+        return result
+
+    newLines = newText.splitlines()
+    if oldText == None:
+        result['status'] = JCDiffStatusNew
+        oldLines = []
+        oldName = '/dev/null'
+    else:
+        result['status'] = JCDiffStatusChanged
+        oldLines = oldText.splitlines()
+        oldName = configFileName
+    result['diffText'], result['addedLines'], result['removedLines'] = JCDiffText(
+        oldLines, newLines, oldName, configFileName + ' (rendered)', contextLines)
+    if result['diffText'] == '':
+        ### differs in line endings or new line at the end of file only
+        result['diffText'] = '@@ line endings or new line at the end of file differ @@'
+    return result
+
+def JCDiffFiles(items, maxWorkers=0):
+    """
+    Compares many files in parallel
+        items - list of dictionaries with keys configFileName, newText, templateFileName, hostName
+        maxWorkers - number of threads, 0 to use number of CPUs
+    Returns list of diff results in the order of items
+    """
+    if len(items) == 0:
+        return []
+    if maxWorkers <= 0:
+        maxWorkers = min(32, (os.cpu_count() or 1) + 4)
+    if len(items) == 1 or maxWorkers == 1:
+        return [ JCDiffFile(item['configFileName'], item['newText'], item.get('templateFileName', ''),
+            item.get('hostName', '')) for item in items ]
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(maxWorkers, len(items)), thread_name_prefix='JCDiff') as executor:
+        return list(executor.map(
+            lambda item: JCDiffFile(item['configFileName'], item['newText'], item.get('templateFileName', ''),
+                item.get('hostName', '')),
+            items))
+
+def JCDiffSummaryOpen(fileName:str, headerInfo:dict):
+    """
+    Opens diff summary file, writes header line
+
+    Returns
+        summary - dictionary to be passed to JCDiffSummaryAdd(), JCDiffSummaryClose(), None on error
+        errorMsg - error message on failure
+    """
+    import json
+    try:
+        summaryFile = open(fileName, "w")
+        summaryFile.write(json.dumps(dict(headerInfo, diffSummary='header'), sort_keys=True) + '\n')
+    except OSError as err:
+        return None, "ERROR JCDiffSummaryOpen() Can not write diff summary file:{0}, OS error:{1}".format(fileName, err)
+    return { 'file': summaryFile, 'fileName': fileName, 'counts': dict((status, 0)
+        for status in (JCDiffStatusChanged, JCDiffStatusUnchanged, JCDiffStatusNew, JCDiffStatusError)) }, ''
+
+def JCDiffSummaryAdd(summary:dict, result:dict):
+    """
+    Writes line of the diff result to diff summary, diff text is not written
+    """
+    import json
+    if summary == None:
+        return
+    summary['file'].write(json.dumps(dict(
+        (key, value) for key, value in result.items() if key != 'diffText'), sort_keys=True) + '\n')
+    summary['counts'][result['status']] += 1
+
+def JCDiffSummaryClose(summary:dict, summaryInfo=None):
+    """
+    Writes summary line with counts of changed, unchanged, new files and files not read, closes diff summary
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    import json
+    if summary == None:
+        return True, ''
+    summaryLine = { 'diffSummary': 'summary', 'counts': summary['counts'] }
+    if summaryInfo != None:
+        summaryLine.update(summaryInfo)
+    try:
+        summary['file'].write(json.dumps(summaryLine, sort_keys=True) + '\n')
+        summary['file'].close()
+    except OSError as err:
+        return False, "ERROR JCDiffSummaryClose() Can not write diff summary file:{0}, OS error:{1}".format(
+            summary['fileName'], err)
+    return True, ''
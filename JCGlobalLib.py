@@ -7,12 +7,13 @@
     Author: havembha@gmail.com, 2023-08-19
 """
 import datetime
-import platform
 import re
 import sys
 import os
 import time
 
+import JCTrace
+
 def UTCDateTime():
     return datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f%Z")
 
@@ -53,15 +54,28 @@ def JCParseArgs(argsPassed):
     JCGlobalLib.JAParseArgs(argsPassed)
 
     Parses the command level arguments in sys.argv[] to the list argsPassed
+    Arguments are expected in pairs of -<option> <value>
+    Long options in the form --<option> may be passed without value, when not followed by value,
+       empty string is stored as the value
     Returns argument count
 
     """
     args = sys.argv[1:]
     argc = len(args)
-    for index in range(0,argc,2):
+    index = 0
+    while index < argc:
         argument = args[index]
-        argsPassed[argument] = args[index+1]
-            
+        if argument.startswith('--') and ( index+1 >= argc or args[index+1].startswith('-') ):
+            ### long option without value
+            argsPassed[argument] = ''
+            index += 1
+        elif index+1 < argc:
+            argsPassed[argument] = args[index+1]
+            index += 2
+        else:
+            argsPassed[argument] = ''
+            index += 1
+
     return argc
 
 def JCIsYamlModulePresent():
@@ -160,6 +174,23 @@ def LogMsg(logMsg:str, fileName:str, appendDate=True, prefixTimeStamp=True):
         logFileStream.close()
         return 1
 
+### first word of a line to color name used by LogLine(), '' means timestamp only, no color
+LogLinePrefixColors = {
+    'ERROR ': 'red',
+    'ERROR,': 'red',
+    'PASS ': 'green',
+    ' PASS': 'green',
+    'DIFF ': 'cyan',
+    'INFO ': '',
+    'WARN ': 'yellow',
+    'FAIL ': 'yellow',
+    }
+### diff output lines, line prefix on Unix hosts, line suffix on Windows hosts
+LogLineDiffPrefixes = { '< ': 'blue', '> ': 'magenta' }
+LogLineWindowsDiffSuffixes = { '<=': 'blue', '=>': 'magenta' }
+### unified diff output lines, colored when diffLine is True, context lines starting with space are not colored
+LogLineUnifiedDiffPrefixes = { '@@': 'cyan', '-': 'blue', '+': 'magenta', ' ': '' }
+
 def LogLine(myLines, tempPrintLine, myColors, colorIndex:int, outputFile:str, HTMLBRTag:str,  diffLine=False, OSType='Linux'):
     """
     JCGlobalLib.LogLine(myLines, tempPrintLine, myColors, colorIndex:int, outputFile:str, HTMLBRTag:str,  diffLine=False, OSType='Linux')
@@ -180,49 +211,76 @@ def LogLine(myLines, tempPrintLine, myColors, colorIndex:int, outputFile:str, HT
     > - printed in cyan color
     These lines are considerd as output of diff command
 
+    If diffLine is True, lines of unified diff output starting with
+    @@ - printed in cyan color
+    - - printed in blue color
+    + - printed in magenta color
+    space - context line, printed without color
+
     Parameters passed:
         myLines - line to print
         tempPrintLine - True or False, if True, formatted line will be printed to the terminal
 
     """
 
-    currentTime = UTCDateTime() + ' '
-    tempLines = myLines.splitlines(False)
+    if colorIndex == 2:
+        if "<!--" in myLines:
+            myLines = myLines.replace("<!--",  "/&lt;!--")
+        if "-->" in myLines:
+            myLines = myLines.replace("-->",  "--&gt;")
+
+    # repace \r with \n
+    if r'\r' in myLines:
+        myLines = myLines.replace(r'\r', r'\n')
+
+    ### timestamp is computed once per call, only when a line needs it
+    currentTime = None
+    clearColor = myColors['clear'][colorIndex]
+    diffLines = (diffLine == True)
+    windowsDiff = (OSType == "Windows")
+    formattedLines = []
+
+    for line in myLines.splitlines(False):
+        # diff lines first, '< ' and '> ' lines are colored on non-windows hosts even when diffLine is False
+        if windowsDiff == False and line[:2] in LogLineDiffPrefixes:
+            formattedLines.append( myColors[LogLineDiffPrefixes[line[:2]]][colorIndex] + line + clearColor)
+            continue
+        if windowsDiff == True and diffLines == True and line[-2:] in LogLineWindowsDiffSuffixes:
+            formattedLines.append( myColors[LogLineWindowsDiffSuffixes[line[-2:]]][colorIndex] + line + clearColor)
+            continue
+        if diffLines == True:
+            if line[:1] == '@':
+                colorName = LogLineUnifiedDiffPrefixes.get(line[:2])
+            else:
+                colorName = LogLineUnifiedDiffPrefixes.get(line[:1])
+            if colorName == '':
+                formattedLines.append(line)
+                continue
+            elif colorName != None:
+                formattedLines.append( myColors[colorName][colorIndex] + line + clearColor)
+                continue
+
+        # first word lookup, prefixes are 5 or 6 characters long
+        colorName = LogLinePrefixColors.get(line[:5])
+        if colorName == None:
+            colorName = LogLinePrefixColors.get(line[:6])
+            if colorName == None:
+                formattedLines.append(line)
+                continue
+
+        if currentTime == None:
+            currentTime = UTCDateTime() + ' '
+        if colorName == '':
+            formattedLines.append( currentTime + line )
+        else:
+            formattedLines.append( myColors[colorName][colorIndex] + currentTime + line + clearColor)
 
-    for line in tempLines:
-        if colorIndex == 2:
-            line = line.replace("<!--",  "/&lt;!--")
-            line = line.replace("-->",  "--&gt;")
-        
-        # repace \r with \n
-        line = line.replace(r'\r', r'\n')
-
-        if ( ( (OSType != "Windows") and re.match( '^< ', line) )
-            or ( (OSType == "Windows" and re.search(r'<=$' , line) )) 
-            and (diffLine == True) ):
-            # diff line, color code it
-            line = myColors['blue'][colorIndex]  + line + myColors['clear'][colorIndex]
-        elif ( ( (OSType != "Windows") and re.match( '^> ', line) )
-            or ( (OSType == "Windows" and re.search(r'=>$' , line) )) 
-            and (diffLine == True) ):
-            # diff line, color code it
-            line = myColors['magenta'][colorIndex] + line + myColors['clear'][colorIndex]
-        elif re.match( '^ERROR |^ERROR,', line):
-            # diff line, color code it
-            line = myColors['red'][colorIndex] + currentTime + line + myColors['clear'][colorIndex]
-        elif re.match( '^PASS |^ PASS', line):
-            # diff line, color code it
-            line = myColors['green'][colorIndex] + currentTime + line + myColors['clear'][colorIndex]    
-        elif re.match('^DIFF ', line) :
-            line = myColors['cyan'][colorIndex] + currentTime + line + myColors['clear'][colorIndex]   
-        elif re.match('^INFO ', line) :
-            line = currentTime + line   
-        elif re.match('^WARN |^FAIL ', line) :
-            line = myColors['yellow'][colorIndex] + currentTime + line + myColors['clear'][colorIndex]   
-        if outputFile != None:
-            outputFile.write( HTMLBRTag + line + '\n')
-        if tempPrintLine == True:
-            print( line )
+    if len(formattedLines) == 0:
+        return
+    if outputFile != None:
+        outputFile.write( HTMLBRTag + ('\n' + HTMLBRTag).join(formattedLines) + '\n')
+    if tempPrintLine == True:
+        print( '\n'.join(formattedLines) )
 
 def JCYamlLoad(fileName:str ):
     """
@@ -367,9 +425,9 @@ def JCYamlLoad(fileName:str ):
         print('ERROR Can not read file:|' + fileName + '|, ' + "OS error: {0}".format(err) + '\n')
         return yamlData
 
-def JCFindModifiedFiles(fileName:str, sinceTimeInSec:int, debugLevel:int, thisHostName:str):
+def JCFindModifiedFiles(fileName:str, sinceTimeInSec:int, debugLevel:int, thisHostName:str, maxFiles=0, returnDetails=False):
     """
-    JCGlobalLib.JAFindModifiedFiles(fileName:str, sinceTimeInSec:int, debugLevel:int, thisHostName:str)
+    JCGlobalLib.JAFindModifiedFiles(fileName:str, sinceTimeInSec:int, debugLevel:int, thisHostName:str, maxFiles=0, returnDetails=False)
 
         This function returns file names in a directory that are modified since given GMT time in seconds
         if sinceTimeInSec is 0, latest file is picked up regardless of modified time
@@ -378,6 +436,13 @@ def JCFindModifiedFiles(fileName:str, sinceTimeInSec:int, debugLevel:int, thisHo
         if sinceTimeInSec is +ve number, files modified before that time are returned
         if sinceTimeInSec is -ve number, files modified since that time are returned
 
+        if maxFiles is > 0, latest maxFiles files are returned
+        if returnDetails is True, list of (fileName, modifiedTime, size) is returned instead of file names
+           so that caller does not need to get file stats again
+
+        File names are returned in the order of modified time, oldest first. 
+        Files with same modified time are returned in the order of file name.
+
     """
     head_tail = os.path.split( fileName )
     # if no path specified, use ./ (current working directory)
@@ -389,14 +454,14 @@ def JCFindModifiedFiles(fileName:str, sinceTimeInSec:int, debugLevel:int, thisHo
     fileNameWithoutPath = head_tail[1]
 
     # if fileName has variable {HOSTNAME}, replace that with current short hostname
-    if re.search(r'{HOSTNAME}', fileNameWithoutPath) != None:
-        fileNameWithoutPath = re.sub(r'{HOSTNAME}', thisHostName, fileNameWithoutPath)
+    if '{HOSTNAME}' in fileNameWithoutPath:
+        fileNameWithoutPath = fileNameWithoutPath.replace('{HOSTNAME}', thisHostName)
 
     if debugLevel > 1 :
         print('DEBUG-2 JCFileFilesModified() filePath:{0}, fileName: {1}'.format( myDirPath, fileNameWithoutPath))
 
     import fnmatch
-    import glob
+    import heapq
 
     if sinceTimeInSec > 0:
         findFilesOlderThanGivenTime = True
@@ -405,50 +470,73 @@ def JCFindModifiedFiles(fileName:str, sinceTimeInSec:int, debugLevel:int, thisHo
         sinceTimeInSec = abs(sinceTimeInSec)
         findFilesOlderThanGivenTime = False
 
-    fileNames = {}
+    # if sinceTimeInSec is zero, pick up latest file only
+    if sinceTimeInSec == 0:
+        maxFiles = 1
+
+    ### similar to glob, names starting with . are matched only when pattern starts with .
+    matchHiddenFiles = fileNameWithoutPath.startswith('.')
+    ### compile the pattern once instead of fnmatch() per file, case insensitive match on Windows like glob
+    matchFileName = re.compile(fnmatch.translate(os.path.normcase(fileNameWithoutPath))).match
+    normalizeCase = os.path.normcase('A') != 'A'
+
+    ### list of (modifiedTime, fileName, size)
+    matchingFiles = []
 
     try:
-        # get all file names in desired directory with matching file spec
-        for file in glob.glob(myDirPath + "/" + fileNameWithoutPath):
-        
-            if debugLevel > 2 :
-                print('DEBUG-3 JCFileFilesModified() fileName: {0}, match to desired fileNamePattern: {1}'.format(
-                    file, fileNameWithoutPath) )
-
-            # now check the file modified time, if greater than or equal to passed time, save the file name
-            fileModifiedTime = os.path.getmtime ( file )
-            if findFilesOlderThanGivenTime == True:
-                if fileModifiedTime < sinceTimeInSec :
-                    fileNames[ fileModifiedTime ] = file 
-                    if debugLevel > 2 :
-                        print('DEBUG-3 JCFileFilesModified() fileName: {0}, modified time: {1}, later than desired time: {2}'.format( file, fileModifiedTime, sinceTimeInSec) )
+        # get all file names in desired directory with matching file spec, 
+        #  file stats are taken from directory entry, cached while scanning the directory
+        with os.scandir(myDirPath) as entries:
+            for entry in entries:
+                if matchHiddenFiles == False and entry.name.startswith('.'):
+                    continue
+                if matchFileName(entry.name.lower() if normalizeCase == True else entry.name) == None:
+                    continue
+                if debugLevel > 2 :
+                    print('DEBUG-3 JCFileFilesModified() fileName: {0}, match to desired fileNamePattern: {1}'.format(
+                        entry.path, fileNameWithoutPath) )
+                try:
+                    if entry.is_file() == False:
+                        continue
+                    fileStat = entry.stat()
+                except OSError:
+                    ### file deleted after directory is read
+                    continue
 
-            else:
-                if fileModifiedTime >= sinceTimeInSec :
-                    fileNames[ fileModifiedTime ] = file 
-                    if debugLevel > 2 :
-                        print('DEBUG-3 JCFileFilesModified() fileName: {0}, modified time: {1}, later than desired time: {2}'.format( file, fileModifiedTime, sinceTimeInSec) )
+                # now check the file modified time, if greater than or equal to passed time, save the file name
+                fileModifiedTime = fileStat.st_mtime
+                if findFilesOlderThanGivenTime == True:
+                    if fileModifiedTime >= sinceTimeInSec :
+                        continue
+                elif fileModifiedTime < sinceTimeInSec :
+                    continue
+                if debugLevel > 2 :
+                    print('DEBUG-3 JCFileFilesModified() fileName: {0}, modified time: {1}, desired time: {2}'.format( entry.path, fileModifiedTime, sinceTimeInSec) )
+                matchingFiles.append( (fileModifiedTime, entry.path, fileStat.st_size) )
     except OSError as err:
         errorMsg = "ERROR JCFileFilesModified() Not able to find files in fileName: {0}, error:{1}".format( 
             myDirPath, err)
         print( errorMsg)
-        
-    sortedFileNames = []
-    for fileModifiedTime, fileName in sorted ( fileNames.items() ):
-        sortedFileNames.append( fileName )
+
+    if maxFiles > 0 and maxFiles < len(matchingFiles):
+        ### pick latest files without sorting all files
+        matchingFiles = heapq.nlargest(maxFiles, matchingFiles)
+    matchingFiles.sort()
+
+    if returnDetails == True:
+        sortedFileNames = [ (fileName, fileModifiedTime, fileSize) for fileModifiedTime, fileName, fileSize in matchingFiles ]
+    else:
+        sortedFileNames = [ fileName for fileModifiedTime, fileName, fileSize in matchingFiles ]
 
     if debugLevel > 0 :
         print('DEBUG-1 JCFileFilesModified() modified files in:{0}, since gmtTimeInSec:{1}, fileNames:{2}'.format( 
             fileName, sinceTimeInSec, sortedFileNames) )
 
-    # if sinceTimeInSec is zero, pick up latest file only
-    if sinceTimeInSec == 0:
-        if len(sortedFileNames) > 0:
-            # return single file as list
-            return [sortedFileNames[-1]]
-    
     return sortedFileNames
 
+### OS release files read by JCGetOSInfo() in this order
+JCOSReleaseFileNames = ['/etc/os-release', '/etc/system-release', '/etc/redhat-release']
+
 def JCGetOSInfo(pythonVersion, debugLevel:int):
     """
     JCGlobalLib.JAGetOSInfo(pythonVersion, debugLevel:int)
@@ -462,76 +550,55 @@ def JCGetOSInfo(pythonVersion, debugLevel:int):
             10, 11 for Windows
 
     """
+    import platform
     OSType = platform.system()
+    OSName = tempOSVersion = ''
     if OSType == 'Linux' :
-        try:
-            with open("/etc/os-release", "r") as file:
-                while True:
-                    tempLine = file.readline()
-                    if not tempLine:
-                        break
-                    if len(tempLine)<5:
-                        continue
-                    tempLine = re.sub('\n$','',tempLine)
-
-                    if re.match(r'ID=', tempLine) != None:
-                        dummy, OSName = re.split(r'ID=', tempLine)
-
-                        # remove double quote around the value
-                        OSName = re.sub('"','',OSName)
-
-                    elif re.match(r'VERSION_ID',tempLine) != None:
-                        dummy,tempOSVersion = re.split(r'VERSION_ID=', tempLine)
-                file.close()
-        except:
+        ### read release files in this order, stop at first file where OS version is found
+        for releaseFileName in JCOSReleaseFileNames:
             try:
-                with open("/etc/system-release", "r") as file:
-                    while True:
-                        tempLine = file.readline()
-                        if not tempLine:
-                            break
-                        if len(tempLine)<5:
-                            continue
-                        tempLine = re.sub('\n$','',tempLine)
-                        # line is of the form: red hat enterprise linux server release 6.8 (santiago)
-                        #                                                             \d.\d <-- OSVersion
-                        myResults = re.search( r'Red Hat (.*) (\d.\d) (.*)', tempLine)
-                        if myResults != None:
-                            tempOSVersion = myResults.group(2)
-                            OSName = 'rhel'
-
-            except:
-                try:
-                    with open("/etc/redhat-release", "r") as file:
-                        while True:
-                            tempLine = file.readline()
-                            if not tempLine:
-                                break
-                            if len(tempLine)<5:
-                                continue
-                            tempLine = re.sub('\n$','',tempLine)
-                            # line is of the form: red hat enterprise linux server release 6.8 (santiago)
-                            #                                                             \d.\d <-- OSVersion
-                            myResults = re.search( r'Red Hat (.*) (\d.\d) (.*)', tempLine)
-                            if myResults != None:
-                                tempOSVersion = myResults.group(2)
-                                OSName = 'rhel'
-                except:
-                    tempOSVersion = ''
-                    OSName = ''
-                    print("ERROR JCGetOSInfo() Can't read file: /etc/os-release or /etc/system-release")
-                    tempOSReease = ''
+                with open(releaseFileName, "r") as file:
+                    lines = file.read().splitlines()
+            except OSError:
+                continue
+            for tempLine in lines:
+                if len(tempLine)<5:
+                    continue
+                if releaseFileName == '/etc/os-release':
+                    if tempLine.startswith('ID='):
+                        # remove double quote around the value
+                        OSName = tempLine[3:].replace('"', '')
+                    elif tempLine.startswith('VERSION_ID='):
+                        tempOSVersion = tempLine[11:]
+                else:
+                    # line is of the form: red hat enterprise linux server release 6.8 (santiago)
+                    #                                                             \d.\d <-- OSVersion
+                    myResults = re.search( r'Red Hat (.*) (\d.\d) (.*)', tempLine)
+                    if myResults != None:
+                        tempOSVersion = myResults.group(2)
+                        OSName = 'rhel'
+            if tempOSVersion != '':
+                break
+        else:
+            print("ERROR JCGetOSInfo() Can't read OS version from file: {0}".format(', '.join(JCOSReleaseFileNames)))
 
     elif OSType == 'Windows' :
         if pythonVersion >= (3,7) :
             tempOSVersion = platform.version()
         OSName = OSType
+    else:
+        tempOSVersion = platform.release()
+        OSName = OSType
 
     # extract major release id from string like x.y.z
     # windows 10.0.19042
     # RH7.x - 3.10.z, RH8.x - 4.18.z
     # Ubuntu - 5.10.z
-    OSVersion = re.search(r'\d+', tempOSVersion).group()
+    myResults = re.search(r'\d+', tempOSVersion)
+    if myResults != None:
+        OSVersion = myResults.group()
+    else:
+        OSVersion = ''
     if debugLevel > 0 :
         print("DEBUG-1 JCGetOSInfo() OSType:{0}, OSName:{1}, OSVersion:{2}".format(OSType, OSName, OSVersion) )
 
@@ -543,8 +610,10 @@ def JCGetOSType():
     JCGlobalLib.JAGetOSType()
         Returns values like Linux, Windows
     """
+    import platform
     return platform.system()
 
+@JCTrace.JCTraceFunction('command', 'command')
 def JCExecuteCommand(shell:str, command:str, debugLevel:int, OSType="Linux", timeoutPassed=30, nowait=False):
     """
     JCGlobalLib.JAExecuteCommand(shell:str, command:str, debugLevel:int, OSType="Linux", timeoutPassed=30)
@@ -671,6 +740,7 @@ def JCGetProfile(fileName:str, paramName:str):
 
     Searches for the paramName in given profile file having the values in the format
         paramName: paramValue 
+    The file is indexed once by JCProfileStore, use JCProfileStore.JCProfileGetMany() to get many values
     
     Parameters passed:
         fileName - profile file name
@@ -681,27 +751,14 @@ def JCGetProfile(fileName:str, paramName:str):
        paramValue - value if value found, else None
 
     """
-    returnStatus = False
-    paramValue = None
-    if os.path.exists(fileName) :
-        with open(fileName, "r") as file:
-            while True:
-                line = file.readline()
-                if not line:
-                    break
-                line = line.strip()
-                fieldParts = line.split(':')
-                if len(fieldParts) > 1:
-                    if fieldParts[0] == paramName:
-                        paramValue = fieldParts[1]
-                        paramValue = paramValue.lstrip()
-                        returnStatus = True
-                        break
-            file.close()
-    else:
+    import JCProfileStore
+    returnStatus, paramValues = JCProfileStore.JCProfileGetMany(fileName, [paramName])
+    if returnStatus == False:
         print("ERROR JCGetProfile() Profile file:{0} is not present".format(fileName))
-
-    return returnStatus, paramValue
+        return False, None
+    if paramName in paramValues:
+        return True, paramValues[paramName]
+    return False, None
 
 def JCSetProfile(fileName:str, paramName:str, paramValue:str):
     """
@@ -710,6 +767,7 @@ def JCSetProfile(fileName:str, paramName:str, paramValue:str):
     Searches for the paramName in given profile file having the values in the format
         paramName: paramValue 
     Replaces the maching line with new paramValue passed
+    The file is updated by JCProfileStore under lock, use JCProfileStore.JCProfileSetMany() to set many values
 
     Parameters passed:
         fileName - profile file name
@@ -720,41 +778,102 @@ def JCSetProfile(fileName:str, paramName:str, paramValue:str):
        returnStatus - True if value found, else False
        
     """
-    returnStatus = True
-    fileContents = ''
-    lineFound = False
-    replaceLine = "{0}: {1}\n".format(paramName,paramValue)
-    if os.path.exists(fileName) :
-        with open(fileName, "r") as file:
-            while True:
-                line = file.readline()
-                if not line:
-                    break
-                fieldParts = line.split(':')
-                if len(fieldParts) > 1:
-                    if fieldParts[0] == paramName:
-                        ### make new line with new param value
-                        fileContents += replaceLine
-                        lineFound = True
-                    else:
-                        ### store original line as is
-                        fileContents += (line )
-            if lineFound == False:
-                ### add new line
-                fileContents += (replaceLine)
-            file.close()
-        
-        with open(fileName, "w") as file:
-            file.write(fileContents)
-            file.close()
+    import JCProfileStore
+    returnStatus, errorMsg = JCProfileStore.JCProfileSetMany(fileName, {paramName: paramValue})
+    if returnStatus == False:
+        print(errorMsg)
+    return returnStatus
+
+### pathName: { 'mtime': directory modified time, 'names': names in the directory, 'racy': True when listed
+###   within JCDirectoryIndexRacySeconds of modified time }, used by JCDeriveConfigFileName()
+directoryIndexes = {}
+
+### directory listed within this time of its modified time may miss a file added in same modified time tick,
+###   it is listed once more after this time
+JCDirectoryIndexRacySeconds = 1.0
+
+def JCDirectoryIndex(pathName:str, checkModifiedTime=True):
+    """
+    JCGlobalLib.JCDirectoryIndex(pathName:str, checkModifiedTime=True)
+
+    Returns set of names in the directory, listed once using os.scandir() and kept in memory
+      checkModifiedTime - when True, modified time of the directory is checked using os.stat() and the directory
+         is listed again when it changed (file added, deleted or renamed),
+         when False, names listed before in this run are returned without checking the directory
+    Directory listed within JCDirectoryIndexRacySeconds of its modified time is listed once more after that time
+      so that a file added in same modified time tick after the listing is not missed
+    Names are normalized by os.path.normcase() so that lookups are case insensitive where file system is
+    Returns empty set if directory is not present
+
+    """
+    directoryIndex = directoryIndexes.get(pathName)
+    if directoryIndex != None and checkModifiedTime == False:
+        if ( directoryIndex['racy'] == False or
+             time.time() - directoryIndex['mtime'] / 1000000000 < JCDirectoryIndexRacySeconds ):
+            return directoryIndex['names']
+    try:
+        modifiedTime = os.stat(pathName).st_mtime_ns
+    except OSError:
+        directoryIndexes.pop(pathName, None)
+        return frozenset()
+    listTime = time.time()
+    if ( directoryIndex != None and directoryIndex['mtime'] == modifiedTime and
+         ( directoryIndex['racy'] == False or listTime - modifiedTime / 1000000000 < JCDirectoryIndexRacySeconds ) ):
+        return directoryIndex['names']
+    try:
+        with os.scandir(pathName) as entries:
+            names = frozenset(os.path.normcase(entry.name) for entry in entries)
+    except OSError:
+        names = frozenset()
+    directoryIndexes[pathName] = { 'mtime': modifiedTime, 'names': names,
+        'racy': listTime - modifiedTime / 1000000000 < JCDirectoryIndexRacySeconds }
+    return names
 
+def JCDeriveConfigFileNameFromIndex( pathName1:str, names1, pathName2:str, names2, configFileName:str, subsystem:str, operation:str, version:str ):
+    """
+    Derives config file name using names in the directories listed by JCDirectoryIndex(), names in
+      sub directories are checked using os.path.exists()
+    Returns returnStatus, configFileName, errorMsg same as JCDeriveConfigFileName()
+    """
+    # remove file type from configFileName, base name may have more than one dot
+    if '.' in configFileName:
+        baseConfigFileNameWithoutFileType, fileType = configFileName.rsplit('.', 1)
+        fileType = '.' + fileType
     else:
-        ### write new file
-        with open(fileName, "w") as file:
-            file.write(replaceLine)
-            file.close()
+        baseConfigFileNameWithoutFileType, fileType = configFileName, ''
 
-    return returnStatus
+    ### use Apps subsystem as default 
+    if subsystem == '' or subsystem == None:
+        subsystem = 'Apps'
+
+    ### file names to search in the order of precedence
+    ###   with version if version is passed, without version, base file name if operation is stats or logs
+    candidateFileNames = []
+    if version != '':
+        candidateFileNames.append('{0}.{1}.{2}.{3}{4}'.format(
+            baseConfigFileNameWithoutFileType, subsystem, operation, version, fileType))
+    candidateFileNames.append('{0}.{1}.{2}{3}'.format(
+        baseConfigFileNameWithoutFileType, subsystem, operation, fileType))
+    if operation == 'stats' or operation == 'logs':
+        candidateFileNames.append(configFileName)
+
+    tempConfigFileName = ''
+    for candidateFileName in candidateFileNames:
+        ### first try under path1, then under path2
+        for pathName, names in ((pathName1, names1), (pathName2, names2)):
+            tempConfigFileName = '{0}/{1}'.format(pathName, candidateFileName)
+            if '/' in candidateFileName or os.sep in candidateFileName:
+                ### file under sub directory, not in directory index
+                fileFound = os.path.exists(tempConfigFileName)
+            else:
+                fileFound = os.path.normcase(candidateFileName) in names
+            if fileFound == True:
+                return True, tempConfigFileName, ''
+
+    ### file does exist, return error
+    errorMsg = "ERROR JCDeriveConfigFileName() config file:|{0}| not present in path1:|{1}|, path2:|{2}|, AppConfig:|{3}|, subsystem:|{4}|, operation:|{5}|, version:|{6}|".format(
+        tempConfigFileName, pathName1, pathName2,  configFileName, subsystem, operation, version)
+    return False, '', errorMsg
 
 def JCDeriveConfigFileName( pathName1:str, pathName2:str, configFileName:str, subsystem:str, operation:str, version:str, debugLevel:int ):
     """
@@ -769,77 +888,44 @@ def JCDeriveConfigFileName( pathName1:str, pathName2:str, configFileName:str, su
     if operation is 'stats', and if file name does not exist with subsystem name, operation, 
       and file does exist with configFileName, that base name is returned.
 
-    """
+    File names in pathName1 and pathName2 are listed once in a run and cached by JCDirectoryIndex(),
+      the directories are not checked again for each lookup. Use JCDeriveConfigFileNames() to derive many
+      file names in one call, it checks the directories for changes once per call.
 
-    returnStatus = False
-    errorMsg = ''
-    
+    """
     if debugLevel > 1:
         print("DEBUG-2 JCDeriveConfigFileName() pathName1:|{0}|, pathName2:|{1}|, configFileName:|{2}|, subsystem:|{3}|, operation:|{4}|, version:|{5}|".format(
                 pathName1, pathName2, configFileName, subsystem, operation, version))
 
-    # remove file type from configFileName
-    baseConfigFileNameWithoutFileType, fileType = configFileName.split('.')
-
-    ### use Apps subsystem as default 
-    if subsystem == '' or subsystem == None:
-        subsystem = 'Apps'
-    
-    ### first try with version, if version is passed
-    if version != '':
-        ### first try under path1
-        tempConfigFileName = '{0}/{1}.{2}.{3}.{4}.{5}'.format(
-            pathName1, baseConfigFileNameWithoutFileType, subsystem, operation, version, fileType)
-        if os.path.exists( tempConfigFileName ) == False:
-            ### Now try under pathName2
-            tempConfigFileName = '{0}/{1}.{2}.{3}.{4}.{5}'.format(
-                pathName2, baseConfigFileNameWithoutFileType, subsystem, operation, version, fileType)
-            if os.path.exists( tempConfigFileName ) == False:
-                returnStatus = False
-            else:
-                returnStatus = True
-        else:
-            returnStatus = True
-
-    if returnStatus == False:
-        ### try without the version string
-        tempConfigFileName = '{0}/{1}.{2}.{3}.{4}'.format(
-            pathName1, baseConfigFileNameWithoutFileType, subsystem, operation, fileType)
-        if os.path.exists( tempConfigFileName ) == False:
-            tempConfigFileName = '{0}/{1}.{2}.{3}.{4}'.format(
-                pathName2, baseConfigFileNameWithoutFileType, subsystem, operation, fileType)
-            if os.path.exists( tempConfigFileName ) == False:
-                ### if operation is 'stats' or 'logs', look for base file name itself
-                if operation == 'stats' or operation == 'logs':
-                    tempConfigFileName = '{0}/{1}'.format( 
-                            pathName1, configFileName)
-                    if os.path.exists( tempConfigFileName ) == False:
-                        tempConfigFileName = '{0}/{1}'.format( 
-                                pathName2, configFileName)
-                        if os.path.exists( tempConfigFileName ) == False:
-                            ### file does exist, return error
-                            errorMsg = "ERROR JCDeriveConfigFileName() config file:|{0}| not present in path1:|{1}|, path2:|{2}|, AppConfig:|{3}|, subsystem:|{4}|, operation:|{5}|, version:|{6}|".format(
-                                tempConfigFileName, pathName1, pathName2,  configFileName, subsystem, operation, version)
-                            returnStatus = False
-                            tempConfigFileName = ''
-                        else:
-                            returnStatus = True
-                    else:
-                        returnStatus = True
-                else:        
-                    ### file does exist, return error
-                    errorMsg = "ERROR JCDeriveConfigFileName() config file:|{0}| not present in path1:|{1}|, path2:|{2}|, AppConfig:|{3}|, subsystem:|{4}|, operation:|{5}|, version:|{6}|".format(
-                        tempConfigFileName, pathName1, pathName2,  configFileName, subsystem, operation, version)
-                    returnStatus = False
-                    tempConfigFileName = ''
-            else:
-                returnStatus = True
-        else:
-            returnStatus = True
+    returnStatus, tempConfigFileName, errorMsg = JCDeriveConfigFileNameFromIndex(
+        pathName1, JCDirectoryIndex(pathName1, False), pathName2, JCDirectoryIndex(pathName2, False),
+        configFileName, subsystem, operation, version)
 
     if debugLevel > 1:
         print("DEBUG-2 JCDeriveConfigFileName() derived config file:|{0}|".format(tempConfigFileName))
     return returnStatus, tempConfigFileName, errorMsg
+
+def JCDeriveConfigFileNames( pathName1:str, pathName2:str, configFileName:str, requests, debugLevel:int ):
+    """
+    JCGlobalLib.JCDeriveConfigFileNames( pathName1:str, pathName2:str, configFileName:str, requests, debugLevel:int )
+
+    Derives config file names for many requests with directories checked once
+        requests - list of (subsystem, operation, version)
+
+    Returns list of (returnStatus, configFileName, errorMsg) in the order of requests, 
+      see JCDeriveConfigFileName() for details
+
+    """
+    names1 = JCDirectoryIndex(pathName1)
+    names2 = JCDirectoryIndex(pathName2)
+    results = []
+    for subsystem, operation, version in requests:
+        results.append(JCDeriveConfigFileNameFromIndex(
+            pathName1, names1, pathName2, names2, configFileName, subsystem, operation, version))
+        if debugLevel > 1:
+            print("DEBUG-2 JCDeriveConfigFileNames() subsystem:|{0}|, operation:|{1}|, version:|{2}|, derived config file:|{3}|".format(
+                subsystem, operation, version, results[-1][1]))
+    return results
     
 def JCGatherEnvironmentSpecs(storeCurrentValue, values, debugLevel, defaultParameters, integerParameters, floatParameters):
     """
@@ -887,6 +973,7 @@ def JCGatherEnvironmentSpecs(storeCurrentValue, values, debugLevel, defaultParam
                 defaultParameters[myKey] = myValue
     return True
 
+@JCTrace.JCTraceFunction('compare', 'serviceName', 'item')
 def JCEvaluateCondition(serviceName, serviceAttributes, defaultParameters, debugLevel:int,
     interactiveMode, myColors, colorIndex, outputFileHandle, HTMLBRTag, OSType):
 
@@ -1198,6 +1285,7 @@ def JCDataMaskFile(fileName, datamaskSpec, debugLevel, interactiveMode, myColors
     
     return returnStatus, newFileName
 
+@JCTrace.JCTraceFunction('compare', 'itemName', 'item')
 def JCComparePatterns(
         itemName,
         comparePatterns:dict, fileName:str, textBuffer:str,
@@ -1366,6 +1454,10 @@ def JCSetSystemVariables( defaultParameters, thisHostName, variables):
         {{ JCOSVersion }}
         {{ JCComponent }}
 
+    JCMACAddress is MAC address of current host when thisHostName is current host,
+      empty string for other hosts since MAC address of remote host is not known on current host
+    Returns returnStatus False with ERROR message when IP address of the host can not be found in DNS
+
     """
     returnStatus = True
     errorMsg = ''
@@ -1375,10 +1467,14 @@ def JCSetSystemVariables( defaultParameters, thisHostName, variables):
     variables['JCOSVersion'] = defaultParameters['OSVersion']
     variables['JCComponent'] = defaultParameters['Component']
 
-    import uuid
-    import socket
-    variables['JCMACAddress'] = (':'.join(re.findall('..', '%012x' % uuid.getnode())))
-    variables['JCIPAddress'] = socket.gethostbyname(thisHostName)
+    ### MAC and IP address are probed once per host and cached
+    import JCHostFacts
+    facts = JCHostFacts.JCHostFactsGet(thisHostName, ['MACAddress', 'IPAddress'])
+    variables['JCMACAddress'] = facts['MACAddress']
+    variables['JCIPAddress'] = facts['IPAddress']
+    if facts['IPAddress'] == None:
+        returnStatus = False
+        errorMsg = "ERROR JCSetSystemVariables() Can not get IP address of host:{0}".format(thisHostName)
 
     """
     TBD Add code to handle multiple interface info 
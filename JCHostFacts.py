@@ -0,0 +1,235 @@
+"""
+This module provides facts of hosts used while rendering the environment spec and templates
+
+    OSType, OSName, OSVersion - detected by JCGlobalLib.JCGetOSInfo()
+    MACAddress - MAC address of current host
+    IPAddress - IP address of the host from DNS
+
+    JCHostFactsGet(hostName, factNames, debugLevel) - returns facts of the host, facts not known yet are probed once
+    JCHostFactsSet(hostName, facts) - injects facts of a host, use it while rendering configs of remote hosts centrally
+    JCHostFactsLoad(fileName, maxAgeSeconds) - reads facts saved before, stale probed facts are dropped
+    JCHostFactsSave(fileName) - saves facts known so far
+
+Facts are probed only when asked for, OS facts need reading OS release file, MACAddress needs uuid module and
+   IPAddress needs DNS lookup. Facts of a host that are not injected are probed on current host, IPAddress is
+   looked up for that host name, MACAddress is known for current host only.
+Facts are probed without holding the lock so that DNS lookups of hosts rendered in parallel do not wait for
+   each other, facts that could not be probed (IPAddress of host not in DNS) are not cached so that those are
+   probed again on next request.
+
+Facts file is in JSON form
+    { <hostName>: { <factName>: <value>, ..., "JCFactsSignature": { "probeTime": <seconds>, "releaseFiles": {...} } } }
+Facts probed on current host carry the signature, made of size and modified time of OS release files.
+While loading, facts of current host are dropped when release files changed (OS upgrade, file copied from
+   other host) or facts are older than maxAgeSeconds so that those are probed again.
+Facts probed for remote hosts carry the signature with probe time only, IPAddress and MACAddress of remote
+   host are dropped while loading when older than maxAgeSeconds.
+Facts without the signature are considered injected and are used as is.
+Facts of each host are kept in a JCHostRecord sharing one schema, so that facts of a large fleet do not keep
+   a dictionary and copies of same OS name, version per host.
+"""
+import os
+import sys
+import threading
+import time
+
+import JCGlobalLib
+import JCHostRecord
+import JCTimings
+
+### facts of OS, probed together
+JCOSFactNames = ['OSType', 'OSName', 'OSVersion']
+### facts probed for remote hosts
+JCRemoteFactNames = ['MACAddress', 'IPAddress']
+
+### hostName: JCHostRecord of { factName: value }
+hostFacts = {}
+factsSchema = JCHostRecord.JCHostSchema()
+### record of a host without facts
+emptyFacts = JCHostRecord.JCHostRecord(factsSchema, ())
+hostFactsLock = threading.Lock()
+
+### set to True when facts are probed or injected after load so that the facts file is saved
+hostFactsChanged = False
+
+signatureKey = 'JCFactsSignature'
+
+def JCHostFactsLocalHostName():
+    """
+    Returns short host name of current host
+    """
+    import platform
+    return platform.node().split('.')[0]
+
+def JCHostFactsIsLocalHost(hostName:str):
+    return hostName == None or hostName.lower() == JCHostFactsLocalHostName().lower()
+
+def JCHostFactsSignature():
+    """
+    Returns probe time and size, modified time of OS release files, None for files not present
+    """
+    releaseFiles = {}
+    for releaseFileName in JCGlobalLib.JCOSReleaseFileNames:
+        try:
+            fileStat = os.stat(releaseFileName)
+            releaseFiles[releaseFileName] = [fileStat.st_size, fileStat.st_mtime_ns]
+        except OSError:
+            releaseFiles[releaseFileName] = None
+    return { 'probeTime': int(time.time()), 'releaseFiles': releaseFiles }
+
+def JCHostFactsProbe(hostName:str, factName:str, debugLevel:int):
+    """
+    Probes given fact and related facts on current host
+    Returns dictionary of facts probed with the signature, fact that could not be probed has value None
+    """
+    facts = {}
+    if factName in JCOSFactNames:
+        facts['OSType'], facts['OSName'], facts['OSVersion'] = JCGlobalLib.JCGetOSInfo(sys.version_info, debugLevel)
+        facts[signatureKey] = JCHostFactsSignature()
+    elif factName == 'MACAddress':
+        if JCHostFactsIsLocalHost(hostName):
+            import uuid
+            macAddress = '%012x' % uuid.getnode()
+            facts['MACAddress'] = ':'.join(macAddress[index:index+2] for index in range(0, 12, 2))
+        else:
+            facts['MACAddress'] = ''
+    elif factName == 'IPAddress':
+        import socket
+        try:
+            with JCTimings.JCTimer('JCHostFactsIPAddress', 'call', hostName, 'dns'):
+                facts['IPAddress'] = socket.gethostbyname(hostName if hostName != None else JCHostFactsLocalHostName())
+        except OSError as err:
+            if debugLevel > 0:
+                print("DEBUG-1 JCHostFactsProbe() Can't get IP address of host:{0}, error:{1}".format(hostName, err))
+            facts['IPAddress'] = None
+    else:
+        facts[factName] = None
+        return facts
+    if factName not in JCOSFactNames:
+        if JCHostFactsIsLocalHost(hostName):
+            facts[signatureKey] = JCHostFactsSignature()
+        else:
+            facts[signatureKey] = { 'probeTime': int(time.time()) }
+    return facts
+
+def JCHostFactsPublish(hostName:str, probedFacts:dict):
+    """
+    Stores facts probed, facts with value None are not stored so that those are probed again
+    Facts stored by other thread while probing and signature of facts probed before are kept
+    """
+    global hostFactsChanged
+    probedFacts = dict( (factName, value) for factName, value in probedFacts.items() if value != None )
+    if len(probedFacts) == 0 or list(probedFacts) == [ signatureKey ]:
+        return
+    with hostFactsLock:
+        hostFacts[hostName] = JCHostRecord.JCHostRecordUpdate(
+            JCHostRecord.JCHostRecordMake(factsSchema, probedFacts), hostFacts.get(hostName, emptyFacts))
+        hostFactsChanged = True
+
+def JCHostFactsGet(hostName:str, factNames=None, debugLevel=0):
+    """
+    Returns dictionary of facts of given host, hostName None is current host
+    Facts in factNames that are not known yet are probed and cached in memory
+    factNames defaults to OSType, OSName, OSVersion
+    """
+    if hostName == None:
+        hostName = JCHostFactsLocalHostName()
+    if factNames == None:
+        factNames = JCOSFactNames
+
+    requestedFacts = {}
+    for factName in factNames:
+        factHostName = hostName
+        with hostFactsLock:
+            facts = hostFacts.get(hostName, emptyFacts)
+        if factName not in facts and factName in JCOSFactNames and JCHostFactsIsLocalHost(hostName) == False:
+            ### remote host without injected OS facts, use OS facts of current host
+            ###   these are not stored under remote host so that facts file has injected facts only
+            factHostName = JCHostFactsLocalHostName()
+            with hostFactsLock:
+                facts = hostFacts.get(factHostName, emptyFacts)
+        if factName not in facts:
+            ### probed without holding the lock, fact probed by two threads at same time is stored once
+            probedFacts = JCHostFactsProbe(factHostName, factName, debugLevel)
+            JCHostFactsPublish(factHostName, probedFacts)
+            requestedFacts[factName] = probedFacts.get(factName)
+            continue
+        requestedFacts[factName] = facts.get(factName)
+
+    return requestedFacts
+
+def JCHostFactsSet(hostName:str, facts:dict):
+    """
+    Injects facts of given host, these are used as is, without probing
+    """
+    global hostFactsChanged
+    with hostFactsLock:
+        hostFacts[hostName] = JCHostRecord.JCHostRecordUpdate(hostFacts.get(hostName, emptyFacts), facts)
+        hostFactsChanged = True
+
+def JCHostFactsLoad(fileName:str, maxAgeSeconds=86400):
+    """
+    Reads facts saved by JCHostFactsSave(), facts of current host with stale signature are not loaded
+
+    Returns
+        returnStatus - True on success or if file is not present, False on error
+        errorMsg - error message on failure
+    """
+    global hostFactsChanged
+    import json
+    if os.path.exists(fileName) == False:
+        return True, ''
+    try:
+        with open(fileName, "r") as factsFile:
+            savedFacts = json.load(factsFile)
+    except (OSError, ValueError) as err:
+        return False, "ERROR JCHostFactsLoad() Can not read facts file:{0}, error:{1}".format(fileName, err)
+    if isinstance(savedFacts, dict) == False:
+        return False, "ERROR JCHostFactsLoad() Facts file:{0} is not in the form {{ hostName: {{ factName: value }} }}".format(fileName)
+
+    currentSignature = None
+    with hostFactsLock:
+        for hostName, facts in savedFacts.items():
+            if isinstance(facts, dict) == False:
+                continue
+            signature = facts.get(signatureKey)
+            if signature != None and JCHostFactsIsLocalHost(hostName):
+                if currentSignature == None:
+                    currentSignature = JCHostFactsSignature()
+                if ( signature.get('releaseFiles') != currentSignature['releaseFiles'] or
+                     time.time() - signature.get('probeTime', 0) > maxAgeSeconds ):
+                    ### stale, probe again
+                    hostFactsChanged = True
+                    continue
+            elif signature != None and time.time() - signature.get('probeTime', 0) > maxAgeSeconds:
+                ### facts probed for remote host are stale, probe again, injected facts of the host are kept
+                facts = dict( (factName, value) for factName, value in facts.items()
+                    if factName not in JCRemoteFactNames and factName != signatureKey )
+                hostFactsChanged = True
+            ### facts already in memory, probed or injected in this run, take precedence
+            hostFacts[hostName] = JCHostRecord.JCHostRecordUpdate(
+                JCHostRecord.JCHostRecordMake(factsSchema, facts), hostFacts.get(hostName, emptyFacts))
+    return True, ''
+
+def JCHostFactsSave(fileName:str):
+    """
+    Saves facts known so far to given file in JSON form, writes to temp file first and renames it
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    global hostFactsChanged
+    import json
+    with hostFactsLock:
+        tempFileName = "{0}.{1}.tmp".format(fileName, os.getpid())
+        try:
+            with open(tempFileName, "w") as factsFile:
+                json.dump(dict((hostName, dict(facts)) for hostName, facts in hostFacts.items() if len(facts) > 0),
+                    factsFile, indent=2, sort_keys=True)
+                factsFile.write('\n')
+            os.replace(tempFileName, fileName)
+        except OSError as err:
+            return False, "ERROR JCHostFactsSave() Can not write facts file:{0}, OS error:{1}".format(fileName, err)
+        hostFactsChanged = False
+    return True, ''
@@ -0,0 +1,127 @@
+"""
+This module keeps parameters of a host in a compact, read-only record, used where parameters or facts of
+   many hosts are held together, like facts of all hosts of the fleet in JCHostFacts
+
+    JCHostSchema() - schema shared by records, names of parameters mapped to positions in the row
+    JCHostRecord - read-only mapping of parameter name to value, can be passed to jinja2 as template variables
+    JCHostRecordMake(schema, parameters) - returns record of parameters dictionary
+    JCHostRecordUpdate(record, parameters) - returns new record with values of parameters added or replaced
+    JCHostRecordIntern(schema, position, value) - returns shared copy of value
+
+A dictionary per host keeps a hash table with a reference to the key string of each parameter, a record keeps
+   a reference to the shared schema and a tuple of values, names are stored once in the schema.
+Values are interned per position of the schema, hosts having same OS name, same paths etc. refer to one
+   copy of the value. Positions having more than JCHostRecordInternLimit distinct values, like IP address,
+   are not interned any more, so that interning does not keep a table entry per host.
+Values that can not be hashed, like lists and dictionaries, are stored as they are.
+
+Schema only grows, row of a record made before a name was added is shorter than the schema, names past the
+   end of the row or with value JCHostRecordAbsent are not present in the record.
+"""
+from collections.abc import Mapping
+
+### max distinct values interned per position
+JCHostRecordInternLimit = 1024
+
+### value of a name not present in the record
+JCHostRecordAbsent = object()
+
+class JCHostSchema:
+    """
+    Names of parameters mapped to positions in the row, shared by all records made with this schema
+    """
+    __slots__ = ('names', 'positions', 'internedValues')
+
+    def __init__(self):
+        self.names = []
+        self.positions = {}
+        ### per position, { (type, value): value }, None when interning is stopped for that position
+        self.internedValues = []
+
+    def JCHostSchemaPosition(self, name):
+        """
+        Returns position of the name, name is added to the schema if not present
+        """
+        position = self.positions.get(name)
+        if position == None:
+            position = len(self.names)
+            self.names.append(name)
+            self.positions[name] = position
+            self.internedValues.append({})
+        return position
+
+class JCHostRecord(Mapping):
+    """
+    Read-only parameters of a host, values are stored in a tuple in the order of names in the schema
+    """
+    __slots__ = ('schema', 'row')
+
+    def __init__(self, schema:JCHostSchema, row:tuple):
+        self.schema = schema
+        self.row = row
+
+    def __getitem__(self, name):
+        position = self.schema.positions.get(name)
+        if position == None or position >= len(self.row) or self.row[position] is JCHostRecordAbsent:
+            raise KeyError(name)
+        return self.row[position]
+
+    def __contains__(self, name):
+        position = self.schema.positions.get(name)
+        return position != None and position < len(self.row) and self.row[position] is not JCHostRecordAbsent
+
+    def __iter__(self):
+        names = self.schema.names
+        for position in range(len(self.row)):
+            if self.row[position] is not JCHostRecordAbsent:
+                yield names[position]
+
+    def __len__(self):
+        return len(self.row) - self.row.count(JCHostRecordAbsent)
+
+    def __repr__(self):
+        return "JCHostRecord({0})".format(dict(self))
+
+def JCHostRecordIntern(schema:JCHostSchema, position:int, value):
+    """
+    Returns copy of value already stored at this position of the schema, value itself when it is first
+       of its kind, can not be hashed or interning is stopped for the position
+    """
+    internedValues = schema.internedValues[position]
+    if internedValues == None:
+        return value
+    ### type is part of key so that 1, 1.0 and True are kept apart
+    try:
+        internKey = (type(value), value)
+        internedValue = internedValues.get(internKey)
+    except TypeError:
+        return value
+    if internedValue != None or internKey in internedValues:
+        return internedValue
+    if len(internedValues) >= JCHostRecordInternLimit:
+        ### values of this position are mostly distinct, stop interning and release the table
+        schema.internedValues[position] = None
+        return value
+    internedValues[internKey] = value
+    return value
+
+def JCHostRecordMake(schema:JCHostSchema, parameters):
+    """
+    Returns record of given parameters dictionary, names not in schema are added to it
+    """
+    return JCHostRecordUpdate(JCHostRecord(schema, ()), parameters)
+
+def JCHostRecordUpdate(record:JCHostRecord, parameters):
+    """
+    Returns new record having values of record and of parameters, value in parameters takes precedence
+    """
+    schema = record.schema
+    positions = [ (schema.JCHostSchemaPosition(name), value) for name, value in parameters.items() ]
+    row = list(record.row)
+    if len(positions) > 0:
+        maxPosition = max(position for position, value in positions)
+        if maxPosition >= len(row):
+            row.extend([JCHostRecordAbsent] * (maxPosition + 1 - len(row)))
+    for position, value in positions:
+        row[position] = JCHostRecordIntern(schema, position, value)
+    return JCHostRecord(schema, tuple(row))
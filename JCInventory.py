@@ -0,0 +1,254 @@
+"""
+This module reads host inventory file, one host per row, and passes the hosts to the render loop one by one
+   so that memory used does not grow with number of hosts in the inventory
+
+    JCInventoryRecords(fileName, yamlModulePresent, inventoryFormat) - generator, yields host records read from the file
+    JCInventoryStream(fileName, yamlModulePresent, queueSize, inventoryFormat) - generator, reads host records on
+        background thread
+    JCInventoryHostRecords(hostNames) - generator, yields host records of host names passed
+
+Inventory file formats, detected by file name extension
+    .csv - first line has column names
+        hostName,siteNamePrefix,OSType,OSName,OSVersion,<paramName1>,...
+        dfwdws101,5,Linux,rhel,8,value1
+    .jsonl, .ndjson - JSON Lines, one JSON object per line
+        {"hostName": "dfwdws101", "siteNamePrefix": 5, "facts": {"OSType": "Linux"}, "overrides": {"WSDebugLevel": "DEBUG"}}
+    .yml, .yaml - list of hosts, each list item or document separated by --- is read and parsed separately
+        - hostName: dfwdws101
+          OSType: Linux
+          overrides:
+            WSDebugLevel: DEBUG
+    .txt, .list or host list file passed via --hosts - host names, one per line or in CSV form, lines starting with # skipped
+        dfwdws101
+        dfwdws102,dfwdws103
+
+Row fields
+    hostName - mandatory
+    siteNamePrefix - optional, length of site name in host name, overrides -s for the host
+    OSType, OSName, OSVersion - optional OS facts of the host, at top level or under facts,
+        facts not given are detected on current host
+    overrides - optional parameters of the host, overriding values read from environment spec,
+        other columns or keys are overrides too
+
+Host record is a dictionary
+    lineNumber, hostName, siteNamePrefix (None if not given), facts, overrides
+
+Rows are read lazily, one row is parsed at a time. JCInventoryStream() reads rows on a background thread into
+   a queue of queueSize records, reader waits when the queue is full till render loop takes records from it.
+Row that can not be parsed is yielded with errorMsg so that it is reported and the run continues with next row.
+"""
+import threading
+
+JCInventoryFactNames = ['OSType', 'OSName', 'OSVersion']
+
+### max records read ahead of the render loop
+JCInventoryQueueSize = 1000
+
+### marks end of records in queue
+inventoryEndMarker = object()
+
+def JCInventoryFormat(fileName:str):
+    """
+    Returns inventory format based on file name extension - csv, jsonl, yaml or list, None if not supported
+    """
+    fileType = fileName.rsplit('.', 1)[-1].lower()
+    if fileType in ('txt', 'list'):
+        return 'list'
+    if fileType == 'csv':
+        return 'csv'
+    if fileType in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if fileType in ('yml', 'yaml'):
+        return 'yaml'
+    return None
+
+def JCInventoryReadCSV(inventoryFile):
+    """
+    Yields lineNumber, row dictionary, errorMsg of each row of CSV file
+    """
+    import csv
+    csvReader = csv.DictReader(inventoryFile)
+    for row in csvReader:
+        if None in row:
+            yield csvReader.line_num, None, "more values than column names"
+            continue
+        ### empty value is same as value not given
+        yield csvReader.line_num, dict((key.strip(), value) for key, value in row.items()
+            if key != None and value != None and value != ''), ''
+
+def JCInventoryReadJSONL(inventoryFile):
+    """
+    Yields lineNumber, row dictionary, errorMsg of each line of JSON Lines file, empty lines and lines starting with # are skipped
+    """
+    import json
+    for lineNumber, line in enumerate(inventoryFile, 1):
+        line = line.strip()
+        if line == '' or line.startswith('#'):
+            continue
+        try:
+            yield lineNumber, json.loads(line), ''
+        except ValueError as err:
+            yield lineNumber, None, "invalid JSON, error:{0}".format(err)
+
+def JCInventoryReadHostList(inventoryFile):
+    """
+    Yields lineNumber, row dictionary, errorMsg of each host name in host list file
+    """
+    for lineNumber, line in enumerate(inventoryFile, 1):
+        line = line.strip()
+        if line == '' or line.startswith('#'):
+            continue
+        for hostName in line.split(','):
+            if hostName.strip() != '':
+                yield lineNumber, { 'hostName': hostName.strip() }, ''
+
+def JCInventoryYAMLItems(inventoryFile):
+    """
+    Yields lineNumber, lines of each top level list item or document of YAML file
+    """
+    itemLineNumber = 0
+    itemLines = []
+    for lineNumber, line in enumerate(inventoryFile, 1):
+        if line.startswith('---') or line.startswith('...'):
+            if len(itemLines) > 0:
+                yield itemLineNumber, itemLines
+            itemLines = []
+            continue
+        if line.startswith('- ') or line.rstrip() == '-':
+            if len(itemLines) > 0:
+                yield itemLineNumber, itemLines
+            itemLines = []
+        if len(itemLines) == 0:
+            if line.strip() == '' or line.lstrip().startswith('#'):
+                continue
+            itemLineNumber = lineNumber
+        itemLines.append(line)
+    if len(itemLines) > 0:
+        yield itemLineNumber, itemLines
+
+def JCInventoryReadYAML(inventoryFile):
+    """
+    Yields lineNumber, row dictionary, errorMsg of each top level list item or document of YAML file
+    """
+    import yaml
+    for lineNumber, itemLines in JCInventoryYAMLItems(inventoryFile):
+        try:
+            row = yaml.safe_load(''.join(itemLines))
+        except yaml.YAMLError as err:
+            yield lineNumber, None, "invalid YAML, error:{0}".format(err)
+            continue
+        if isinstance(row, list):
+            ### list item read as list of one item
+            for tempRow in row:
+                yield lineNumber, tempRow, ''
+        elif row != None:
+            yield lineNumber, row, ''
+
+def JCInventoryMakeRecord(lineNumber:int, row):
+    """
+    Returns
+        hostRecord - host record made from the row, None on error
+        errorMsg - error in the row
+    """
+    if isinstance(row, dict) == False:
+        return None, "row is not in the form { hostName: <hostName>, ... }"
+    hostName = row.get('hostName')
+    if isinstance(hostName, str) == False or hostName.strip() == '':
+        return None, "hostName is not given"
+    siteNamePrefix = row.get('siteNamePrefix')
+    if siteNamePrefix != None:
+        try:
+            siteNamePrefix = int(siteNamePrefix)
+        except (TypeError, ValueError):
+            return None, "siteNamePrefix:{0} is not an integer".format(siteNamePrefix)
+
+    facts = {}
+    if 'facts' in row:
+        if isinstance(row['facts'], dict) == False:
+            return None, "facts is not in the form { factName: value }"
+        facts.update(row['facts'])
+    overrides = {}
+    if 'overrides' in row:
+        if isinstance(row['overrides'], dict) == False:
+            return None, "overrides is not in the form { paramName: value }"
+        overrides.update(row['overrides'])
+    for key, value in row.items():
+        if key in JCInventoryFactNames:
+            facts[key] = value
+        elif key not in ('hostName', 'siteNamePrefix', 'facts', 'overrides'):
+            overrides[key] = value
+
+    return { 'lineNumber': lineNumber, 'hostName': hostName.strip().split('.')[0], 'siteNamePrefix': siteNamePrefix,
+        'facts': facts, 'overrides': overrides }, ''
+
+def JCInventoryRecords(fileName:str, yamlModulePresent=True, inventoryFormat=None):
+    """
+    Generator, yields lineNumber, hostRecord, errorMsg of each row of inventory file
+        hostRecord - None when row has error, errorMsg - error message, empty string if no error
+        inventoryFormat - csv, jsonl, yaml or list, defaults to format based on file name extension
+    """
+    if inventoryFormat == None:
+        inventoryFormat = JCInventoryFormat(fileName)
+    if inventoryFormat == None:
+        yield 0, None, "ERROR JCInventoryRecords() inventory file:{0} type is not one of csv, jsonl, ndjson, yml, yaml, txt, list".format(fileName)
+        return
+    if inventoryFormat == 'yaml' and yamlModulePresent == False:
+        yield 0, None, "ERROR JCInventoryRecords() yaml module is not available to read inventory file:{0}".format(fileName)
+        return
+    try:
+        with open(fileName, "r", newline='' if inventoryFormat == 'csv' else None) as inventoryFile:
+            if inventoryFormat == 'csv':
+                rows = JCInventoryReadCSV(inventoryFile)
+            elif inventoryFormat == 'jsonl':
+                rows = JCInventoryReadJSONL(inventoryFile)
+            elif inventoryFormat == 'list':
+                rows = JCInventoryReadHostList(inventoryFile)
+            else:
+                rows = JCInventoryReadYAML(inventoryFile)
+            for lineNumber, row, errorMsg in rows:
+                if errorMsg == '':
+                    hostRecord, errorMsg = JCInventoryMakeRecord(lineNumber, row)
+                else:
+                    hostRecord = None
+                if hostRecord == None:
+                    errorMsg = "ERROR JCInventoryRecords() inventory file:{0}, line:{1}, {2}, skipped the row".format(
+                        fileName, lineNumber, errorMsg)
+                yield lineNumber, hostRecord, errorMsg
+    except (OSError, UnicodeDecodeError) as err:
+        yield 0, None, "ERROR JCInventoryRecords() Can not read inventory file:{0}, error:{1}".format(fileName, err)
+
+def JCInventoryReader(fileName:str, yamlModulePresent:bool, recordQueue, inventoryFormat=None):
+    """
+    Thread target, puts records read from inventory file in recordQueue, waits when queue is full
+    """
+    try:
+        for record in JCInventoryRecords(fileName, yamlModulePresent, inventoryFormat):
+            recordQueue.put(record)
+    except Exception as err:
+        recordQueue.put((0, None, "ERROR JCInventoryReader() error reading inventory file:{0}, error:{1}".format(fileName, err)))
+    recordQueue.put(inventoryEndMarker)
+
+def JCInventoryStream(fileName:str, yamlModulePresent=True, queueSize=JCInventoryQueueSize, inventoryFormat=None):
+    """
+    Generator, yields lineNumber, hostRecord, errorMsg same as JCInventoryRecords(),
+       file is read and parsed on background thread, at most queueSize records are read ahead
+    """
+    import queue
+    recordQueue = queue.Queue(maxsize=queueSize)
+    ### daemon thread so that exit is not delayed when render loop stops before end of inventory
+    readerThread = threading.Thread(target=JCInventoryReader, args=(fileName, yamlModulePresent, recordQueue, inventoryFormat),
+        name='JCInventoryReader', daemon=True)
+    readerThread.start()
+    while True:
+        record = recordQueue.get()
+        if record is inventoryEndMarker:
+            break
+        yield record
+    readerThread.join()
+
+def JCInventoryHostRecords(hostNames):
+    """
+    Generator, yields lineNumber, hostRecord, errorMsg for host names passed, in the same form as JCInventoryRecords()
+    """
+    for hostName in hostNames:
+        yield 0, { 'lineNumber': 0, 'hostName': hostName, 'siteNamePrefix': None, 'facts': {}, 'overrides': {} }, ''
@@ -0,0 +1,202 @@
+"""
+This module keeps a journal of config files generated by a multi-host run so that a run stopped before
+   completion (Ctrl-C, kill, out of memory, reboot) can be resumed, skipping the hosts already completed
+
+    JCJournalRunKey(command, paths) - returns key of the run, based on command and input files
+    JCJournalOpen(fileName, runKey, command, append) - opens the journal, returns journal dictionary
+    JCJournalAdd(journal, hostName, templateFileName, configFileName, outputHash) - adds entry of a config file
+    JCJournalHostDone(journal) - flushes entries of the host, syncs to disk every JCJournalSyncInterval seconds
+    JCJournalClose(journal) - flushes, syncs and closes the journal
+    JCJournalRead(fileName, runKey) - returns config files completed by earlier runs with same run key
+    JCJournalHostCompleted(completed, hostName, templateFileNames) - returns config file names of the host if all
+        are completed and are not changed after that
+    JCJournalFileHash(fileName) - returns SHA-256 of the file
+
+Journal is in JSON Lines form, lines are only appended
+    {"journal": "header", "runKey": ..., "command": ..., "startTime": ...}
+    {"hostName": ..., "templateFileName": ..., "configFileName": ..., "sha256": ...}
+
+Each run adds a header line, a resumed run appends to the journal of the run it resumes, a new run starts a new journal.
+Entries are flushed after all config files of a host are written and synced to disk at most every
+   JCJournalSyncInterval seconds and on close, entries lost on reboot are rendered again by the resumed run.
+   Last line written partially when the run stopped is skipped while reading.
+A host is skipped only when all its config files are in the journal, templates of a host share values set by
+   JCSetVariable(), rendering some templates of a host alone may not give same output.
+Entries are used only when the run key matches, run key is SHA-256 of the command and of size and modified time
+   of inventory file and files under template paths, so that a change in those renders all hosts again.
+"""
+import os
+import time
+
+### max seconds between journal syncs to disk
+JCJournalSyncInterval = 5
+
+def JCJournalFileHash(fileName:str):
+    """
+    Returns SHA-256 of the file contents in hex form, None if file can not be read
+    """
+    import hashlib
+    fileHash = hashlib.sha256()
+    try:
+        with open(fileName, "rb") as inputFile:
+            while True:
+                fileBlock = inputFile.read(1024 * 1024)
+                if not fileBlock:
+                    break
+                fileHash.update(fileBlock)
+    except OSError:
+        return None
+    return fileHash.hexdigest()
+
+def JCJournalRunKey(command:str, paths):
+    """
+    Returns SHA-256 of command, size and modified time of given files and of files under given directories
+    """
+    import hashlib
+    import json
+    fileNames = []
+    for path in paths:
+        if os.path.isdir(path):
+            try:
+                with os.scandir(path) as entries:
+                    fileNames.extend(entry.path for entry in entries if entry.is_file())
+            except OSError:
+                pass
+        else:
+            fileNames.append(path)
+    fileStats = []
+    for fileName in sorted(set(fileNames)):
+        try:
+            fileStat = os.stat(fileName)
+            fileStats.append([ fileName, fileStat.st_size, fileStat.st_mtime_ns ])
+        except OSError:
+            fileStats.append([ fileName, None, None ])
+    return hashlib.sha256(json.dumps([ command, fileStats ]).encode('utf-8')).hexdigest()
+
+def JCJournalOpen(fileName:str, runKey:str, command:str, append=False):
+    """
+    Opens the journal and writes header line of this run
+        append - True to add to the journal of the run being resumed, False to start a new journal
+
+    Returns
+        journal - dictionary to be passed to other journal functions, None on error
+        errorMsg - error message on failure
+    """
+    import json
+    try:
+        journalFile = open(fileName, "a" if append == True else "w")
+        if journalFile.tell() > 0:
+            ### last line of the run stopped may be partial, start header on a new line
+            with open(fileName, "rb") as tempFile:
+                tempFile.seek(-1, os.SEEK_END)
+                if tempFile.read(1) != b'\n':
+                    journalFile.write('\n')
+        journalFile.write(json.dumps({ 'journal': 'header', 'runKey': runKey, 'command': command,
+            'startTime': time.strftime('%Y-%m-%dT%H:%M:%S') }) + '\n')
+        journalFile.flush()
+    except OSError as err:
+        return None, "ERROR JCJournalOpen() Can not write journal file:{0}, OS error:{1}".format(fileName, err)
+    return { 'file': journalFile, 'fileName': fileName, 'syncTime': time.monotonic() }, ''
+
+def JCJournalAdd(journal:dict, hostName:str, templateFileName:str, configFileName:str, outputHash:str):
+    """
+    Adds entry of a config file written, entry is flushed by JCJournalHostDone()
+    """
+    import json
+    if journal == None or outputHash == None:
+        return
+    journal['file'].write(json.dumps({ 'hostName': hostName, 'templateFileName': templateFileName,
+        'configFileName': configFileName, 'sha256': outputHash }) + '\n')
+
+def JCJournalSync(journal:dict):
+    """
+    Flushes journal entries and syncs those to disk
+    """
+    journal['file'].flush()
+    os.fsync(journal['file'].fileno())
+    journal['syncTime'] = time.monotonic()
+
+def JCJournalHostDone(journal:dict):
+    """
+    Flushes entries of the host completed, syncs to disk if JCJournalSyncInterval passed since last sync
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    if journal == None:
+        return True, ''
+    try:
+        if time.monotonic() - journal['syncTime'] >= JCJournalSyncInterval:
+            JCJournalSync(journal)
+        else:
+            journal['file'].flush()
+    except OSError as err:
+        return False, "ERROR JCJournalHostDone() Can not write journal file:{0}, OS error:{1}".format(journal['fileName'], err)
+    return True, ''
+
+def JCJournalClose(journal:dict):
+    """
+    Flushes, syncs and closes the journal, called at the end of the run and on exit
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    if journal == None or journal['file'].closed:
+        return True, ''
+    try:
+        JCJournalSync(journal)
+        journal['file'].close()
+    except OSError as err:
+        return False, "ERROR JCJournalClose() Can not write journal file:{0}, OS error:{1}".format(journal['fileName'], err)
+    return True, ''
+
+def JCJournalRead(fileName:str, runKey:str):
+    """
+    Reads entries of earlier runs having same run key
+
+    Returns
+        completed - { hostName: { templateFileName: (configFileName, sha256) } }
+        entryCount - number of config files completed, config file written again by a resumed run is counted once
+        errorMsg - error message if journal can not be read, runs with other run key are not an error
+    """
+    import json
+    completed = {}
+    try:
+        with open(fileName, "r") as journalFile:
+            runKeyMatched = False
+            for line in journalFile:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    ### partial line written when the run stopped
+                    continue
+                if entry.get('journal') == 'header':
+                    runKeyMatched = (entry.get('runKey') == runKey)
+                    continue
+                if runKeyMatched == False:
+                    continue
+                completed.setdefault(entry['hostName'], {})[entry['templateFileName']] = (
+                    entry['configFileName'], entry['sha256'])
+    except OSError as err:
+        return completed, 0, "ERROR JCJournalRead() Can not read journal file:{0}, OS error:{1}".format(fileName, err)
+    return completed, sum(len(hostEntries) for hostEntries in completed.values()), ''
+
+def JCJournalHostCompleted(completed:dict, hostName:str, templateFileNames):
+    """
+    Returns list of config file names of the host if all templates of the host are in the journal and
+       config files still have the contents written, returns None otherwise
+    """
+    hostEntries = completed.get(hostName)
+    if hostEntries == None:
+        return None
+    configFileNames = []
+    for templateFileName in templateFileNames:
+        if templateFileName not in hostEntries:
+            return None
+        configFileName, outputHash = hostEntries[templateFileName]
+        if JCJournalFileHash(configFileName) != outputHash:
+            return None
+        configFileNames.append(configFileName)
+    return configFileNames
@@ -0,0 +1,193 @@
+"""
+This module purges old log files of JCConfigGen without running external commands
+
+    JCLogRetentionScan(logFilePath, fileNamePrefix, excludeFileNames) - returns log files with modified time and size
+    JCLogRetentionPlan(logFiles, currentTime, retentionDays, maxTotalBytes, compressAfterDays) - returns files to delete and compress
+    JCLogRetentionApply(filesToDelete, filesToCompress, debugLevel) - deletes and compresses the files
+    JCLogRetention(...) - scan, plan and apply in one call, returns stats
+    JCLogRetentionStart(...) - runs JCLogRetention() on a background thread
+    JCLogRetentionWait(retentionThread) - waits for background thread to complete, returns stats
+    JCLogRetentionStats(errors) - returns stats with zero counts, used when log files could not be purged
+
+Log files are listed in a single pass by JCGlobalLib.JCFindModifiedFiles() using os.scandir(), modified time and size
+   are taken from DirEntry.stat() which does not need another system call on Windows and reuses the cached stat on other OS.
+
+Limits applied in this order
+    files older than retentionDays are deleted
+    files older than compressAfterDays are compressed to <fileName>.gz, 0 to disable compression
+    when total size of remaining files is more than maxTotalBytes, oldest files are deleted till total size is within
+       the limit, 0 for no size limit
+"""
+import os
+import threading
+import time
+
+import JCGlobalLib
+import JCTimings
+
+def JCLogRetentionStats(errors=None):
+    """
+    Returns stats dictionary with zero counts and given error messages
+    """
+    return { 'scannedFiles': 0, 'deletedFiles': 0, 'compressedFiles': 0, 'bytesFreed': 0, 'debugMessages': [],
+        'errors': errors if errors != None else [] }
+
+def JCLogRetentionScan(logFilePath:str, fileNamePrefix:str, excludeFileNames=None):
+    """
+    Returns list of [ fileName, modifiedTime, size ] of files in logFilePath with name starting with fileNamePrefix
+       sorted by modified time, oldest first
+    Files with name in excludeFileNames are not returned, use it to skip log file currently open
+    """
+    if excludeFileNames == None:
+        excludeFileNames = []
+    ### JCFindModifiedFiles() prints error of directory not readable and returns no files,
+    ###   raise OSError of log path not present here so that caller reports it
+    os.stat(logFilePath)
+    ### -1, files modified since start of epoch, that is, all files
+    logFiles = JCGlobalLib.JCFindModifiedFiles(
+        os.path.join(logFilePath, fileNamePrefix + '*'), -1, 0, '', returnDetails=True)
+    return [ list(logFile) for logFile in logFiles if os.path.basename(logFile[0]) not in excludeFileNames ]
+
+def JCLogRetentionPlan(logFiles, currentTime:float, retentionDays:float, maxTotalBytes=0, compressAfterDays=0):
+    """
+    logFiles - list returned by JCLogRetentionScan(), oldest first
+
+    Returns
+        filesToDelete - list of [ fileName, modifiedTime, size ]
+        filesToCompress - list of [ fileName, modifiedTime, size ]
+    """
+    filesToDelete = []
+    filesToCompress = []
+    keptFiles = []
+    deleteBeforeTime = currentTime - retentionDays * 86400
+    compressBeforeTime = currentTime - compressAfterDays * 86400
+    for logFile in logFiles:
+        if logFile[1] < deleteBeforeTime:
+            filesToDelete.append(logFile)
+        else:
+            if compressAfterDays > 0 and logFile[1] < compressBeforeTime and logFile[0].endswith('.gz') == False:
+                filesToCompress.append(logFile)
+            keptFiles.append(logFile)
+
+    if maxTotalBytes > 0:
+        totalBytes = sum(logFile[2] for logFile in keptFiles)
+        ### oldest first
+        for logFile in keptFiles:
+            if totalBytes <= maxTotalBytes:
+                break
+            filesToDelete.append(logFile)
+            totalBytes -= logFile[2]
+            if logFile in filesToCompress:
+                filesToCompress.remove(logFile)
+
+    return filesToDelete, filesToCompress
+
+def JCLogRetentionCompressFile(fileName:str, modifiedTime:float):
+    """
+    Compresses fileName to fileName.gz keeping modified time, removes fileName
+    Returns size of compressed file
+    """
+    import gzip
+    import shutil
+    compressedFileName = fileName + '.gz'
+    tempFileName = compressedFileName + '.tmp'
+    try:
+        with open(fileName, 'rb') as sourceFile:
+            with gzip.open(tempFileName, 'wb') as compressedFile:
+                shutil.copyfileobj(sourceFile, compressedFile, 1024 * 1024)
+    except OSError:
+        ### partial compressed file is not left behind
+        if os.path.exists(tempFileName):
+            os.remove(tempFileName)
+        raise
+    ### keep modified time so that age based deletion applies to the compressed file
+    os.utime(tempFileName, (modifiedTime, modifiedTime))
+    os.replace(tempFileName, compressedFileName)
+    os.remove(fileName)
+    return os.path.getsize(compressedFileName)
+
+def JCLogRetentionApply(filesToDelete, filesToCompress, debugLevel=0):
+    """
+    Deletes and compresses the files
+
+    Returns stats dictionary
+        deletedFiles, compressedFiles, bytesFreed - counts
+        errors - list of error messages
+        debugMessages - list of DEBUG messages when debugLevel > 3
+    """
+    stats = JCLogRetentionStats()
+    for fileName, modifiedTime, size in filesToDelete:
+        try:
+            os.remove(fileName)
+            stats['deletedFiles'] += 1
+            stats['bytesFreed'] += size
+            if debugLevel > 3:
+                stats['debugMessages'].append("DEBUG-4 JCLogRetentionApply() Deleted the file:{0}".format(fileName))
+        except OSError as err:
+            stats['errors'].append("ERROR JCLogRetentionApply() Error deleting old log file:{0}, errorMsg:{1}".format(fileName, err))
+
+    for fileName, modifiedTime, size in filesToCompress:
+        try:
+            compressedSize = JCLogRetentionCompressFile(fileName, modifiedTime)
+            stats['compressedFiles'] += 1
+            stats['bytesFreed'] += max(0, size - compressedSize)
+            if debugLevel > 3:
+                stats['debugMessages'].append("DEBUG-4 JCLogRetentionApply() Compressed the file:{0}".format(fileName))
+        except OSError as err:
+            stats['errors'].append("ERROR JCLogRetentionApply() Error compressing log file:{0}, errorMsg:{1}".format(fileName, err))
+    return stats
+
+def JCLogRetention(logFilePath:str, fileNamePrefix:str, retentionDays:float, maxTotalBytes=0, compressAfterDays=0,
+        excludeFileNames=None, debugLevel=0, currentTime=None):
+    """
+    Scans logFilePath, deletes and compresses log files as per the limits
+    Returns stats dictionary returned by JCLogRetentionApply() with scannedFiles count
+    """
+    with JCTimings.JCTimer('JCLogRetention', 'call'):
+        if currentTime == None:
+            currentTime = time.time()
+        try:
+            logFiles = JCLogRetentionScan(logFilePath, fileNamePrefix, excludeFileNames)
+        except OSError as err:
+            return JCLogRetentionStats(
+                ["ERROR JCLogRetention() Not able to list files in:{0}, error:{1}".format(logFilePath, err)])
+        filesToDelete, filesToCompress = JCLogRetentionPlan(
+            logFiles, currentTime, retentionDays, maxTotalBytes, compressAfterDays)
+        stats = JCLogRetentionApply(filesToDelete, filesToCompress, debugLevel)
+        stats['scannedFiles'] = len(logFiles)
+    return stats
+
+def JCLogRetentionRun(*args):
+    """
+    Thread target, saves stats returned by JCLogRetention() in the thread object,
+       unexpected error is saved as error message in stats so that the run completes
+    """
+    try:
+        stats = JCLogRetention(*args)
+    except Exception as err:
+        stats = JCLogRetentionStats(["ERROR JCLogRetention() Error purging log files in:{0}, error:{1}".format(args[0], err)])
+    threading.current_thread().stats = stats
+
+def JCLogRetentionStart(logFilePath:str, fileNamePrefix:str, retentionDays:float, maxTotalBytes=0, compressAfterDays=0,
+        excludeFileNames=None, debugLevel=0):
+    """
+    Runs JCLogRetention() on a background thread so that rendering is not delayed
+    Returns thread object to be passed to JCLogRetentionWait()
+    """
+    retentionThread = threading.Thread(
+        target=JCLogRetentionRun,
+        args=(logFilePath, fileNamePrefix, retentionDays, maxTotalBytes, compressAfterDays, excludeFileNames, debugLevel),
+        name='JCLogRetention')
+    retentionThread.stats = None
+    retentionThread.start()
+    return retentionThread
+
+def JCLogRetentionWait(retentionThread, timeout=None):
+    """
+    Waits for log retention thread started by JCLogRetentionStart() to complete
+    Returns stats dictionary, stats with warning message if thread did not complete within timeout
+    """
+    retentionThread.join(timeout)
+    if retentionThread.is_alive():
+        return JCLogRetentionStats(["WARN JCLogRetentionWait() Log files are still being purged, not waiting for it"])
+    return retentionThread.stats
@@ -0,0 +1,151 @@
+"""
+This module writes metrics of a JCConfigGen run in Prometheus text format, to be read by node exporter
+   textfile collector, so that duration, failures and render times of scheduled runs can be monitored
+
+    JCMetricsFormat(report, histograms, runCounters, labels) - returns metrics in Prometheus text format
+    JCMetricsWrite(fileName, report, histograms, runCounters, labels) - writes metrics file atomically
+
+Metrics are made from the run report and histograms of JCTimings and from counters of the run
+    jcconfiggen_config_files_total{result="rendered|skipped|failed"} - counter, config files of the run
+    jcconfiggen_hosts_total - counter, hosts of the run
+    jcconfiggen_run_duration_seconds, jcconfiggen_run_cpu_seconds - gauge, wall and CPU time of the run
+    jcconfiggen_last_run_timestamp_seconds, jcconfiggen_last_run_success - gauge, end time and status of the run
+    jcconfiggen_template_duration_seconds{template=} - histogram, render time of each template
+    jcconfiggen_phase_duration_seconds{phase=} - histogram, time of each phase
+    jcconfiggen_output_bytes_total{template=} - counter, bytes of config files written
+    jcconfiggen_dns_lookups_total, jcconfiggen_commands_total - counter, DNS lookups and commands run by templates,
+        DNS lookups of JCHostNamesToIPAddresses() and JCHostNameToIPSegment(), made by JCHostNameToIPAddress() for
+        each host name, and IP address lookups of host facts are counted
+    jcconfiggen_cache_hit_ratio{cache=} - gauge, hits / lookups of each cache
+All metrics have labels passed, like component and environment of the host when the run is for one host.
+
+File is written to a temp file in the same directory and renamed, collector never reads a partial file.
+"""
+import os
+import time
+
+### metric name prefix
+JCMetricsPrefix = 'jcconfiggen_'
+
+### timings entries of category 'call' timing one DNS lookup each
+JCMetricsDNSCallNames = ['JCHostNameToIPAddress', 'JCHostFactsIPAddress']
+
+def JCMetricsEscape(value):
+    """
+    Returns label value escaped as per Prometheus text format
+    """
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def JCMetricsLabels(labels:dict, extraLabels=None):
+    """
+    Returns labels in the form {name="value",...}, empty string if there are no labels
+    """
+    allLabels = dict(labels)
+    if extraLabels != None:
+        allLabels.update(extraLabels)
+    if len(allLabels) == 0:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(name, JCMetricsEscape(value))
+        for name, value in sorted(allLabels.items())) + '}'
+
+def JCMetricsHeader(lines:list, metricName:str, metricType:str, helpText:str):
+    """
+    Adds HELP and TYPE lines of the metric
+    """
+    lines.append("# HELP {0}{1} {2}".format(JCMetricsPrefix, metricName, helpText))
+    lines.append("# TYPE {0}{1} {2}".format(JCMetricsPrefix, metricName, metricType))
+
+def JCMetricsHistogram(lines:list, metricName:str, labelName:str, entries:dict, histograms:dict, labels:dict):
+    """
+    Adds histogram lines of each entry, buckets are cumulative as per Prometheus text format
+    """
+    import JCTimings
+    for name in sorted(entries):
+        buckets = histograms.get(name)
+        if buckets == None:
+            continue
+        cumulativeCount = 0
+        for index in range(len(JCTimings.JCTimingsBuckets)):
+            cumulativeCount += buckets[index]
+            lines.append("{0}{1}_bucket{2} {3}".format(JCMetricsPrefix, metricName,
+                JCMetricsLabels(labels, { labelName: name, 'le': JCTimings.JCTimingsBuckets[index] }), cumulativeCount))
+        lines.append("{0}{1}_bucket{2} {3}".format(JCMetricsPrefix, metricName,
+            JCMetricsLabels(labels, { labelName: name, 'le': '+Inf' }), entries[name]['count']))
+        lines.append("{0}{1}_sum{2} {3}".format(JCMetricsPrefix, metricName,
+            JCMetricsLabels(labels, { labelName: name }), round(entries[name]['wallTime'], 6)))
+        lines.append("{0}{1}_count{2} {3}".format(JCMetricsPrefix, metricName,
+            JCMetricsLabels(labels, { labelName: name }), entries[name]['count']))
+
+def JCMetricsFormat(report:dict, histograms:dict, runCounters:dict, labels:dict):
+    """
+    Returns metrics in Prometheus text format
+        report - run report made by JCTimings.JCTimingsReport()
+        histograms - wall time buckets returned by JCTimings.JCTimingsHistograms()
+        runCounters - rendered, skipped, failed, hosts, success
+        labels - labels added to all metrics, like component, environment
+    """
+    lines = []
+    JCMetricsHeader(lines, 'config_files_total', 'counter', 'Config files of the run by result')
+    for result in ('rendered', 'skipped', 'failed'):
+        lines.append("{0}config_files_total{1} {2}".format(JCMetricsPrefix,
+            JCMetricsLabels(labels, { 'result': result }), runCounters.get(result, 0)))
+    JCMetricsHeader(lines, 'hosts_total', 'counter', 'Hosts of the run')
+    lines.append("{0}hosts_total{1} {2}".format(JCMetricsPrefix, JCMetricsLabels(labels), runCounters.get('hosts', 0)))
+
+    JCMetricsHeader(lines, 'run_duration_seconds', 'gauge', 'Wall time of the run')
+    lines.append("{0}run_duration_seconds{1} {2}".format(JCMetricsPrefix, JCMetricsLabels(labels), report['wallTime']))
+    JCMetricsHeader(lines, 'run_cpu_seconds', 'gauge', 'CPU time of the run')
+    lines.append("{0}run_cpu_seconds{1} {2}".format(JCMetricsPrefix, JCMetricsLabels(labels), report['cpuTime']))
+    JCMetricsHeader(lines, 'last_run_timestamp_seconds', 'gauge', 'End time of the run')
+    lines.append("{0}last_run_timestamp_seconds{1} {2}".format(JCMetricsPrefix, JCMetricsLabels(labels), int(time.time())))
+    JCMetricsHeader(lines, 'last_run_success', 'gauge', '1 if the run completed without error, else 0')
+    lines.append("{0}last_run_success{1} {2}".format(JCMetricsPrefix, JCMetricsLabels(labels),
+        1 if runCounters.get('success', False) == True else 0))
+
+    JCMetricsHeader(lines, 'template_duration_seconds', 'histogram', 'Render time of the template')
+    JCMetricsHistogram(lines, 'template_duration_seconds', 'template', report.get('templates', {}),
+        histograms.get('template', {}), labels)
+    JCMetricsHeader(lines, 'phase_duration_seconds', 'histogram', 'Time of the phase of the run')
+    JCMetricsHistogram(lines, 'phase_duration_seconds', 'phase', report.get('phases', {}),
+        histograms.get('phase', {}), labels)
+
+    JCMetricsHeader(lines, 'output_bytes_total', 'counter', 'Bytes of config files written from the template')
+    for templateFileName, entry in sorted(report.get('templates', {}).items()):
+        lines.append("{0}output_bytes_total{1} {2}".format(JCMetricsPrefix,
+            JCMetricsLabels(labels, { 'template': templateFileName }), entry.get('outputBytes', 0)))
+
+    calls = report.get('calls', {})
+    JCMetricsHeader(lines, 'dns_lookups_total', 'counter', 'DNS lookups made by templates, environment spec and host facts')
+    lines.append("{0}dns_lookups_total{1} {2}".format(JCMetricsPrefix, JCMetricsLabels(labels),
+        sum(calls.get(callName, {}).get('count', 0) for callName in JCMetricsDNSCallNames)))
+    JCMetricsHeader(lines, 'commands_total', 'counter', 'Commands run by templates and environment spec')
+    lines.append("{0}commands_total{1} {2}".format(JCMetricsPrefix, JCMetricsLabels(labels),
+        calls.get('JCSystem', {}).get('count', 0)))
+
+    JCMetricsHeader(lines, 'cache_hit_ratio', 'gauge', 'Cache hits divided by lookups')
+    for cacheName, counter in sorted(report.get('caches', {}).items()):
+        if 'hitRatio' in counter:
+            lines.append("{0}cache_hit_ratio{1} {2}".format(JCMetricsPrefix,
+                JCMetricsLabels(labels, { 'cache': cacheName }), counter['hitRatio']))
+    return '\n'.join(lines) + '\n'
+
+def JCMetricsWrite(fileName:str, report:dict, histograms:dict, runCounters:dict, labels:dict):
+    """
+    Writes metrics to temp file in the directory of fileName and renames it to fileName
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    tempFileName = "{0}.{1}.tmp".format(fileName, os.getpid())
+    try:
+        with open(tempFileName, "w") as metricsFile:
+            metricsFile.write(JCMetricsFormat(report, histograms, runCounters, labels))
+        ### textfile collector reads files with .prom extension only, temp file is not read
+        os.chmod(tempFileName, 0o644)
+        os.replace(tempFileName, fileName)
+    except OSError as err:
+        if os.path.exists(tempFileName):
+            os.remove(tempFileName)
+        return False, "ERROR JCMetricsWrite() Can not write metrics file:{0}, OS error:{1}".format(fileName, err)
+    return True, ''
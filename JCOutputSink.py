@@ -0,0 +1,224 @@
+"""
+This module writes rendered config files to an output sink other than config path, one tar or zip archive or
+   a stream of JSON Lines, so that config files of many hosts are not written as many small files
+
+    JCOutputSinkParse(outputSpec) - parses --output <sinkType>[:<fileName>], returns sink type and file name
+    JCOutputSinkOpen(sinkType, fileName, configPath, compressLevel, bufferSize, outputStream, command) - opens the sink
+    JCOutputSinkWrite(sink, configFileName, outputText, entryInfo) - adds config file to the sink
+    JCOutputSinkClose(sink, discard) - completes and closes the sink
+
+Sink types
+    dir - config files are written under config path, default, handled by JCConfigGen.py
+    tar, tar.gz, tar.zst - tar archive, uncompressed, gzip or zstd compressed, zstd needs zstandard module
+        or python 3.14 compression.zstd
+    zip - zip archive, deflate compressed, stored when compressLevel is 0
+    ndjson - one JSON object per config file, to stdout when file name is not given or is -
+        {"configFileName": ..., "hostName": ..., "templateFileName": ..., "content": ...}
+    store - content addressed store at the path given, one manifest per host per run, refer JCContentStore.py
+
+Name of config file in the archive is its path relative to config path.
+Rendered text is written to the archive stream as it is, no temp file is made per config file.
+Archive is written to <fileName>.<pid>.tmp and renamed to fileName when closed, archive of a run that did not
+   complete is removed, so that a partial archive is not taken as output of the run.
+"""
+import os
+import sys
+import time
+
+JCOutputSinkTypes = ['dir', 'tar', 'tar.gz', 'tar.zst', 'zip', 'ndjson', 'store']
+
+### default write buffer size in bytes
+JCOutputSinkBufferSize = 1024 * 1024
+
+def JCOutputSinkParse(outputSpec:str):
+    """
+    Parses output spec in the form <sinkType>[:<fileName>]
+
+    Returns
+        sinkType - one of JCOutputSinkTypes, None on error
+        fileName - file name given, None if not given
+        errorMsg - error message on failure
+    """
+    sinkType, separator, fileName = outputSpec.partition(':')
+    if sinkType not in JCOutputSinkTypes:
+        return None, None, "ERROR JCOutputSinkParse() output:{0}, type is not one of {1}".format(outputSpec, JCOutputSinkTypes)
+    if fileName == '':
+        fileName = None
+    return sinkType, fileName, ''
+
+def JCOutputSinkZstdWriter(rawFile, compressLevel):
+    """
+    Returns writable zstd stream over rawFile, None if zstd module is not available
+    """
+    try:
+        import zstandard
+        return zstandard.ZstdCompressor(level=compressLevel if compressLevel != None else 3).stream_writer(rawFile)
+    except ImportError:
+        pass
+    try:
+        from compression import zstd
+        return zstd.ZstdFile(rawFile, mode='w', level=compressLevel)
+    except ImportError:
+        return None
+
+def JCOutputSinkOpen(sinkType:str, fileName:str, configPath:str, compressLevel=None, bufferSize=JCOutputSinkBufferSize,
+        outputStream=None, command=''):
+    """
+    Opens the output sink
+        fileName - archive file name, ndjson output file name, - or None for outputStream
+        configPath - names of config files in the sink are relative to this path
+        compressLevel - compression level of tar.gz, tar.zst, zip, None for default level
+        bufferSize - write buffer size in bytes
+        outputStream - binary stream to write ndjson to, defaults to stdout
+        command - command of the run, saved in store manifests
+
+    Returns
+        sink - dictionary to be passed to JCOutputSinkWrite(), JCOutputSinkClose(), None on error
+        errorMsg - error message on failure
+    """
+    sink = { 'type': sinkType, 'fileName': fileName, 'configPath': configPath, 'tempFileName': None,
+        'files': [], 'archive': None, 'stream': None, 'store': None, 'fileCount': 0, 'outputBytes': 0, 'mtime': int(time.time()) }
+    if sinkType == 'store':
+        import JCContentStore
+        sink['store'], errorMsg = JCContentStore.JCContentStoreOpen(fileName, command)
+        if sink['store'] == None:
+            return None, errorMsg
+        return sink, ''
+    try:
+        if sinkType == 'ndjson' and (fileName == None or fileName == '-'):
+            if outputStream == None:
+                sys.stdout.flush()
+                outputStream = sys.stdout.buffer
+            ### own buffer over stdout file descriptor, stdout is not closed
+            sink['stream'] = open(outputStream.fileno(), 'wb', buffering=bufferSize, closefd=False)
+            sink['files'].append(sink['stream'])
+            return sink, ''
+
+        sink['tempFileName'] = "{0}.{1}.tmp".format(fileName, os.getpid())
+        rawFile = open(sink['tempFileName'], 'wb', buffering=bufferSize)
+        sink['files'].append(rawFile)
+        if sinkType == 'ndjson':
+            sink['stream'] = rawFile
+        elif sinkType == 'zip':
+            import zipfile
+            if compressLevel == 0:
+                sink['archive'] = zipfile.ZipFile(rawFile, 'w', compression=zipfile.ZIP_STORED)
+            else:
+                sink['archive'] = zipfile.ZipFile(rawFile, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=compressLevel)
+        else:
+            import tarfile
+            archiveFile = rawFile
+            if sinkType == 'tar.gz':
+                import gzip
+                archiveFile = gzip.GzipFile(filename='', mode='wb', fileobj=rawFile,
+                    compresslevel=compressLevel if compressLevel != None else 6)
+                sink['files'].insert(0, archiveFile)
+            elif sinkType == 'tar.zst':
+                archiveFile = JCOutputSinkZstdWriter(rawFile, compressLevel)
+                if archiveFile == None:
+                    JCOutputSinkClose(sink, True)
+                    return None, "ERROR JCOutputSinkOpen() zstandard module is not available to write:{0}".format(fileName)
+                sink['files'].insert(0, archiveFile)
+            ### stream mode, archive is written sequentially
+            sink['archive'] = tarfile.open(fileobj=archiveFile, mode='w|', format=tarfile.PAX_FORMAT,
+                bufsize=max(tarfile.RECORDSIZE, bufferSize - bufferSize % tarfile.RECORDSIZE))
+    except (OSError, ValueError) as err:
+        JCOutputSinkClose(sink, True)
+        return None, "ERROR JCOutputSinkOpen() Can not open output:{0}:{1}, error:{2}".format(sinkType, fileName, err)
+    return sink, ''
+
+def JCOutputSinkMemberName(sink:dict, configFileName:str):
+    """
+    Returns name of config file in the sink, relative to config path
+    """
+    memberName = os.path.relpath(configFileName, sink['configPath'])
+    if memberName.startswith('..'):
+        memberName = configFileName.lstrip('/\\')
+    return memberName.replace('\\', '/')
+
+def JCOutputSinkWrite(sink:dict, configFileName:str, outputText:str, entryInfo=None):
+    """
+    Adds config file to the sink
+        entryInfo - dictionary like hostName, templateFileName, added to ndjson entry
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    memberName = JCOutputSinkMemberName(sink, configFileName)
+    if sink['type'] == 'store':
+        import JCContentStore
+        outputBytes = outputText.encode('utf-8')
+        returnStatus, errorMsg = JCContentStore.JCContentStoreAdd(sink['store'], 
+            entryInfo.get('hostName', '') if entryInfo != None else '', memberName, outputBytes)
+        if returnStatus == True:
+            sink['fileCount'] += 1
+            sink['outputBytes'] += len(outputBytes)
+        return returnStatus, errorMsg
+    try:
+        if sink['type'] == 'ndjson':
+            import json
+            entry = { 'configFileName': memberName }
+            if entryInfo != None:
+                entry.update(entryInfo)
+            entry['content'] = outputText
+            outputBytes = (json.dumps(entry) + '\n').encode('utf-8')
+            sink['stream'].write(outputBytes)
+        else:
+            outputBytes = outputText.encode('utf-8')
+            if sink['type'] == 'zip':
+                import zipfile
+                zipInfo = zipfile.ZipInfo(memberName, time.localtime(sink['mtime'])[:6])
+                zipInfo.compress_type = sink['archive'].compression
+                zipInfo.external_attr = 0o644 << 16
+                sink['archive'].writestr(zipInfo, outputBytes)
+            else:
+                import io
+                import tarfile
+                tarInfo = tarfile.TarInfo(memberName)
+                tarInfo.size = len(outputBytes)
+                tarInfo.mtime = sink['mtime']
+                tarInfo.mode = 0o644
+                sink['archive'].addfile(tarInfo, io.BytesIO(outputBytes))
+    except (OSError, ValueError) as err:
+        return False, "ERROR JCOutputSinkWrite() Can not add config file:{0} to output:{1}, error:{2}".format(
+            memberName, sink['fileName'] if sink['fileName'] != None else sink['type'], err)
+    sink['fileCount'] += 1
+    sink['outputBytes'] += len(outputBytes)
+    return True, ''
+
+def JCOutputSinkClose(sink:dict, discard=False):
+    """
+    Completes the archive and renames it to the file name given, flushes ndjson output
+        discard - True to remove the archive, used when the run does not complete
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    if sink == None:
+        return True, ''
+    if sink['store'] != None:
+        import JCContentStore
+        store, sink['store'] = sink['store'], None
+        ### manifest of the host being rendered when the run stopped is not written
+        if discard == True:
+            return True, ''
+        return JCContentStore.JCContentStoreClose(store)
+    errorMsg = ''
+    try:
+        if sink['archive'] != None:
+            sink['archive'].close()
+            sink['archive'] = None
+        for tempFile in sink['files']:
+            tempFile.close()
+        sink['files'] = []
+        if sink['tempFileName'] != None:
+            if discard == True:
+                os.remove(sink['tempFileName'])
+            else:
+                os.replace(sink['tempFileName'], sink['fileName'])
+            sink['tempFileName'] = None
+    except OSError as err:
+        errorMsg = "ERROR JCOutputSinkClose() Can not write output:{0}, error:{1}".format(sink['fileName'], err)
+    return errorMsg == '', errorMsg
@@ -0,0 +1,166 @@
+"""
+This module keeps profile files having values in the format
+    paramName: paramValue
+indexed in memory so that many values can be read and written without scanning and rewriting the file per value.
+
+    JCProfileGetMany(fileName, paramNames) - returns values of given parameters
+    JCProfileSetMany(fileName, paramValues) - sets values of given parameters with one rewrite of the file
+    JCProfileLock(fileName) - context manager holding advisory lock on <fileName>.lock
+
+The file is read once and indexed, it is read again only when its size or modified time changes.
+JCProfileSetMany() holds the lock while it reads the file again, updates it and writes it to a temp file
+   that is renamed to the profile file, so that concurrent runs do not lose updates and readers never see
+   a partially written file.
+Lines not in paramName: paramValue format, like comments, are kept as is.
+"""
+import os
+import threading
+
+### fileName: { 'signature': (size, mtime), 'lines': [ line ], 'index': { paramName: [ lineIndex ] } }
+profiles = {}
+profilesLock = threading.Lock()
+
+class JCProfileLock:
+    """
+    Advisory lock on <fileName>.lock using fcntl.flock() on Unix and msvcrt.locking() on Windows
+        with JCProfileStore.JCProfileLock(fileName):
+            ...
+    """
+    def __init__(self, fileName:str):
+        self.lockFileName = fileName + '.lock'
+        self.lockFile = None
+
+    def __enter__(self):
+        self.lockFile = open(self.lockFileName, 'a+')
+        if os.name == 'nt':
+            import msvcrt
+            import time
+            self.lockFile.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.lockFile.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    ### LK_LOCK retries for 10 seconds, keep waiting
+                    time.sleep(0.1)
+        else:
+            import fcntl
+            fcntl.flock(self.lockFile.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if os.name == 'nt':
+            import msvcrt
+            self.lockFile.seek(0)
+            msvcrt.locking(self.lockFile.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self.lockFile.fileno(), fcntl.LOCK_UN)
+        self.lockFile.close()
+        return False
+
+def JCProfileSignature(fileName:str):
+    """
+    Returns (size, modified time) of the file, None if file is not present
+    """
+    try:
+        fileStat = os.stat(fileName)
+    except OSError:
+        return None
+    return (fileStat.st_size, fileStat.st_mtime_ns)
+
+def JCProfileParseLine(line:str):
+    """
+    Returns paramName, paramValue of line in the format paramName: paramValue, None, None if not in that format
+    """
+    fieldParts = line.strip().split(':', 1)
+    if len(fieldParts) > 1:
+        return fieldParts[0], fieldParts[1].lstrip()
+    return None, None
+
+def JCProfileRead(fileName:str, forceRead=False):
+    """
+    Reads and indexes the profile file, returns profile dictionary, None if file is not present
+    When forceRead is False, profile read before is returned if file size and modified time did not change
+    Call this with profilesLock held
+    """
+    signature = JCProfileSignature(fileName)
+    if signature == None:
+        profiles.pop(fileName, None)
+        return None
+    profile = profiles.get(fileName)
+    if forceRead == False and profile != None and profile['signature'] == signature:
+        return profile
+
+    with open(fileName, "r") as file:
+        lines = file.read().splitlines(True)
+    index = {}
+    for lineIndex, line in enumerate(lines):
+        paramName, paramValue = JCProfileParseLine(line)
+        if paramName != None:
+            index.setdefault(paramName, []).append(lineIndex)
+    profile = { 'signature': signature, 'lines': lines, 'index': index }
+    profiles[fileName] = profile
+    return profile
+
+def JCProfileGetMany(fileName:str, paramNames):
+    """
+    Returns
+        returnStatus - True if profile file is present, else False
+        paramValues - dictionary of paramName: paramValue for parameters found in the file,
+            when paramName is present more than once, first value is returned
+    """
+    paramValues = {}
+    with profilesLock:
+        try:
+            profile = JCProfileRead(fileName)
+        except OSError:
+            profile = None
+        if profile == None:
+            return False, paramValues
+        for paramName in paramNames:
+            lineIndexes = profile['index'].get(paramName)
+            if lineIndexes != None:
+                paramValues[paramName] = JCProfileParseLine(profile['lines'][lineIndexes[0]])[1]
+    return True, paramValues
+
+def JCProfileSetMany(fileName:str, paramValues:dict):
+    """
+    Sets the values of parameters in the profile file, creates the file if not present
+    Lines of existing parameters are replaced in place, new parameters are added at the end of the file
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    tempFileName = "{0}.{1}.{2}.tmp".format(fileName, os.getpid(), threading.get_ident())
+    try:
+        with JCProfileLock(fileName), profilesLock:
+            ### read again under lock, the file may have been updated by other run
+            profile = JCProfileRead(fileName, True)
+            if profile == None:
+                profile = { 'signature': None, 'lines': [], 'index': {} }
+            lines = profile['lines']
+            index = profile['index']
+            for paramName, paramValue in paramValues.items():
+                replaceLine = "{0}: {1}\n".format(paramName, paramValue)
+                if paramName in index:
+                    for lineIndex in index[paramName]:
+                        lines[lineIndex] = replaceLine
+                else:
+                    if len(lines) > 0 and lines[-1].endswith('\n') == False:
+                        lines[-1] += '\n'
+                    index[paramName] = [ len(lines) ]
+                    lines.append(replaceLine)
+
+            with open(tempFileName, "w") as file:
+                file.write(''.join(lines))
+            os.replace(tempFileName, fileName)
+            profile['signature'] = JCProfileSignature(fileName)
+            profiles[fileName] = profile
+    except OSError as err:
+        profiles.pop(fileName, None)
+        if os.path.exists(tempFileName):
+            os.remove(tempFileName)
+        return False, "ERROR JCProfileSetMany() Can not update profile file:{0}, OS error:{1}".format(fileName, err)
+    return True, ''
@@ -1,31 +1,141 @@
 """
 This module reads yml config file and assigns the values to passed defaultParameters dictionary
 
+    JCReadEnvironmentConfig(fileName, defaultParameters, ...) - reads environment spec, updates defaultParameters
+    JCReadEnvironmentLayers(fileName, builtinLayers, ...) - reads environment spec, returns parameters of the host
+        as a ChainMap of layers
+    JCEnvironmentSpecRead(fileName, yamlModulePresent, logFileName) - returns parsed environment spec, cached by
+        SHA-256 of spec file contents
+    JCEnvironmentLayers(environmentSpec, thisHostName, OSType, debugLevel) - returns layers of the spec
+        applicable to the host
+
+Parameters of a host are looked up through layers, first layer having the name gives the value
+    host layer - values set after reading the spec, host overrides of inventory, values set by templates
+    matched Environment sections, last matched first
+    matched Component sections, last matched first
+    OS section of the host's OS type
+    global JCLogFilePath, JCPlatform of the spec
+    built-in layers passed, like host name parameters and parameters common to all hosts
+    OS All, Component All, Environment All sections, these store a value only if not defined already
+This gives same values as reading sections one by one into a single dictionary, storing values of matched
+   sections always and values of All sections only when not present.
+
+Layers other than host layer are read-only and shared by all hosts having same rendered spec, memory per host
+   is the host layer only. Values like lists are shared too, templates are not expected to change those.
 """
 import os
-import sys
 import re
-from collections import defaultdict
+from collections import ChainMap
+from types import MappingProxyType
 import JCGlobalLib
 
+### parsed environment specs, { (sha256 of spec, yamlModulePresent): layers of spec }
+###   hosts of same component and environment usually have same rendered spec
+environmentSpecCache = {}
+### max specs kept in cache, oldest is removed when the cache is full
+JCEnvironmentSpecCacheSize = 64
 
-def JCReadEnvironmentConfig( 
-    fileName, defaultParameters, yamlModulePresent, debugLevel, logFileName, thisHostName, OSType):
+### sections read in this order, later section takes precedence
+JCEnvironmentSections = ['OS', 'Component', 'Environment']
+
+def JCEnvironmentSpecLayers(defaultParametersSpec):
     """
-    This function reads environment config file
+    Returns read-only layers of parsed spec
+        { 'globals': layer, 'OS': [ (key, layer, nameLayer, hostNamePattern) ], 'Component': [...], 'Environment': [...] }
+    """
+    specLayers = { 'globals': MappingProxyType({ key: defaultParametersSpec[key]
+        for key in ('JCLogFilePath', 'JCPlatform') if key in defaultParametersSpec }) }
+    for sectionName in JCEnvironmentSections:
+        specLayers[sectionName] = []
+        if sectionName not in defaultParametersSpec:
+            continue
+        for key, value in defaultParametersSpec[sectionName].items():
+            if value == None:
+                value = {}
+            specLayers[sectionName].append( (key, MappingProxyType(value), MappingProxyType({ sectionName: key }),
+                value.get('HostName')) )
+    return specLayers
+
+def JCEnvironmentSpecRead(fileName, yamlModulePresent, logFileName):
+    """
+    Reads environment spec file, parsed spec is kept in cache with SHA-256 of file contents as key,
+       spec rendered to same contents for another host is not parsed again
 
-    # Parameter name needs to be unique across all sections - OS, Environment, Network, Site, Component and Host
-    # Parameters can be defined under OS, Environment, Network, Site, Component and Host
-    # Parameter value can be redefined in other sections to override previous value.
-    # Parameters under OS will be read first, under Environment next, Network, Site, Component and Host in that order.
-    # While reading parameters under Environment, if a value is present under specific Environment, 
-    #   it will be stored as latest desired value, overriding the value previously defined under OS
-    # While reading parameters under Network, if a value is present under specific Network, 
-    #   it will be stored as latest desired value, overriding the value previously defined under OS or Environment
+    Returns
+        specLayers - layers of spec made by JCEnvironmentSpecLayers(), None on error
+        errorMsg - error message on failure
+    """
+    import hashlib
+    import JCTimings
+    try:
+        with open(fileName, "rb") as file:
+            specContents = file.read()
+    except OSError as err:
+        return None, "ERROR JCReadEnvironmentConfig() Can not open configFile:|{0}|, OS error: {1}\n".format(
+            fileName, err)
+
+    cacheKey = (hashlib.sha256(specContents).hexdigest(), yamlModulePresent)
+    specLayers = environmentSpecCache.get(cacheKey)
+    JCTimings.JCTimingsCount('environmentSpec', specLayers != None)
+    if specLayers != None:
+        return specLayers, ''
+
+    # use limited yaml reader when yaml is not available
+    if yamlModulePresent == True:
+        import yaml
+        defaultParametersSpec = yaml.load(specContents.decode('utf-8'), Loader=yaml.FullLoader)
+    else:
+        defaultParametersSpec = JCGlobalLib.JAYamlLoad(fileName)
+    if defaultParametersSpec == None:
+        defaultParametersSpec = {}
+
+    specLayers = JCEnvironmentSpecLayers(defaultParametersSpec)
+    if len(environmentSpecCache) >= JCEnvironmentSpecCacheSize:
+        environmentSpecCache.pop(next(iter(environmentSpecCache)), None)
+    environmentSpecCache[cacheKey] = specLayers
+    return specLayers, ''
 
-    Parameters passed: 
+def JCEnvironmentLayers(specLayers, thisHostName, OSType, debugLevel=0):
+    """
+    Returns layers of the spec applicable to the host
+        overrideLayers - matched Environment, matched Component, OS specific and global layers,
+            highest precedence first, these take precedence over built-in layers
+        defaultLayers - OS All, Component All, Environment All layers, used for names not in other layers
+    """
+    overrideLayers = []
+    defaultLayers = []
+    for sectionName in JCEnvironmentSections:
+        for key, layer, nameLayer, hostNamePattern in specLayers[sectionName]:
+            if key == 'All' or key == 'ALL':
+                # values in this section work as default if params are defined for specific environment
+                defaultLayers.append(layer)
+
+            if sectionName == 'OS':
+                # store definitions matching to current OSType
+                matched = (key == OSType)
+            else:
+                # match current hostname to hostname specified within each environment to find out
+                #   which environment spec is to be applied for the current host
+                matched = (hostNamePattern != None and re.match(hostNamePattern, thisHostName) != None)
+            if matched == True:
+                # section matched later takes precedence, name of matched section is stored as OS, Component, Environment
+                overrideLayers.insert(0, layer)
+                overrideLayers.insert(0, nameLayer)
+                if debugLevel > 2:
+                    print('DEBUG-3 JCEnvironmentLayers() host: {0}, matched {1}: {2}, values: {3}'.format(
+                        thisHostName, sectionName, key, dict(layer)))
+    overrideLayers.append(specLayers['globals'])
+    return overrideLayers, defaultLayers
+
+def JCReadEnvironmentLayers(
+    fileName, builtinLayers, yamlModulePresent, debugLevel, logFileName, thisHostName, OSType):
+    """
+    This function reads environment config file and returns parameters of the host as ChainMap of layers
+
+    Parameters passed:
         config file name - yml file name containing parameter spec
-        defaultParameters dictionary to update with values read
+        builtinLayers - list of dictionaries having built-in values, first one takes precedence,
+            these are not changed
         yamlModulePresent = True or False
         debugLevel - 0 to 3, 3 being max
         logFileName - log file to log messages
@@ -33,104 +143,22 @@ def JCReadEnvironmentConfig(
         OSType - current host's OS type
 
     Returned value
-        True if success, False if file could not be read
-
+        ChainMap of host layer and layers of the spec and built-in layers, values set are stored in host layer
+        None if file could not be read or log path could not be created
     """
-
-    returnStatus = True
-
     if os.path.isfile(fileName) == False:
         print("ERROR JCReadEnvironmentConfig() File |{0}| not found".format(fileName))
-        return False
-
-    # use limited yaml reader when yaml is not available
-    if yamlModulePresent == True:
-        try:
-            import yaml
-            with open(fileName, "r") as file:
-                defaultParametersSpec = yaml.load(file, Loader=yaml.FullLoader)
-                file.close()
-        except OSError as err:
-            errorMsg = "ERROR JCReadEnvironmentConfig() Can not open configFile:|{0}|, OS error: {1}\n".format(
-                fileName, err)
-            print(errorMsg)
-            JCGlobalLib.LogMsg(errorMsg,  logFileName, True, True)
-            return False
-    else:
-        defaultParametersSpec = JCGlobalLib.JAYamlLoad(fileName)
+        return None
 
+    specLayers, errorMsg = JCEnvironmentSpecRead(fileName, yamlModulePresent, logFileName)
+    if specLayers == None:
+        print(errorMsg)
+        JCGlobalLib.LogMsg(errorMsg,  logFileName, True, True)
+        return None
     errorMsg = ''
 
-    # Get global definitions (not environment specific)
-    if 'JCLogFilePath' in defaultParametersSpec:
-        defaultParameters['JCLogFilePath'] = defaultParametersSpec['JCLogFilePath']
-
-    if 'JCPlatform' in defaultParametersSpec:
-        defaultParameters['JCPlatform'] = defaultParametersSpec['JCPlatform']
-
-    # read OS section first
-    if 'OS' in defaultParametersSpec:
-        for key, value in defaultParametersSpec['OS'].items():
-            if key == 'All' or key == 'ALL':
-                # if parameters are not yet defined, read the values from this section
-                # values in this section work as default if params are defined for
-                # specific environment
-                JCGlobalLib.JCGatherEnvironmentSpecs(
-                        False, # store value if not present already
-                        value, debugLevel, defaultParameters, [], [])
-
-            # store definitions matching to current OSType
-            if key == OSType:
-                # read all parameters defined for this environment
-                JCGlobalLib.JCGatherEnvironmentSpecs(
-                    True, # store current value if prev value is present
-                    value, debugLevel, defaultParameters, [], [])
-                defaultParameters['OS']  = key
-
-    # read Component section next
-    if 'Component' in defaultParametersSpec:
-        for key, value in defaultParametersSpec['Component'].items():
-            if key == 'All' or key == 'ALL':
-                # if parameters are not yet defined, read the values from this section
-                # values in this section work as default if params are defined for
-                # specific environment
-                JCGlobalLib.JCGatherEnvironmentSpecs(
-                        False, # store value if not present already
-                        value, debugLevel, defaultParameters, [], [])
-
-            # match current hostname to hostname specified within each environment to find out
-            #   which environment spec is to be applied for the current host
-            if value.get('HostName') != None:
-                if re.match(value['HostName'], thisHostName):
-                    # current hostname match the hostname specified for this environment
-                    # read all parameters defined for this environment
-                    JCGlobalLib.JCGatherEnvironmentSpecs(
-                        True, # store current value if prev value is present
-                        value, debugLevel, defaultParameters, [], [])
-                    defaultParameters['Component'] = key
-
-    # read Environment section last
-    if 'Environment' in defaultParametersSpec:
-        for key, value in defaultParametersSpec['Environment'].items():
-            if key == 'All' or key == 'ALL':
-                # if parameters are not yet defined, read the values from this section
-                # values in this section work as default if params are defined for
-                # specific environment
-                JCGlobalLib.JCGatherEnvironmentSpecs(
-                        False, # store value if not present already
-                        value, debugLevel, defaultParameters, [], [])
-
-            # match current hostname to hostname specified within each environment to find out
-            #   which environment spec is to be applied for the current host
-            if value.get('HostName') != None:
-                if re.match(value['HostName'], thisHostName):
-                    # current hostname match the hostname specified for this environment
-                    # read all parameters defined for this environment
-                    JCGlobalLib.JCGatherEnvironmentSpecs(
-                        True, # store current value if prev value is present, parameters under Environment takes precedence
-                        value, debugLevel, defaultParameters, [], [])
-                    defaultParameters['Environment']  = key
-
+    overrideLayers, defaultLayers = JCEnvironmentLayers(specLayers, thisHostName, OSType, debugLevel)
+    defaultParameters = ChainMap({}, *overrideLayers, *builtinLayers, *defaultLayers)
 
     if OSType == "Windows":
         if 'JCCommandShell' not in defaultParameters:
@@ -159,19 +187,22 @@ def JCReadEnvironmentConfig(
         else:
             logFilePath = os.path.expandvars(os.getcwd() + "/logs")
         defaultParameters['JCLogFilePath'] = logFilePath
-        
+
     if os.path.exists(logFilePath) == False:
         try:
             os.mkdir(logFilePath)
         except OSError as err:
-            errorMsg = "ERROR JCReadEnvironmentConfig() Could not create logs directory:{0}".format(
-                logFilePath, err )
-            print( errorMsg)
-            sys.exit(0)
+            ### created by render of other host at the same time in --async mode
+            if os.path.isdir(logFilePath) == False:
+                errorMsg = "ERROR JCReadEnvironmentConfig() Could not create logs directory:{0}, OS error:{1}".format(
+                    logFilePath, err )
+                print( errorMsg)
+                JCGlobalLib.LogMsg(errorMsg,  logFileName, True, True)
+                return None
 
     if debugLevel > 1:
         print('DEBUG-2 JCReadEnvironmentConfig() Content of config file: {0}, read to  ConfigEnvironment: {1}'.format(
-            fileName, defaultParameters))
+            fileName, dict(defaultParameters)))
     elif debugLevel > 0:
         print('DEBUG-1 JCReadEnvironmentConfig() Read environment config file:|{0}|'.format(fileName))
 
@@ -179,5 +210,38 @@ def JCReadEnvironmentConfig(
         print(errorMsg)
         JCGlobalLib.LogMsg(errorMsg,  logFileName, True, True)
 
+    return defaultParameters
+
+def JCReadEnvironmentConfig(
+    fileName, defaultParameters, yamlModulePresent, debugLevel, logFileName, thisHostName, OSType):
+    """
+    This function reads environment config file
+
+    # Parameter name needs to be unique across all sections - OS, Environment, Network, Site, Component and Host
+    # Parameters can be defined under OS, Environment, Network, Site, Component and Host
+    # Parameter value can be redefined in other sections to override previous value.
+    # Parameters under OS will be read first, under Environment next, Network, Site, Component and Host in that order.
+    # While reading parameters under Environment, if a value is present under specific Environment,
+    #   it will be stored as latest desired value, overriding the value previously defined under OS
+    # While reading parameters under Network, if a value is present under specific Network,
+    #   it will be stored as latest desired value, overriding the value previously defined under OS or Environment
+
+    Parameters passed:
+        config file name - yml file name containing parameter spec
+        defaultParameters dictionary to update with values read
+        yamlModulePresent = True or False
+        debugLevel - 0 to 3, 3 being max
+        logFileName - log file to log messages
+        thisHostName - current host name, used to match the hostname spec
+        OSType - current host's OS type
+
+    Returned value
+        True if success, False if file could not be read
+
+    """
+    hostParameters = JCReadEnvironmentLayers(fileName, [ defaultParameters ], yamlModulePresent, debugLevel,
+        logFileName, thisHostName, OSType)
+    if hostParameters == None:
+        return False
+    defaultParameters.update(dict(hostParameters))
     return True
-    
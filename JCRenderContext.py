@@ -0,0 +1,81 @@
+"""
+This module keeps the values set by JCSetVariable() per host instead of in template environment globals
+   so that templates of different hosts can be rendered using one template environment, on many threads
+
+    JCRenderContext(functions) - holds values set by JCSetVariable() and template functions bound to it
+    JCEnvironment(...) - jinja2 Environment whose templates look up values set by JCSetVariable()
+    JCRenderContextRender(template, templateVariables, renderContext) - renders template using the context
+    JCRenderContextRenderAsync(template, templateVariables, renderContext, asyncFunctions) - coroutine, renders
+        template of environment made with enable_async, using awaitable versions of template functions passed
+
+One JCRenderContext is made per host and is used to render environment spec and templates of that host.
+Value set by JCSetVariable() is seen by the templates included after the call and by templates rendered after
+   that for the same host, values of other hosts are not seen.
+The render context and the template functions are passed to render() along with the variables, template
+   environment globals are not changed after the template environment is made.
+
+Variables passed to render take precedence over values set by JCSetVariable(), same as when those values
+   were stored in template environment globals.
+"""
+from jinja2 import Environment
+from jinja2.runtime import Context
+from jinja2.utils import missing
+
+### name of the render variable holding the render context
+JCRenderContextName = 'JCRenderContext'
+
+class JCRenderContext:
+    """
+    Values set by JCSetVariable() while rendering the templates of one host and template functions,
+       JCSetVariable() bound to this context
+    """
+    def __init__(self, functions:dict):
+        self.variables = {}
+        self.functions = dict(functions)
+        self.functions['JCSetVariable'] = self.JCSetVariable
+        self.functions[JCRenderContextName] = self
+
+    def JCSetVariable(self, name, value):
+        """
+        This function stores the value of the variable in the render context, to be carried forward
+           while processing other templates of the same host
+        """
+        self.variables[name] = value
+        return True
+
+class JCTemplateContext(Context):
+    """
+    Template context that looks up values set by JCSetVariable() in the render context,
+       when the name is not a variable passed to render or global
+    """
+    def resolve_or_missing(self, key):
+        value = super().resolve_or_missing(key)
+        if value is missing:
+            renderContext = self.parent.get(JCRenderContextName)
+            if renderContext != None:
+                value = renderContext.variables.get(key, missing)
+        return value
+
+class JCEnvironment(Environment):
+    """
+    jinja2 Environment using JCTemplateContext
+    """
+    context_class = JCTemplateContext
+
+def JCRenderContextRender(template, templateVariables:dict, renderContext:JCRenderContext):
+    """
+    Renders the template using templateVariables, template functions and values set by JCSetVariable()
+       in renderContext
+    Returns rendered text
+    """
+    return template.render(templateVariables, **renderContext.functions)
+
+async def JCRenderContextRenderAsync(template, templateVariables:dict, renderContext:JCRenderContext, asyncFunctions:dict):
+    """
+    Renders the template of environment made with enable_async, same as JCRenderContextRender(),
+       functions in asyncFunctions replace template functions of same name
+    Returns rendered text
+    """
+    functions = dict(renderContext.functions)
+    functions.update(asyncFunctions)
+    return await template.render_async(templateVariables, **functions)
@@ -0,0 +1,294 @@
+"""
+This module splits the hosts of a large run into shards so that the shards can be rendered by different
+   processes or machines without any coordination, and merges the run manifests and reports of the shards
+
+    JCShardParse(shardSpec) - parses --shard K/N, returns shard index and shard count
+    JCShardOfHost(hostName, shardCount) - returns shard index of the host, 1 to shardCount
+    JCShardFilter(hostRecords, shardIndex, shardCount) - generator, yields records of the hosts in the shard
+    JCManifestOpen(fileName, headerInfo) - opens the run manifest, JCManifestAdd(), JCManifestClose()
+    JCShardMergeManifests(manifestFileNames, mergedFileName) - merges manifests of the shards
+    JCShardMergeReports(reportFileNames, mergedFileName) - merges timings reports of the shards
+
+Shard of a host is found using rendezvous hashing, for each shard, SHA-1 of shard index and host name is computed,
+   host belongs to the shard with highest hash. It depends only on host name and shard count, so that every shard
+   picks its hosts from same host list independently, a host is in exactly one shard and when shard count
+   changes, only the hosts of added or removed shards move.
+
+Run manifest is in JSON Lines form, written as config files are generated so that it is not kept in memory
+    {"manifest": "header", "shard": "K/N", "shardIndex": K, "shardCount": N, ...headerInfo}
+    {"hostName": ..., "templateFileName": ..., "configFileName": ..., "status": ...}
+    {"manifest": "summary", "hosts": <count>, "configFiles": <count>, "statuses": { status: count }}
+
+Merge step, run after all shards complete, on a host having access to the files of all shards
+    python3 JCShard.py -m <manifest1>,<manifest2>,... -o <mergedManifest> [-r <report1>,<report2>,... -R <mergedReport>]
+Merged manifest has entries of all shards, header lists the shards merged. Missing shards, shards of different
+   shard count and hosts present in more than one shard are reported.
+"""
+import os
+import sys
+
+def JCShardParse(shardSpec:str):
+    """
+    Parses shard spec in the form K/N, K is 1 to N
+
+    Returns
+        shardIndex, shardCount - None, None on error
+        errorMsg - error message on failure
+    """
+    shardParts = shardSpec.split('/')
+    try:
+        if len(shardParts) != 2:
+            raise ValueError(shardSpec)
+        shardIndex = int(shardParts[0])
+        shardCount = int(shardParts[1])
+    except ValueError:
+        return None, None, "ERROR JCShardParse() shard:{0} is not in the form K/N".format(shardSpec)
+    if shardCount < 1 or shardIndex < 1 or shardIndex > shardCount:
+        return None, None, "ERROR JCShardParse() shard:{0}, K needs to be 1 to N".format(shardSpec)
+    return shardIndex, shardCount, ''
+
+def JCShardOfHost(hostName:str, shardCount:int):
+    """
+    Returns shard index of the host, 1 to shardCount, using rendezvous hashing of host name
+    """
+    import hashlib
+    hostNameBytes = hostName.lower().encode('utf-8')
+    maxHash = None
+    hostShardIndex = 1
+    for shardIndex in range(1, shardCount + 1):
+        shardHash = hashlib.sha1(b'%d:' % shardIndex + hostNameBytes).digest()
+        if maxHash == None or shardHash > maxHash:
+            maxHash = shardHash
+            hostShardIndex = shardIndex
+    return hostShardIndex
+
+def JCShardFilter(hostRecords, shardIndex:int, shardCount:int):
+    """
+    Generator, yields lineNumber, hostRecord, errorMsg of the hosts in given shard from hostRecords made by JCInventory
+    Rows with error are yielded by shard 1 only so that each error is reported once
+    """
+    for lineNumber, hostRecord, errorMsg in hostRecords:
+        if hostRecord == None:
+            if shardIndex == 1:
+                yield lineNumber, hostRecord, errorMsg
+            continue
+        if JCShardOfHost(hostRecord['hostName'], shardCount) == shardIndex:
+            yield lineNumber, hostRecord, errorMsg
+
+def JCShardSuffix(shardIndex:int, shardCount:int):
+    """
+    Returns shard id used in output file names, like shard1of4
+    """
+    return "shard{0}of{1}".format(shardIndex, shardCount)
+
+def JCManifestOpen(fileName:str, headerInfo:dict):
+    """
+    Opens the run manifest, writes header line
+
+    Returns
+        manifest - dictionary to be passed to JCManifestAdd(), JCManifestClose(), None on error
+        errorMsg - error message on failure
+    """
+    import json
+    try:
+        manifestFile = open(fileName, "w")
+        manifestFile.write(json.dumps(dict(headerInfo, manifest='header'), sort_keys=True) + '\n')
+    except OSError as err:
+        return None, "ERROR JCManifestOpen() Can not write manifest file:{0}, OS error:{1}".format(fileName, err)
+    return { 'file': manifestFile, 'fileName': fileName, 'hostNames': set(), 'configFiles': 0, 'statuses': {} }, ''
+
+def JCManifestAdd(manifest:dict, hostName:str, templateFileName:str, configFileName:str, status:str):
+    """
+    Adds entry of the config file to the run manifest
+    """
+    import json
+    if manifest == None:
+        return
+    manifest['file'].write(json.dumps({ 'hostName': hostName, 'templateFileName': templateFileName,
+        'configFileName': configFileName, 'status': status }, sort_keys=True) + '\n')
+    manifest['hostNames'].add(hostName)
+    manifest['configFiles'] += 1
+    manifest['statuses'][status] = manifest['statuses'].get(status, 0) + 1
+
+def JCManifestClose(manifest:dict, summaryInfo=None):
+    """
+    Writes summary line and closes the run manifest
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    import json
+    if manifest == None:
+        return True, ''
+    summary = { 'manifest': 'summary', 'hosts': len(manifest['hostNames']), 'configFiles': manifest['configFiles'],
+        'statuses': manifest['statuses'] }
+    if summaryInfo != None:
+        summary.update(summaryInfo)
+    try:
+        manifest['file'].write(json.dumps(summary, sort_keys=True) + '\n')
+        manifest['file'].close()
+    except OSError as err:
+        return False, "ERROR JCManifestClose() Can not write manifest file:{0}, OS error:{1}".format(manifest['fileName'], err)
+    return True, ''
+
+def JCShardMergeManifests(manifestFileNames, mergedFileName:str):
+    """
+    Merges run manifests of the shards into one manifest, entries are copied line by line
+
+    Returns
+        returnStatus - True on success, False on failure
+        messages - list of WARN and ERROR messages, like missing shards or hosts in more than one shard
+    """
+    import json
+    messages = []
+    headers = []
+    hostShards = {}
+    duplicateHostNames = set()
+    summary = { 'manifest': 'summary', 'hosts': 0, 'configFiles': 0, 'statuses': {} }
+    tempFileName = "{0}.{1}.tmp".format(mergedFileName, os.getpid())
+    try:
+        with open(tempFileName, "w") as mergedFile:
+            for manifestFileName in manifestFileNames:
+                with open(manifestFileName, "r") as manifestFile:
+                    shardId = manifestFileName
+                    for lineNumber, line in enumerate(manifestFile, 1):
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            messages.append("ERROR JCShardMergeManifests() manifest file:{0}, line:{1} is not in JSON form, skipped".format(
+                                manifestFileName, lineNumber))
+                            continue
+                        if entry.get('manifest') == 'header':
+                            shardId = entry.get('shard', manifestFileName)
+                            headers.append(entry)
+                            continue
+                        if entry.get('manifest') == 'summary':
+                            continue
+                        hostName = entry.get('hostName')
+                        if hostShards.setdefault(hostName, shardId) != shardId:
+                            duplicateHostNames.add(hostName)
+                        mergedFile.write(json.dumps(dict(entry, shard=shardId), sort_keys=True) + '\n')
+                        summary['configFiles'] += 1
+                        summary['statuses'][entry.get('status')] = summary['statuses'].get(entry.get('status'), 0) + 1
+            summary['hosts'] = len(hostShards)
+            summary['shards'] = [ header.get('shard') for header in headers ]
+            mergedFile.write(json.dumps(summary, sort_keys=True) + '\n')
+    except OSError as err:
+        if os.path.exists(tempFileName):
+            os.remove(tempFileName)
+        messages.append("ERROR JCShardMergeManifests() Can not merge manifests into:{0}, OS error:{1}".format(mergedFileName, err))
+        return False, messages
+
+    ### header of merged manifest is written first, after all shards are read
+    shardCounts = set(header.get('shardCount') for header in headers)
+    mergedHeader = { 'manifest': 'header', 'merged': True, 'shards': sorted(header.get('shard', '') for header in headers),
+        'shardCount': min(shardCounts) if len(shardCounts) > 0 else 0 }
+    try:
+        with open(mergedFileName + '.header.tmp', "w") as headerFile, open(tempFileName, "r") as entriesFile:
+            headerFile.write(json.dumps(mergedHeader, sort_keys=True) + '\n')
+            import shutil
+            shutil.copyfileobj(entriesFile, headerFile, 1024 * 1024)
+        os.replace(mergedFileName + '.header.tmp', mergedFileName)
+        os.remove(tempFileName)
+    except OSError as err:
+        messages.append("ERROR JCShardMergeManifests() Can not write merged manifest:{0}, OS error:{1}".format(mergedFileName, err))
+        return False, messages
+
+    if len(shardCounts) > 1:
+        messages.append("ERROR JCShardMergeManifests() manifests have different shard counts:{0}".format(sorted(shardCounts)))
+    elif len(shardCounts) == 1:
+        shardCount = shardCounts.pop()
+        if shardCount != None:
+            mergedShardIndexes = set(header.get('shardIndex') for header in headers)
+            missingShards = [ shardIndex for shardIndex in range(1, shardCount + 1) if shardIndex not in mergedShardIndexes ]
+            if len(missingShards) > 0:
+                messages.append("WARN JCShardMergeManifests() manifests of shards:{0} of {1} shards are not merged".format(
+                    missingShards, shardCount))
+    if len(duplicateHostNames) > 0:
+        messages.append("ERROR JCShardMergeManifests() hosts present in more than one shard:{0}".format(
+            ', '.join(sorted(duplicateHostNames))))
+    return len([ message for message in messages if message.startswith('ERROR') ]) == 0, messages
+
+def JCShardMergeReports(reportFileNames, mergedFileName:str):
+    """
+    Merges timings reports written by JCTimings.JCTimingsWriteReport() for the shards
+        count, wallTime, cpuTime, outputBytes of each entry, cache hits and misses are added,
+        wallTime of the merged run is the longest shard wallTime, shards run in parallel
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    import json
+    mergedReport = { 'shards': [], 'wallTime': 0, 'cpuTime': 0, 'outputBytes': 0 }
+    for reportFileName in reportFileNames:
+        try:
+            with open(reportFileName, "r") as reportFile:
+                report = json.load(reportFile)
+        except (OSError, ValueError) as err:
+            return False, "ERROR JCShardMergeReports() Can not read report file:{0}, error:{1}".format(reportFileName, err)
+        mergedReport['shards'].append(report.get('shard', reportFileName))
+        mergedReport['wallTime'] = max(mergedReport['wallTime'], report.get('wallTime', 0))
+        mergedReport['cpuTime'] = round(mergedReport['cpuTime'] + report.get('cpuTime', 0), 6)
+        mergedReport['outputBytes'] += report.get('outputBytes', 0)
+        for key, value in report.items():
+            if key == 'caches':
+                mergedCaches = mergedReport.setdefault('caches', {})
+                for cacheName, counter in value.items():
+                    mergedCounter = mergedCaches.setdefault(cacheName, { 'hits': 0, 'misses': 0 })
+                    mergedCounter['hits'] += counter.get('hits', 0)
+                    mergedCounter['misses'] += counter.get('misses', 0)
+            elif isinstance(value, dict) and all(isinstance(entry, dict) and 'count' in entry for entry in value.values()):
+                ### timings category like phases, templates
+                mergedCategory = mergedReport.setdefault(key, {})
+                for name, entry in value.items():
+                    mergedEntry = mergedCategory.setdefault(name, {})
+                    for field, fieldValue in entry.items():
+                        if isinstance(fieldValue, (int, float)):
+                            mergedEntry[field] = round(mergedEntry.get(field, 0) + fieldValue, 6)
+    for counter in mergedReport.get('caches', {}).values():
+        lookups = counter['hits'] + counter['misses']
+        if lookups > 0:
+            counter['hitRatio'] = round(counter['hits'] / lookups, 4)
+
+    tempFileName = "{0}.{1}.tmp".format(mergedFileName, os.getpid())
+    try:
+        with open(tempFileName, "w") as mergedFile:
+            json.dump(mergedReport, mergedFile, indent=2, sort_keys=True)
+            mergedFile.write('\n')
+        os.replace(tempFileName, mergedFileName)
+    except OSError as err:
+        return False, "ERROR JCShardMergeReports() Can not write merged report file:{0}, OS error:{1}".format(mergedFileName, err)
+    return True, ''
+
+if __name__ == '__main__':
+    import JCGlobalLib
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    if '-m' not in argsPassed and '-r' not in argsPassed:
+        print("""
+    python3 JCShard.py -m <manifest1>,<manifest2>,... -o <mergedManifest> [-r <report1>,<report2>,... -R <mergedReport>]
+        merges run manifests and timings reports written by JCConfigGen.py --shard K/N runs
+    """)
+        sys.exit()
+    exitStatus = 0
+    if '-m' in argsPassed:
+        mergedFileName = argsPassed.get('-o', 'JCConfigGen.manifest.merged.jsonl')
+        returnStatus, messages = JCShardMergeManifests(
+            list(map(str.strip, argsPassed['-m'].split(','))), mergedFileName)
+        for message in messages:
+            print(message)
+        if returnStatus == False:
+            exitStatus = 1
+        else:
+            print("INFO JCShard() merged manifests to:{0}".format(mergedFileName))
+    if '-r' in argsPassed:
+        mergedFileName = argsPassed.get('-R', 'JCConfigGen.timings.merged.json')
+        returnStatus, errorMsg = JCShardMergeReports(list(map(str.strip, argsPassed['-r'].split(','))), mergedFileName)
+        if returnStatus == False:
+            print(errorMsg)
+            exitStatus = 1
+        else:
+            print("INFO JCShard() merged reports to:{0}".format(mergedFileName))
+    sys.exit(exitStatus)
@@ -0,0 +1,261 @@
+"""
+This module finds the variables and JC functions a template reads, without rendering the template
+
+    JCTemplateAnalyze(templateEnvironment, templateFileName, functionNames) - returns analysis of the template
+        and templates it includes, imports or extends
+    JCTemplateMissingVariables(analysis, templateVariables, templateGlobals) - returns variables not defined
+    JCTemplateFormatVariables(templateVariables, variableNames) - returns variable values in name: value lines
+
+Analysis is a dictionary
+    variables - set of variable names read by the template, not set within the template
+    functions - set of names in functionNames called by the template
+    setVariables - set of variable names set by JCSetVariable("<name>", value) calls
+    templates - set of template file names analyzed, template itself and templates it includes
+    dynamicIncludes - True if a template is included using a name known at render time only
+    callsSetVariable - True if the template calls JCSetVariable()
+
+Each template file is parsed once, result is cached with modified time of the file and the file is parsed again
+   only when it changes. Analysis of a template combines the results of the template and included templates.
+When the loader reads templates from search path, like FileSystemLoader, the file is found and checked with
+   os.stat(), the file is read only when it is not in the cache or it changed.
+Variables are found using jinja2.meta.find_undeclared_variables(), function calls and JCSetVariable() names
+   are found by walking the template AST.
+Variables assigned at top level of a template by set, import and from import statements are visible to the
+   templates it includes with context or extends, those are not reported as read by the included templates.
+
+Command
+    python3 JCTemplateAnalysis.py -c check - checks analysis of sample templates, exits with status 1 on mismatch
+"""
+import os
+import threading
+
+### templateFileName: { 'fileName', 'mtime', 'variables', 'calledNames', 'setVariables', 'assignedNames',
+###   'referencedTemplates', 'contextTemplates', 'dynamicIncludes' }
+templateFileAnalyses = {}
+templateFileAnalysesLock = threading.Lock()
+
+def JCTemplateFileStat(templateEnvironment, templateFileName:str):
+    """
+    Finds the template file in search path of the loader, in the same order as the loader does
+    Returns file name and modified time of the file,
+        None, None when the loader does not have search path or the file is not found
+    """
+    import stat
+    from jinja2 import exceptions, loaders
+    searchPath = getattr(templateEnvironment.loader, 'searchpath', None)
+    if searchPath == None:
+        return None, None
+    try:
+        pieces = loaders.split_template_path(templateFileName)
+    except exceptions.TemplateNotFound:
+        return None, None
+    for pathName in searchPath:
+        fileName = os.path.join(pathName, *pieces)
+        try:
+            fileStat = os.stat(fileName)
+        except OSError:
+            continue
+        if stat.S_ISREG(fileStat.st_mode):
+            return fileName, fileStat.st_mtime_ns
+    return None, None
+
+def JCTemplateAssignedNames(nodeList):
+    """
+    Returns names assigned by set, import and from import statements in given template nodes,
+       statements within if are followed, those within macros, loops and blocks are local to those
+    """
+    from jinja2 import nodes
+    assignedNames = set()
+    for node in nodeList:
+        if isinstance(node, (nodes.Assign, nodes.AssignBlock)):
+            if isinstance(node.target, nodes.Name):
+                assignedNames.add(node.target.name)
+            else:
+                assignedNames.update(nameNode.name for nameNode in node.target.find_all(nodes.Name))
+        elif isinstance(node, nodes.Import):
+            assignedNames.add(node.target)
+        elif isinstance(node, nodes.FromImport):
+            for name in node.names:
+                assignedNames.add(name[1] if isinstance(name, tuple) else name)
+        elif isinstance(node, nodes.If):
+            assignedNames.update(JCTemplateAssignedNames(node.body + node.elif_ + node.else_))
+    return assignedNames
+
+def JCTemplateContextTemplates(parsedTemplate):
+    """
+    Returns names of templates included with context or extended by the template, those see the variables
+       assigned by the template
+    """
+    from jinja2 import nodes
+    contextTemplates = set()
+    for node in parsedTemplate.find_all((nodes.Include, nodes.Extends)):
+        if isinstance(node, nodes.Include) and node.with_context == False:
+            continue
+        if isinstance(node.template, nodes.Const):
+            templateNodes = [ node.template ]
+        elif isinstance(node.template, (nodes.Tuple, nodes.List)):
+            templateNodes = node.template.items
+        else:
+            continue
+        contextTemplates.update(templateNode.value for templateNode in templateNodes
+            if isinstance(templateNode, nodes.Const) and isinstance(templateNode.value, str))
+    return contextTemplates
+
+def JCTemplateAnalyzeFile(templateEnvironment, templateFileName:str):
+    """
+    Parses one template file, includes are not followed
+    Returns analysis of the file, cached till modified time of the file changes,
+       source of the file is read only when it is not in the cache or it changed
+    Raises jinja2 TemplateNotFound, TemplateSyntaxError
+    """
+    fileName, mtime = JCTemplateFileStat(templateEnvironment, templateFileName)
+    with templateFileAnalysesLock:
+        fileAnalysis = templateFileAnalyses.get(templateFileName)
+    if ( fileAnalysis != None and mtime != None and fileAnalysis['mtime'] == mtime
+         and fileAnalysis['fileName'] == fileName ):
+        return fileAnalysis
+
+    source, fileName, upToDate = templateEnvironment.loader.get_source(templateEnvironment, templateFileName)
+    if mtime == None:
+        ### loader without search path, file name known after reading the source
+        try:
+            mtime = os.stat(fileName).st_mtime_ns if fileName != None else None
+        except OSError:
+            mtime = None
+        if fileAnalysis != None and mtime != None and fileAnalysis['mtime'] == mtime:
+            return fileAnalysis
+
+    from jinja2 import meta, nodes
+    parsedTemplate = templateEnvironment.parse(source, templateFileName, fileName)
+    calledNames = set()
+    setVariables = set()
+    for callNode in parsedTemplate.find_all(nodes.Call):
+        if isinstance(callNode.node, nodes.Name):
+            calledNames.add(callNode.node.name)
+            if ( callNode.node.name == 'JCSetVariable' and len(callNode.args) > 0
+                 and isinstance(callNode.args[0], nodes.Const) ):
+                setVariables.add(callNode.args[0].value)
+    referencedTemplates = list(meta.find_referenced_templates(parsedTemplate))
+    fileAnalysis = {
+        'fileName': fileName,
+        'mtime': mtime,
+        'variables': meta.find_undeclared_variables(parsedTemplate),
+        'calledNames': calledNames,
+        'setVariables': setVariables,
+        'assignedNames': frozenset(JCTemplateAssignedNames(parsedTemplate.body)),
+        'referencedTemplates': [ name for name in referencedTemplates if name != None ],
+        'contextTemplates': JCTemplateContextTemplates(parsedTemplate),
+        'dynamicIncludes': None in referencedTemplates,
+        }
+    with templateFileAnalysesLock:
+        templateFileAnalyses[templateFileName] = fileAnalysis
+    return fileAnalysis
+
+def JCTemplateAnalyze(templateEnvironment, templateFileName:str, functionNames=None):
+    """
+    Analyzes the template and the templates it includes, imports or extends
+        functionNames - names of functions passed to the template, like keys of JCFunctions
+    Returns analysis dictionary, None if the template or an included template can not be read or parsed,
+        render reports that error
+    """
+    from jinja2 import exceptions
+    if functionNames == None:
+        functionNames = []
+    analysis = { 'variables': set(), 'functions': set(), 'setVariables': set(), 'templates': set(),
+        'dynamicIncludes': False, 'callsSetVariable': False }
+    calledNames = set()
+    ### template name and names assigned by the templates including it with context
+    pendingTemplates = [ (templateFileName, frozenset()) ]
+    analyzedTemplates = set()
+    while len(pendingTemplates) > 0:
+        tempTemplateFileName, parentNames = pendingTemplates.pop()
+        if (tempTemplateFileName, parentNames) in analyzedTemplates:
+            continue
+        analyzedTemplates.add((tempTemplateFileName, parentNames))
+        analysis['templates'].add(tempTemplateFileName)
+        try:
+            fileAnalysis = JCTemplateAnalyzeFile(templateEnvironment, tempTemplateFileName)
+        except (exceptions.TemplateError, OSError):
+            return None
+        analysis['variables'].update(fileAnalysis['variables'] - parentNames)
+        analysis['setVariables'].update(fileAnalysis['setVariables'])
+        calledNames.update(fileAnalysis['calledNames'])
+        if fileAnalysis['dynamicIncludes'] == True:
+            analysis['dynamicIncludes'] = True
+        contextNames = parentNames | fileAnalysis['assignedNames']
+        for referencedTemplateName in fileAnalysis['referencedTemplates']:
+            if referencedTemplateName in fileAnalysis['contextTemplates']:
+                pendingTemplates.append((referencedTemplateName, contextNames))
+            else:
+                pendingTemplates.append((referencedTemplateName, frozenset()))
+
+    analysis['functions'] = set(name for name in calledNames if name in functionNames)
+    analysis['callsSetVariable'] = ('JCSetVariable' in calledNames)
+    ### function names are read as variables too, keep variables only
+    analysis['variables'] -= set(functionNames)
+    return analysis
+
+def JCTemplateMissingVariables(analysis:dict, templateVariables:dict, templateGlobals):
+    """
+    Returns sorted list of variables read by the template that are not in templateVariables or templateGlobals
+    Variables set by JCSetVariable() within the template or included templates are not reported
+    """
+    return sorted(variableName for variableName in analysis['variables']
+        if variableName not in templateVariables and variableName not in templateGlobals
+            and variableName not in analysis['setVariables'])
+
+def JCTemplateFormatVariables(templateVariables:dict, variableNames=None):
+    """
+    Returns values of variables in name: value lines sorted by name, used in error messages
+    variableNames - names to include, None to include all variables
+    """
+    if variableNames == None:
+        variableNames = templateVariables.keys()
+    formattedVariables = ''
+    for key in sorted(variableNames):
+        if key in templateVariables:
+            formattedVariables += "{0}: {1}\n".format(key, templateVariables[key])
+    return formattedVariables
+
+if __name__ == '__main__':
+    import sys
+    import JCGlobalLib
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    if argsPassed.get('-c') != 'check':
+        print("""
+    python3 JCTemplateAnalysis.py -c check
+        checks analysis of sample templates, exits with status 1 on mismatch
+    """)
+        sys.exit()
+    from jinja2 import DictLoader, Environment
+    ### template name: source, template name: variables expected to be reported as read
+    checkTemplates = {
+        'Parent.conf': '{% set localVar = "v" %}{% include "Child.inc" %}',
+        'Child.inc': 'child={{ localVar }} host={{ JCHostName }}',
+        'NoContext.conf': '{% set localVar = "v" %}{% include "Child.inc" without context %}',
+        'Import.conf': '{% import "Macros.inc" as macros %}{% from "Macros.inc" import show as display %}'
+            '{% include "UseImport.inc" %}',
+        'Macros.inc': '{% macro show(value) %}{{ value }}{% endmacro %}',
+        'UseImport.inc': '{{ macros.show(JCHostName) }}{{ display(siteName) }}',
+        'Loop.conf': '{% for item in items %}{% set loopVar = item %}{% endfor %}{% include "Loop.inc" %}',
+        'Loop.inc': '{{ loopVar }}',
+        }
+    expectedVariables = {
+        'Parent.conf': {'JCHostName'},
+        'NoContext.conf': {'JCHostName', 'localVar'},
+        'Import.conf': {'JCHostName', 'siteName'},
+        'Loop.conf': {'items', 'loopVar'},
+        }
+    checkEnvironment = Environment(loader=DictLoader(checkTemplates))
+    exitStatus = 0
+    for checkTemplateName, variableNames in sorted(expectedVariables.items()):
+        checkAnalysis = JCTemplateAnalyze(checkEnvironment, checkTemplateName)
+        if checkAnalysis == None or checkAnalysis['variables'] != variableNames:
+            print("ERROR JCTemplateAnalysis() template:{0}, variables expected:{1}, found:{2}".format(
+                checkTemplateName, sorted(variableNames),
+                sorted(checkAnalysis['variables']) if checkAnalysis != None else None))
+            exitStatus = 1
+        else:
+            print("INFO JCTemplateAnalysis() template:{0}, variables:{1}".format(checkTemplateName, sorted(variableNames)))
+    sys.exit(exitStatus)
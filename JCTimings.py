@@ -0,0 +1,242 @@
+"""
+This module collects per phase timings of a JCConfigGen run and writes the run report in JSON form
+
+    JCTimingsEnable() - start collecting timings, nothing is collected until this is called
+    JCTimer(name, category, spanName, spanCategory, spanArgs) - context manager, measures wall and CPU time of the code
+        block under given category
+        category 'phase' - execution phase of JCConfigGen like OS detection, log purge, environment render
+        category 'template' - template render, one entry per template
+        category 'write' - config file write, one entry per template
+        category 'call' - JCGlobalLib function calls, DNS lookups and commands run by templates
+    JCTimingsAddOutputBytes(name, outputBytes) - adds the size of output written for the template
+    JCTimingsCount(cacheName, hit) - counts cache hits and misses
+    JCTimingsReport() - returns the run report in dictionary form
+    JCTimingsWriteReport(fileName, extraInfo) - writes the run report to the file in JSON form
+    JCTimingsSummary() - returns one line summary of the run report
+    JCTimingsHistograms() - returns count of wall times within each of JCTimingsBuckets per category and name
+
+Wall time is measured using monotonic clock, CPU time is measured using the CPU time of calling thread.
+When tracing is enabled, JCTimer() also records the code block as a span in the trace, named spanName under
+   spanCategory when passed.
+"""
+import threading
+import time
+
+import JCTrace
+
+timingsEnabled = False
+
+### category -> name -> {'count', 'wallTime', 'cpuTime', 'outputBytes'}
+timings = {}
+### cache name -> {'hits', 'misses'}
+cacheCounters = {}
+### upper bounds of wall time buckets in seconds, for histograms
+JCTimingsBuckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+### category -> name -> count of wall times in each bucket, last count is for wall times above last bucket
+timingsBuckets = {}
+timingsLock = threading.Lock()
+
+### run start, used to compute total wall time and CPU time of the run
+runStartWallTime = time.monotonic()
+runStartCPUTime = time.process_time()
+
+class JCNullTimer:
+    """
+    timer used when timings are not enabled, does nothing
+    """
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+nullTimer = JCNullTimer()
+
+class JCPhaseTimer:
+    """
+    measures wall time and CPU time of the code block, adds it to timings of given category and name
+    """
+    __slots__ = ('name', 'category', 'startWallTime', 'startCPUTime', 'span')
+
+    def __init__(self, name, category, spanName=None, spanCategory=None, spanArgs=None):
+        self.name = name
+        self.category = category
+        self.span = JCTrace.JCTraceSpan(spanName if spanName != None else name,
+            spanCategory if spanCategory != None else category, spanArgs)
+
+    def __enter__(self):
+        self.span.__enter__()
+        self.startWallTime = time.monotonic()
+        self.startCPUTime = time.thread_time()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        JCTimingsAdd(self.name, self.category,
+            time.monotonic() - self.startWallTime,
+            time.thread_time() - self.startCPUTime)
+        self.span.__exit__(excType, excValue, traceback)
+        return False
+
+def JCTimingsEnable():
+    """
+    Enables collection of timings, resets timings collected so far
+    """
+    global timingsEnabled
+    with timingsLock:
+        timings.clear()
+        cacheCounters.clear()
+        timingsBuckets.clear()
+    timingsEnabled = True
+
+def JCTimer(name:str, category='phase', spanName=None, spanCategory=None, spanArgs=None):
+    """
+    Returns context manager measuring the time spent in the code block
+        spanName, spanCategory, spanArgs - name, category, args of trace span, default to name and category
+    When timings and tracing are not enabled, returns a timer that does nothing
+
+    Example:
+        with JCTimings.JCTimer('osDetection'):
+            OSType, OSName, OSVersion = JCGlobalLib.JCGetOSInfo(sys.version_info, debugLevel)
+    """
+    if timingsEnabled == False and JCTrace.traceEnabled == False:
+        return nullTimer
+    return JCPhaseTimer(name, category, spanName, spanCategory, spanArgs)
+
+def JCTimingsGetEntry(name:str, category:str):
+    """
+    Returns timings entry of given category and name, creates it if not present yet
+    Call this with timingsLock held
+    """
+    categoryTimings = timings.get(category)
+    if categoryTimings == None:
+        categoryTimings = timings[category] = {}
+    entry = categoryTimings.get(name)
+    if entry == None:
+        entry = categoryTimings[name] = {'count': 0, 'wallTime': 0.0, 'cpuTime': 0.0}
+    return entry
+
+def JCTimingsAdd(name:str, category:str, wallTime:float, cpuTime:float):
+    """
+    Adds wall time and CPU time to the timings of given category and name
+    """
+    if timingsEnabled == False:
+        return
+    import bisect
+    with timingsLock:
+        entry = JCTimingsGetEntry(name, category)
+        entry['count'] += 1
+        entry['wallTime'] += wallTime
+        entry['cpuTime'] += cpuTime
+        categoryBuckets = timingsBuckets.get(category)
+        if categoryBuckets == None:
+            categoryBuckets = timingsBuckets[category] = {}
+        buckets = categoryBuckets.get(name)
+        if buckets == None:
+            buckets = categoryBuckets[name] = [0] * (len(JCTimingsBuckets) + 1)
+        buckets[bisect.bisect_left(JCTimingsBuckets, wallTime)] += 1
+
+def JCTimingsAddOutputBytes(name:str, outputBytes:int, category='template'):
+    """
+    Adds the size of output generated to the timings of given category and name
+    """
+    if timingsEnabled == False:
+        return
+    with timingsLock:
+        entry = JCTimingsGetEntry(name, category)
+        entry['outputBytes'] = entry.get('outputBytes', 0) + outputBytes
+
+def JCTimingsCount(cacheName:str, hit:bool):
+    """
+    Counts cache hit if hit is True, else cache miss
+    """
+    if timingsEnabled == False:
+        return
+    with timingsLock:
+        counter = cacheCounters.get(cacheName)
+        if counter == None:
+            counter = cacheCounters[cacheName] = {'hits': 0, 'misses': 0}
+        if hit == True:
+            counter['hits'] += 1
+        else:
+            counter['misses'] += 1
+
+def JCTimingsReport(extraInfo=None):
+    """
+    Returns the run report in dictionary form
+        wallTime, cpuTime - total run time till now
+        phases, templates, writes, calls - timings per category
+        outputBytes - total output size
+        caches - hits, misses per cache, present only if caches were used
+    extraInfo dictionary, if passed, is added to the report as is
+    """
+    report = {}
+    if extraInfo != None:
+        report.update(extraInfo)
+    report['wallTime'] = round(time.monotonic() - runStartWallTime, 6)
+    report['cpuTime'] = round(time.process_time() - runStartCPUTime, 6)
+
+    totalOutputBytes = 0
+    with timingsLock:
+        for category, categoryTimings in timings.items():
+            reportCategory = report[category + 's'] = {}
+            for name, entry in categoryTimings.items():
+                reportEntry = reportCategory[name] = dict(entry)
+                reportEntry['wallTime'] = round(entry['wallTime'], 6)
+                reportEntry['cpuTime'] = round(entry['cpuTime'], 6)
+                totalOutputBytes += entry.get('outputBytes', 0)
+        if len(cacheCounters) > 0:
+            report['caches'] = {}
+            for cacheName, counter in cacheCounters.items():
+                reportCounter = report['caches'][cacheName] = dict(counter)
+                lookups = counter['hits'] + counter['misses']
+                if lookups > 0:
+                    reportCounter['hitRatio'] = round(counter['hits'] / lookups, 4)
+    report['outputBytes'] = totalOutputBytes
+    return report
+
+def JCTimingsWriteReport(fileName:str, extraInfo=None):
+    """
+    Writes the run report to given file in JSON form
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    import json
+    report = JCTimingsReport(extraInfo)
+    try:
+        with open(fileName, "w") as reportFile:
+            json.dump(report, reportFile, indent=2, sort_keys=True)
+            reportFile.write('\n')
+    except OSError as err:
+        return False, "ERROR JCTimingsWriteReport() Can not write timings report file:{0}, OS error:{1}".format(fileName, err)
+    return True, ''
+
+def JCTimingsSummary():
+    """
+    Returns one line summary of timings like
+        wall:0.512s cpu:0.431s, slowest phase:environmentRender 0.201s, templates:2 in 0.090s, output bytes:2345
+    """
+    report = JCTimingsReport()
+    summary = "wall:{0:.3f}s cpu:{1:.3f}s".format(report['wallTime'], report['cpuTime'])
+    phases = report.get('phases', {})
+    if len(phases) > 0:
+        slowestPhase = max(phases, key=lambda name: phases[name]['wallTime'])
+        summary += ", slowest phase:{0} {1:.3f}s".format(slowestPhase, phases[slowestPhase]['wallTime'])
+    templates = report.get('templates', {})
+    summary += ", templates:{0} in {1:.3f}s".format(
+        sum(entry['count'] for entry in templates.values()),
+        sum(entry['wallTime'] for entry in templates.values()))
+    summary += ", output bytes:{0}".format(report['outputBytes'])
+    for cacheName, counter in report.get('caches', {}).items():
+        summary += ", {0} hits:{1} misses:{2}".format(cacheName, counter['hits'], counter['misses'])
+    return summary
+
+def JCTimingsHistograms():
+    """
+    Returns { category: { name: [ count of wall times <= each of JCTimingsBuckets ..., count above last bucket ] } },
+       counts are per bucket, not cumulative
+    """
+    with timingsLock:
+        return dict((category, dict((name, list(buckets)) for name, buckets in categoryBuckets.items()))
+            for category, categoryBuckets in timingsBuckets.items())
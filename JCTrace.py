@@ -0,0 +1,167 @@
+"""
+This module records timeline of a JCConfigGen run in Chrome trace event format
+The trace file can be viewed using chrome://tracing or https://ui.perfetto.dev
+
+    JCTraceEnable(fileName) - start recording spans, nothing is recorded until this is called
+    JCTraceSpan(name, category, args) - context manager, records the code block as one complete event
+        categories used - host, phase, template, write, command, dns, compare
+    JCTraceStart(name, category, args), JCTraceStop(span) - same as JCTraceSpan() where a code block can't be used
+    JCTraceFunction(category, argName, argKey) - decorator, records each call of the function as a span
+    JCTraceWrite() - writes recorded events to the trace file
+
+When tracing is not enabled, JCTraceSpan() returns a shared span object that does nothing so that
+   the cost of tracing calls left in the code is a function call and a flag check.
+"""
+import os
+import threading
+import time
+
+traceEnabled = False
+traceFileName = None
+
+### recorded events, list.append() is atomic, no lock needed while recording
+traceEvents = []
+traceStartTime = time.perf_counter()
+processId = os.getpid()
+
+if hasattr(threading, 'get_native_id'):
+    JCTraceThreadId = threading.get_native_id
+else:
+    JCTraceThreadId = threading.get_ident
+
+class JCNullSpan:
+    """
+    span used when tracing is not enabled, does nothing
+    """
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+nullSpan = JCNullSpan()
+
+class JCSpan:
+    """
+    records one complete event (ph X) with start time, duration, process id and thread id
+    """
+    __slots__ = ('name', 'category', 'args', 'startTime')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.startTime = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        endTime = time.perf_counter()
+        event = {
+            'name': self.name,
+            'cat': self.category,
+            'ph': 'X',
+            'ts': round((self.startTime - traceStartTime) * 1000000, 3),
+            'dur': round((endTime - self.startTime) * 1000000, 3),
+            'pid': processId,
+            'tid': JCTraceThreadId(),
+            }
+        if self.args != None:
+            event['args'] = self.args
+        if excType != None:
+            event.setdefault('args', {})['error'] = str(excType.__name__)
+        traceEvents.append(event)
+        return False
+
+def JCTraceEnable(fileName:str):
+    """
+    Enables recording of spans, events are written to fileName by JCTraceWrite()
+    """
+    global traceEnabled, traceFileName
+    traceFileName = fileName
+    del traceEvents[:]
+    traceEnabled = True
+
+def JCTraceSpan(name:str, category:str, args=None):
+    """
+    Returns context manager recording the code block as a span
+    When tracing is not enabled, returns a span that does nothing
+
+    Example:
+        with JCTrace.JCTraceSpan(templateFileName, 'template'):
+            outputText = tempTemplate.render(defaultParameters)
+    """
+    if traceEnabled == False:
+        return nullSpan
+    return JCSpan(name, category, args)
+
+def JCTraceStart(name:str, category:str, args=None):
+    """
+    Starts a span, returns span object to be passed to JCTraceStop()
+    """
+    span = JCTraceSpan(name, category, args)
+    span.__enter__()
+    return span
+
+def JCTraceStop(span):
+    """
+    Ends the span started by JCTraceStart()
+    """
+    span.__exit__(None, None, None)
+
+def JCTraceFunction(category:str, argName:str, argKey=None):
+    """
+    Returns decorator recording each call of the function as a span named after the function
+    Value of the argument argName of the call is recorded under argKey, defaults to argName
+
+    Example:
+        @JCTrace.JCTraceFunction('command', 'command')
+        def JCExecuteCommand(shell:str, command:str, debugLevel:int, ...):
+    """
+    import functools
+
+    def JCTraceDecorator(function):
+        argIndex = function.__code__.co_varnames.index(argName)
+
+        @functools.wraps(function)
+        def JCTraceWrapper(*args, **kwargs):
+            if traceEnabled == False:
+                return function(*args, **kwargs)
+            argValue = args[argIndex] if argIndex < len(args) else kwargs.get(argName)
+            with JCSpan(function.__name__, category, {argKey if argKey != None else argName: argValue}):
+                return function(*args, **kwargs)
+        return JCTraceWrapper
+    return JCTraceDecorator
+
+def JCTraceWrite():
+    """
+    Writes recorded events to trace file in Chrome trace event JSON format
+    Thread names are added as metadata events so that worker threads can be identified in the viewer
+
+    Returns
+        returnStatus - True on success, False on failure
+        errorMsg - error message on failure
+    """
+    if traceEnabled == False or traceFileName == None:
+        return True, ''
+
+    import json
+    events = list(traceEvents)
+    threadNames = {}
+    for thread in threading.enumerate():
+        if hasattr(thread, 'native_id') and thread.native_id != None:
+            threadNames[thread.native_id] = thread.name
+        else:
+            threadNames[thread.ident] = thread.name
+    events.append({'name': 'process_name', 'ph': 'M', 'pid': processId, 'tid': 0,
+        'args': {'name': 'JCConfigGen'}})
+    for threadId in sorted(set(event['tid'] for event in events)):
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': processId, 'tid': threadId,
+            'args': {'name': threadNames.get(threadId, 'thread-{0}'.format(threadId))}})
+    try:
+        with open(traceFileName, "w") as traceFile:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, traceFile)
+    except OSError as err:
+        return False, "ERROR JCTraceWrite() Can not write trace file:{0}, OS error:{1}".format(traceFileName, err)
+    return True, ''
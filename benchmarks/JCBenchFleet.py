@@ -0,0 +1,154 @@
+"""
+End to end benchmark of JCConfigGen over a synthetic fleet
+
+Generates synthetic environment spec using JCBenchGenerateSpec.py, runs JCConfigGen.py for every host
+  in the generated host list and measures
+    hostsPerSecond - hosts rendered per second, end to end including process start
+    configsPerSecond - config files generated per second
+    wallSeconds - total time taken to render all hosts
+    coldStartSeconds - median time taken by a new JCConfigGen process to render one host
+    peakRSSKB - peak resident memory of JCConfigGen processes in KB (not available on Windows)
+    failedHosts - number of hosts where JCConfigGen failed or config file was not generated
+
+Results are saved in JSON form so that runs can be compared to a saved baseline.
+
+Parameters passed:
+    [-o <workDir>] - directory where the spec is generated and configs are written, defaults to new temp directory
+    [-H <hosts>] [-c <components>] [-e <environments>] [-v <variablesPerSection>] [-i <includeDepth>]
+    [-s <templateLines>] [-t <templates>] - spec parameters, see JCBenchGenerateSpec.py, default is 20 hosts
+    [-n <coldStartRuns>] - number of single host runs to measure cold start time, defaults to 5
+    [-r <resultsFileName>] - file where results are saved, defaults to <workDir>/JCBenchFleet.results.json
+    [-b <baselineFileName>] - results saved before, when passed, results are compared to it
+    [-p <maxRegressionPercent>] - fail if any metric is worse than baseline by more than this, defaults to 10
+
+    Exits with status 1 when a metric regressed by more than maxRegressionPercent or a host failed.
+
+Example:
+    python3 benchmarks/JCBenchFleet.py -H 50 -c 10 -e 4 -r fleet.json
+    python3 benchmarks/JCBenchFleet.py -H 50 -c 10 -e 4 -b fleet.json -p 15
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+benchmarkPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchmarkPath))
+sys.path.insert(0, benchmarkPath)
+import JCGlobalLib
+import JCBenchLib
+import JCBenchGenerateSpec
+
+JCConfigGenFileName = os.path.join(os.path.dirname(benchmarkPath), 'JCConfigGen.py')
+
+def JCBenchRunHost(specInfo, hostName:str):
+    """
+    Runs JCConfigGen.py for one host in a new process
+    Returns True if all config files were generated
+    """
+    command = [ sys.executable, JCConfigGenFileName,
+        '-t', ','.join(specInfo['templateFileNames']),
+        '-T', specInfo['templatePath'],
+        '-C', specInfo['configPath'],
+        '-e', specInfo['environmentFileName'],
+        '-s', '3',
+        '-h', hostName ]
+    environment = dict(os.environ)
+    ### interactive mode, log lines go to stdout which is discarded
+    environment['TERM'] = 'xterm'
+    result = subprocess.run(command, cwd=specInfo['outputDir'], env=environment,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if result.returncode != 0:
+        return False
+    for templateFileName in specInfo['templateFileNames']:
+        if os.path.isfile(os.path.join(specInfo['configPath'], "{0}.{1}".format(templateFileName, hostName))) == False:
+            return False
+    return True
+
+def JCBenchPeakRSSKB():
+    """
+    Returns peak resident memory of child processes in KB, None if not available on this platform
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxRSS = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == 'darwin':
+        ### macOS reports in bytes
+        maxRSS = maxRSS // 1024
+    return maxRSS
+
+def JCBenchFleet(specInfo, coldStartRuns:int):
+    """
+    Runs JCConfigGen for all hosts, returns results dictionary
+    """
+    hostNames = specInfo['hostNames']
+
+    coldStartTimes = []
+    for count in range(max(1, coldStartRuns)):
+        startTime = time.perf_counter()
+        JCBenchRunHost(specInfo, hostNames[0])
+        coldStartTimes.append(time.perf_counter() - startTime)
+    coldStartTimes.sort()
+
+    failedHosts = 0
+    startTime = time.perf_counter()
+    for hostName in hostNames:
+        if JCBenchRunHost(specInfo, hostName) == False:
+            failedHosts += 1
+    wallSeconds = time.perf_counter() - startTime
+
+    results = {
+        'hostsPerSecond': round(len(hostNames) / wallSeconds, 3),
+        'configsPerSecond': round(len(hostNames) * len(specInfo['templateFileNames']) / wallSeconds, 3),
+        'wallSeconds': round(wallSeconds, 4),
+        'coldStartSeconds': round(coldStartTimes[len(coldStartTimes) // 2], 4),
+        'failedHosts': failedHosts,
+        }
+    peakRSSKB = JCBenchPeakRSSKB()
+    if peakRSSKB != None:
+        results['peakRSSKB'] = peakRSSKB
+    return results
+
+if __name__ == '__main__':
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    if '-o' in argsPassed:
+        workDir = argsPassed['-o']
+    else:
+        workDir = tempfile.mkdtemp(prefix='JCBenchFleet.')
+
+    parameters = {
+        'hosts': int(argsPassed.get('-H', 20)),
+        'components': int(argsPassed.get('-c', 5)),
+        'environments': int(argsPassed.get('-e', 3)),
+        'variablesPerSection': int(argsPassed.get('-v', 10)),
+        'includeDepth': int(argsPassed.get('-i', 1)),
+        'templateLines': int(argsPassed.get('-s', 50)),
+        'templates': int(argsPassed.get('-t', 1)),
+        }
+    specInfo = JCBenchGenerateSpec.JCBenchGenerateSpec( workDir,
+        parameters['hosts'], parameters['components'], parameters['environments'],
+        parameters['variablesPerSection'], parameters['includeDepth'], parameters['templateLines'],
+        parameters['templates'])
+
+    results = JCBenchLib.JCBenchMakeResults('fleet', parameters,
+        JCBenchFleet(specInfo, int(argsPassed.get('-n', 5))))
+
+    print("JCConfigGen fleet benchmark, workDir:{0}".format(specInfo['outputDir']))
+    JCBenchLib.JCBenchPrintTable(sorted(results['results'].items()), ['metric', 'value'])
+
+    resultsFileName = argsPassed.get('-r', os.path.join(specInfo['outputDir'], 'JCBenchFleet.results.json'))
+    if JCBenchLib.JCBenchSaveResults(resultsFileName, results) == True:
+        print("Results saved to:{0}".format(resultsFileName))
+
+    exitStatus = 0
+    if results['results']['failedHosts'] > 0:
+        print("ERROR JCBenchFleet() JCConfigGen failed for {0} host(s)".format(results['results']['failedHosts']))
+        exitStatus = 1
+    if '-b' in argsPassed:
+        if JCBenchLib.JCBenchCheckBaseline(results, argsPassed['-b'], float(argsPassed.get('-p', 10))) == False:
+            exitStatus = 1
+    sys.exit(exitStatus)
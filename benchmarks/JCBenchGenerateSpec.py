@@ -0,0 +1,249 @@
+"""
+Generates synthetic environment spec, template and host list for benchmarking JCConfigGen
+
+The generated files are modeled on templates/JCEnvironment.yml and templates/WSConfig.xml
+    <outputDir>/templates/JCEnvironment.yml - includes OS, Component and Environment level definitions
+    <outputDir>/templates/OSLevelVariableDefinitions.yml
+    <outputDir>/templates/ComponentLevelVariableDefinitions.yml - includes ComponentLevelVariableDefinitions<n>.yml
+        files in a chain when include depth is more than 1, components are spread across the chain
+    <outputDir>/templates/EnvironmentLevelVariableDefinitions.yml - same as component level definitions
+    <outputDir>/templates/FleetConfig.xml - template with variable references, loops and conditions
+    <outputDir>/templates/FleetConfig<n>.xml - additional templates when more than one template is requested
+    <outputDir>/hosts.txt - one host name per line
+    <outputDir>/conf, <outputDir>/logs - config path and log file path used by the generated spec
+
+Host names are of the form <site><environment><component><number>, like aaadc0101
+    site - 3 characters, used as site name with siteNamePrefixLength of 3
+    environment - 1 character, matched by (...)(<environment>)(...)([0-9][0-9]) under Environment
+    component - 3 characters, c<nn>, matched by (...)(.)(<component>) under Component
+    number - 2 digits
+
+Parameters passed:
+    -o <outputDir> - directory where files are generated, mandatory
+    [-H <hosts>] - number of hosts, defaults to 10
+    [-c <components>] - number of component entries, defaults to 5, max 1296
+    [-e <environments>] - number of environment entries, defaults to 3, max 26
+    [-v <variablesPerSection>] - number of variables defined in each OS, Component and Environment entry, defaults to 10
+    [-i <includeDepth>] - 0 all definitions in JCEnvironment.yml, 1 include files like the sample spec (default),
+                          more than 1, chain of include files for Component and Environment definitions
+    [-s <templateLines>] - approximate number of lines in FleetConfig.xml template, defaults to 50
+    [-t <templates>] - number of templates, defaults to 1
+
+Example:
+    python3 benchmarks/JCBenchGenerateSpec.py -o /tmp/JCBench -H 100 -c 10 -e 4 -v 20 -i 2 -s 200
+"""
+import os
+import string
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import JCGlobalLib
+
+environmentFileName = 'JCEnvironment.yml'
+templateFileName = 'FleetConfig.xml'
+base36Digits = string.digits + string.ascii_lowercase
+
+def JCBenchComponentCode(index:int):
+    return 'c' + base36Digits[index // 36] + base36Digits[index % 36]
+
+def JCBenchSiteCode(index:int):
+    return ''.join(string.ascii_lowercase[(index // (26 ** position)) % 26] for position in (2, 1, 0))
+
+def JCBenchHostNames(numberOfHosts:int, numberOfComponents:int, numberOfEnvironments:int):
+    """
+    Returns list of host names spread across environments and components, then across sites
+    """
+    hostNames = []
+    hostsPerSite = numberOfEnvironments * numberOfComponents * 99
+    for index in range(numberOfHosts):
+        environmentCode = string.ascii_lowercase[index % numberOfEnvironments]
+        componentCode = JCBenchComponentCode( (index // numberOfEnvironments) % numberOfComponents )
+        hostNumber = (index // (numberOfEnvironments * numberOfComponents)) % 99 + 1
+        siteCode = JCBenchSiteCode( index // hostsPerSite )
+        hostNames.append("{0}{1}{2}{3:02d}".format(siteCode, environmentCode, componentCode, hostNumber))
+    return hostNames
+
+def JCBenchOSDefinitions(outputDir:str, variablesPerSection:int):
+    lines = ["OS:", "  Linux:", "    JCCommandShell: bash -c"]
+    lines.append("    JCHome: '{0}'".format(outputDir))
+    lines.append("    JCTemplatePath: '{0}/templates'".format(outputDir))
+    lines.append("    JCConfigPath: '{0}/conf'".format(outputDir))
+    lines.append("    JCLogFilePath: '{0}/logs'".format(outputDir))
+    for index in range(variablesPerSection):
+        lines.append("    OSVar{0}: linux-value-{0}".format(index))
+    lines += ["", "  All:", "    JCAddCommentToConfigHeader: 1", "    JCFileRetencyDurationInDays: 7"]
+    lines.append("    JCLogFilePath: '{0}/logs'".format(outputDir))
+    for index in range(variablesPerSection):
+        lines.append("    OSVar{0}: all-value-{0}".format(index))
+        lines.append("    AllVar{0}: {0}".format(index))
+    return lines
+
+def JCBenchComponentEntry(index:int, variablesPerSection:int):
+    componentCode = JCBenchComponentCode(index)
+    lines = ["  {0}:".format(componentCode.upper()), "    HostName: (...)(.)({0})".format(componentCode)]
+    for variableIndex in range(variablesPerSection):
+        lines.append("    CompVar{0}: {1}-value-{0}".format(variableIndex, componentCode))
+    lines.append("    ProxyHosts: [ '{0}Proxy1', '{0}Proxy2' ]".format(componentCode))
+    return lines
+
+def JCBenchEnvironmentEntry(index:int, variablesPerSection:int):
+    environmentCode = string.ascii_lowercase[index]
+    lines = ["   Env{0}:".format(environmentCode.upper()),
+        "     HostName: (...)({0})(...)([0-9][0-9])".format(environmentCode)]
+    for variableIndex in range(variablesPerSection):
+        lines.append("     EnvVar{0}: env{1}-value-{0}".format(variableIndex, environmentCode))
+    ### environment overrides one of the component level values
+    lines.append("     CompVar0: env{0}-override".format(environmentCode))
+    lines.append("     DBHosts: [ {{{{ JCSiteName }}}}db01, {{{{ JCSiteName }}}}db0{0} ]".format(index % 9 + 2))
+    return lines
+
+def JCBenchSectionFiles(sectionName:str, entries, allEntry, includeDepth:int):
+    """
+    Returns dictionary of fileName: lines for the section
+    When includeDepth is more than 1, entries are spread across chain of include files
+    """
+    fileName = "{0}LevelVariableDefinitions.yml".format(sectionName)
+    files = {}
+    if includeDepth <= 1:
+        files[fileName] = [sectionName + ':'] + [line for entry in entries for line in entry] + allEntry
+        return files
+
+    chainLength = includeDepth - 1
+    entriesPerFile = (len(entries) + chainLength) // (chainLength + 1)
+    currentFileName = fileName
+    currentLines = [sectionName + ':']
+    for chainIndex in range(chainLength + 1):
+        for entry in entries[chainIndex * entriesPerFile: (chainIndex + 1) * entriesPerFile]:
+            currentLines += entry
+        if chainIndex < chainLength:
+            nextFileName = "{0}LevelVariableDefinitions{1}.yml".format(sectionName, chainIndex + 1)
+            currentLines.append('{{% include "{0}" %}}'.format(nextFileName))
+            files[currentFileName] = currentLines
+            currentFileName = nextFileName
+            currentLines = []
+    ### All entry is kept at the end as in the sample spec
+    files[currentFileName] = currentLines + allEntry
+    return files
+
+def JCBenchTemplate(templateLines:int, variablesPerSection:int, templateIndex=1):
+    """
+    Returns template lines modeled on WSConfig.xml
+    """
+    lines = [
+        "{#",
+        "Synthetic template {0} generated by JCBenchGenerateSpec.py".format(templateIndex),
+        "#}",
+        "{% if JCAddCommentToConfigHeader > 0 %}",
+        "<!-- ",
+        "This config file was generated using JCConfigGen tool on {{ JCDateTime }} by passing following parameters",
+        "python3 JCConfigGen.py {{ JCCommand }}",
+        "-->",
+        "{% endif %}",
+        "<hostName>{{ JCHostName }}</hostName>",
+        "<siteName>{{ JCSiteName }}</siteName>",
+        ]
+    variableIndex = step = 0
+    while len(lines) < templateLines:
+        kind = step % 5
+        step += 1
+        if kind == 0:
+            lines.append("<compParam{0}>{{{{ CompVar{0} }}}}</compParam{0}>".format(variableIndex))
+        elif kind == 1:
+            lines.append("<envParam{0}>{{{{ EnvVar{0} }}}}</envParam{0}>".format(variableIndex))
+        elif kind == 2:
+            lines.append("<osParam{0}>{{{{ OSVar{0} }}}}</osParam{0}>".format(variableIndex))
+        elif kind == 3:
+            lines.append("{% for item in ProxyHosts %}")
+            lines.append("ProxyPass {{ item }} http://{{ item }}:443/")
+            lines.append("{% endfor %}")
+        else:
+            lines.append("{{% if AllVar{0} > 0 %}}<allParam{0}>{{{{ AllVar{0} }}}}</allParam{0}>{{% endif %}}".format(variableIndex))
+            variableIndex = (variableIndex + 1) % max(variablesPerSection, 1)
+    lines.append("DBHosts: {{ DBHosts }}")
+    return lines
+
+def JCBenchGenerateSpec(outputDir:str, numberOfHosts=10, numberOfComponents=5, numberOfEnvironments=3,
+        variablesPerSection=10, includeDepth=1, templateLines=50, numberOfTemplates=1):
+    """
+    Generates environment spec, template(s) and host list under outputDir
+
+    Returns dictionary with
+        outputDir, templatePath, configPath, logFilePath, environmentFileName, templateFileNames, hostNames
+    """
+    numberOfComponents = max(1, min(numberOfComponents, 36 * 36))
+    numberOfEnvironments = max(1, min(numberOfEnvironments, 26))
+    variablesPerSection = max(1, variablesPerSection)
+    outputDir = os.path.abspath(outputDir)
+    templatePath = os.path.join(outputDir, 'templates')
+    for path in (outputDir, templatePath, os.path.join(outputDir, 'conf'), os.path.join(outputDir, 'logs')):
+        if os.path.exists(path) == False:
+            os.makedirs(path)
+
+    files = {}
+    files['OSLevelVariableDefinitions.yml'] = JCBenchOSDefinitions(outputDir, variablesPerSection)
+
+    componentAll = ["  All:"] + ["    CompVar{0}: default-value-{0}".format(index) for index in range(variablesPerSection)]
+    componentAll.append("    ProxyHosts: [ 'defaultProxy1' ]")
+    files.update( JCBenchSectionFiles('Component',
+        [ JCBenchComponentEntry(index, variablesPerSection) for index in range(numberOfComponents) ],
+        componentAll, includeDepth) )
+
+    environmentAll = ["   All:"] + ["     EnvVar{0}: default-value-{0}".format(index) for index in range(variablesPerSection)]
+    environmentAll.append("     DBHosts: [ {{ JCSiteName }}db01 ]")
+    files.update( JCBenchSectionFiles('Environment',
+        [ JCBenchEnvironmentEntry(index, variablesPerSection) for index in range(numberOfEnvironments) ],
+        environmentAll, includeDepth) )
+
+    environmentLines = ["# Synthetic environment spec generated by JCBenchGenerateSpec.py", "---", "Platform: Bench", ""]
+    for sectionName in ('OS', 'Component', 'Environment'):
+        sectionFileName = "{0}LevelVariableDefinitions.yml".format(sectionName)
+        if includeDepth == 0:
+            environmentLines += files.pop(sectionFileName)
+        else:
+            environmentLines.append('{{% include "{0}" %}}'.format(sectionFileName))
+        environmentLines.append("")
+    files[environmentFileName] = environmentLines
+    templateFileNames = []
+    for templateIndex in range(1, max(1, numberOfTemplates) + 1):
+        if templateIndex == 1:
+            tempTemplateFileName = templateFileName
+        else:
+            tempTemplateFileName = templateFileName.replace('.', '{0}.'.format(templateIndex), 1)
+        files[tempTemplateFileName] = JCBenchTemplate(templateLines, variablesPerSection, templateIndex)
+        templateFileNames.append(tempTemplateFileName)
+
+    for fileName, lines in files.items():
+        with open(os.path.join(templatePath, fileName), "w") as specFile:
+            specFile.write('\n'.join(lines) + '\n')
+
+    hostNames = JCBenchHostNames(numberOfHosts, numberOfComponents, numberOfEnvironments)
+    with open(os.path.join(outputDir, 'hosts.txt'), "w") as hostsFile:
+        hostsFile.write('\n'.join(hostNames) + '\n')
+
+    return {
+        'outputDir': outputDir,
+        'templatePath': templatePath,
+        'configPath': os.path.join(outputDir, 'conf'),
+        'logFilePath': os.path.join(outputDir, 'logs'),
+        'environmentFileName': environmentFileName,
+        'templateFileNames': templateFileNames,
+        'hostNames': hostNames,
+        }
+
+if __name__ == '__main__':
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    if '-o' not in argsPassed:
+        print(__doc__)
+        sys.exit()
+    specInfo = JCBenchGenerateSpec(
+        argsPassed['-o'],
+        int(argsPassed.get('-H', 10)),
+        int(argsPassed.get('-c', 5)),
+        int(argsPassed.get('-e', 3)),
+        int(argsPassed.get('-v', 10)),
+        int(argsPassed.get('-i', 1)),
+        int(argsPassed.get('-s', 50)),
+        int(argsPassed.get('-t', 1)))
+    print("Generated spec under:{0}, hosts:{1}, templates:{2}".format(
+        specInfo['outputDir'], len(specInfo['hostNames']), ','.join(specInfo['templateFileNames'])))
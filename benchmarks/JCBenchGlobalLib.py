@@ -0,0 +1,224 @@
+"""
+Microbenchmarks of JCGlobalLib functions called in tight loops
+
+Each function is timed with small, medium and large inputs generated offline under a temp directory,
+  no network or external commands are used.
+    JCYamlLoad - yaml file of 50, 500, 5000 lines
+    JCGatherEnvironmentSpecs - 10, 100, 1000 parameters
+    JCComparePatterns - text of 10, 100, 1000 lines, 3 compare patterns
+    JCDatamaskMaskLine - 5, 50, 500 datamask search strings
+    JCDataMaskFile - file of 100, 1000, 10000 lines
+    JCSubstituteVariableValues - 1, 10, 100 variables in the value
+    JCIsSupportedCommand - 1, 5, 25 commands in the command line
+    LogLine - 10, 1000, 10000 lines
+    JCFindModifiedFiles - directory with 10, 1000, 10000 files
+    JCFindModifiedFilesLatest - latest file in directory with 10, 1000, 10000 files
+
+Results are printed as a table and saved in JSON form with one metric per function and input size,
+  <functionName>.<size>.secondsPerCall, best of the timed repeats.
+
+Parameters passed:
+    [-r <resultsFileName>] - file where results are saved, defaults to JCBenchGlobalLib.results.json in temp directory
+    [-b <baselineFileName>] - results saved before, when passed, results are compared to it
+    [-p <maxRegressionPercent>] - fail if any function is slower than baseline by more than this, defaults to 20
+    [-f <functionName>] - run benchmarks of function names containing this string only
+    [-s <sizes>] - sizes to run in CSV form, defaults to small,medium,large
+
+    Exits with status 1 when a function got slower than baseline by more than maxRegressionPercent.
+
+Example:
+    python3 benchmarks/JCBenchGlobalLib.py -r baseline.json
+    python3 benchmarks/JCBenchGlobalLib.py -b baseline.json -p 15
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+benchmarkPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchmarkPath))
+sys.path.insert(0, benchmarkPath)
+import JCGlobalLib
+import JCBenchLib
+
+myColors = {
+    'red':      ['',"\033[31m",'<font color="red">'],
+    'green':    ['',"\033[32m",'<font color="green">'],
+    'yellow':   ['',"\033[33m",'<font color="yellow">'],
+    'blue':     ['',"\033[34m",'<font color="blue">'],
+    'magenta':  ['',"\033[35m",'<font color="magenta">'],
+    'cyan':     ['',"\033[36m",'<font color="cyan">'],
+    'clear':    ['',"\033[0m",'</font>'],
+    }
+colorIndex = 1
+
+### time each measurement for at least this long
+minimumMeasureSeconds = 0.05
+
+class JCNullFile:
+    def write(self, text):
+        return len(text)
+
+def JCBenchMakeYamlFile(fileName:str, numberOfLines:int):
+    lines = ["---", "LogFilePath: ./", "Platform: Bench"]
+    sectionIndex = 0
+    while len(lines) < numberOfLines:
+        lines.append("Section{0}:".format(sectionIndex))
+        for entryIndex in range(5):
+            lines.append("  Entry{0}:".format(entryIndex))
+            for keyIndex in range(8):
+                lines.append("    Key{0}: value-{1}-{2}-{0}".format(keyIndex, sectionIndex, entryIndex))
+        sectionIndex += 1
+    with open(fileName, "w") as yamlFile:
+        yamlFile.write('\n'.join(lines[:numberOfLines]) + '\n')
+
+def JCBenchMakeText(numberOfLines:int):
+    lines = []
+    for index in range(numberOfLines - 3):
+        lines.append("parameter{0} = value{0} # comment {0}".format(index))
+    lines += ["logFileSize = 1000000", "debugLevel = INFO", "logFileVersions = 9"]
+    return '\n'.join(lines[-numberOfLines:])
+
+def JCBenchMakeFiles(dirPath:str, numberOfFiles:int):
+    if os.path.exists(dirPath) == False:
+        os.makedirs(dirPath)
+    currentTime = time.time()
+    for index in range(numberOfFiles):
+        fileName = os.path.join(dirPath, "JCConfigGen.log.{0:06d}".format(index))
+        with open(fileName, "w") as logFile:
+            logFile.write("log line\n")
+        ### spread modified time over the last 30 days
+        modifiedTime = currentTime - (index % 30) * 86400 - index
+        os.utime(fileName, (modifiedTime, modifiedTime))
+
+def JCBenchCases(workDir:str, size:str):
+    """
+    Returns list of ( functionName, inputDescription, function ) for given size
+    Inputs are prepared before timing
+    """
+    sizeIndex = ['small', 'medium', 'large'].index(size)
+    cases = []
+
+    ### JCYamlLoad
+    numberOfLines = [50, 500, 5000][sizeIndex]
+    yamlFileName = os.path.join(workDir, "bench.{0}.yml".format(size))
+    JCBenchMakeYamlFile(yamlFileName, numberOfLines)
+    cases.append(('JCYamlLoad', "{0} lines".format(numberOfLines),
+        lambda: JCGlobalLib.JCYamlLoad(yamlFileName)))
+
+    ### JCGatherEnvironmentSpecs
+    numberOfParameters = [10, 100, 1000][sizeIndex]
+    values = dict(("Param{0}".format(index), "value{0}".format(index)) for index in range(numberOfParameters))
+    previousValues = dict(("Param{0}".format(index), "old{0}".format(index)) for index in range(0, numberOfParameters, 2))
+    cases.append(('JCGatherEnvironmentSpecs', "{0} parameters".format(numberOfParameters),
+        lambda: JCGlobalLib.JCGatherEnvironmentSpecs(False, values, 0, dict(previousValues), [], [])))
+
+    ### JCComparePatterns
+    numberOfLines = [10, 100, 1000][sizeIndex]
+    textBuffer = JCBenchMakeText(numberOfLines)
+    comparePatterns = {
+        r'logFileSize = (\d+)': {1: 1000000},
+        r'debugLevel = (\w+)': {1: 'INFO'},
+        r'logFileVersions = (\d+)': {1: 9},
+        }
+    cases.append(('JCComparePatterns', "{0} lines".format(numberOfLines),
+        lambda: JCGlobalLib.JCComparePatterns('bench', comparePatterns, None, textBuffer, False, 0,
+            myColors, colorIndex, None, '', 'Linux')))
+
+    ### JCDatamaskMaskLine
+    numberOfSearchStrings = [5, 50, 500][sizeIndex]
+    datamaskSpec = dict(("secret{0}".format(index), "****") for index in range(numberOfSearchStrings))
+    line = "user=admin password=secret3 token=secret4 host=dfwdws101 port=8443"
+    cases.append(('JCDatamaskMaskLine', "{0} search strings".format(numberOfSearchStrings),
+        lambda: JCGlobalLib.JCDatamaskMaskLine(line, datamaskSpec, 0, False, myColors, colorIndex, None, '', 'Linux')))
+
+    ### JCDataMaskFile
+    numberOfLines = [100, 1000, 10000][sizeIndex]
+    dataFileName = os.path.join(workDir, "bench.{0}.conf".format(size))
+    with open(dataFileName, "w") as dataFile:
+        dataFile.write(JCBenchMakeText(numberOfLines).replace('value1', 'password1') + '\n')
+    datamaskWords = ['password', 'secret', 'token', r'key\d+', 'passwd']
+    cases.append(('JCDataMaskFile', "{0} lines".format(numberOfLines),
+        lambda: JCGlobalLib.JCDataMaskFile(dataFileName, datamaskWords, 0, False, myColors, colorIndex, None, '', 'Linux')))
+
+    ### JCSubstituteVariableValues
+    numberOfVariables = [1, 10, 100][sizeIndex]
+    variables = dict(("var{0}".format(index), "value{0}".format(index)) for index in range(numberOfVariables))
+    attributeValue = ' '.join("{{{{ var{0} }}}}".format(index) for index in range(numberOfVariables))
+    cases.append(('JCSubstituteVariableValues', "{0} variables".format(numberOfVariables),
+        lambda: JCGlobalLib.JCSubstituteVariableValues(variables, attributeValue)))
+
+    ### JCIsSupportedCommand
+    numberOfCommands = [1, 5, 25][sizeIndex]
+    allowedCommands = ['cat', 'grep', 'awk', 'sed', 'cut', 'sort', 'uniq', 'wc', 'head', 'tail', 'rpm -qa', 'hostname']
+    allowedCommands += ["tool{0}".format(index) for index in range(100)]
+    commandLine = ' | '.join(["cat /etc/os-release", "grep 'VERSION_ID'", "awk -F'=' '{print $2}'", "sort", "uniq -c"][index % 5]
+        for index in range(numberOfCommands))
+    cases.append(('JCIsSupportedCommand', "{0} commands".format(numberOfCommands),
+        lambda: JCGlobalLib.JCIsSupportedCommand(commandLine, allowedCommands, 'Linux')))
+
+    ### LogLine
+    numberOfLines = [10, 1000, 10000][sizeIndex]
+    logLines = '\n'.join(["INFO JCConfigGen() line {0}", "ERROR JCConfigGen() line {0}", "< old {0}", "> new {0}",
+        "WARN JCConfigGen() line {0}", "plain line {0}"][index % 6].format(index) for index in range(numberOfLines))
+    nullFile = JCNullFile()
+    cases.append(('LogLine', "{0} lines".format(numberOfLines),
+        lambda: JCGlobalLib.LogLine(logLines, False, myColors, colorIndex, nullFile, '', True, 'Linux')))
+
+    ### JCFindModifiedFiles
+    numberOfFiles = [10, 1000, 10000][sizeIndex]
+    logFilePath = os.path.join(workDir, "logs.{0}".format(size))
+    JCBenchMakeFiles(logFilePath, numberOfFiles)
+    olderThanTime = time.time() - 7 * 86400
+    cases.append(('JCFindModifiedFiles', "{0} files".format(numberOfFiles),
+        lambda: JCGlobalLib.JCFindModifiedFiles(os.path.join(logFilePath, 'JCConfigGen.log*'), olderThanTime, 0, 'bench')))
+    cases.append(('JCFindModifiedFilesLatest', "{0} files".format(numberOfFiles),
+        lambda: JCGlobalLib.JCFindModifiedFiles(os.path.join(logFilePath, 'JCConfigGen.log*'), 0, 0, 'bench')))
+
+    return cases
+
+def JCBenchMeasure(function):
+    """
+    Calibrates number of calls so that each repeat takes at least minimumMeasureSeconds
+    Returns best time per call in seconds
+    """
+    startTime = time.perf_counter()
+    function()
+    singleCallTime = time.perf_counter() - startTime
+    number = max(1, int(minimumMeasureSeconds / max(singleCallTime, 1e-7)))
+    return JCBenchLib.JCBenchTime(function, repeat=5, number=number)
+
+if __name__ == '__main__':
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    functionFilter = argsPassed.get('-f', '')
+    sizes = list(map(str.strip, argsPassed.get('-s', 'small,medium,large').split(',')))
+
+    workDir = tempfile.mkdtemp(prefix='JCBenchGlobalLib.')
+    rows = []
+    metrics = {}
+    try:
+        for size in sizes:
+            for functionName, inputDescription, function in JCBenchCases(workDir, size):
+                if functionFilter not in functionName:
+                    continue
+                secondsPerCall = JCBenchMeasure(function)
+                metrics["{0}.{1}.secondsPerCall".format(functionName, size)] = secondsPerCall
+                rows.append([functionName, size, inputDescription, round(secondsPerCall * 1000000, 3)])
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    rows.sort(key=lambda row: (row[0], sizes.index(row[1])))
+    JCBenchLib.JCBenchPrintTable(rows, ['function', 'size', 'input', 'us per call'])
+
+    results = JCBenchLib.JCBenchMakeResults('globalLib', {'sizes': sizes, 'functionFilter': functionFilter}, metrics)
+    resultsFileName = argsPassed.get('-r', os.path.join(tempfile.gettempdir(), 'JCBenchGlobalLib.results.json'))
+    if JCBenchLib.JCBenchSaveResults(resultsFileName, results) == True:
+        print("Results saved to:{0}".format(resultsFileName))
+
+    exitStatus = 0
+    if '-b' in argsPassed:
+        if JCBenchLib.JCBenchCheckBaseline(results, argsPassed['-b'], float(argsPassed.get('-p', 20))) == False:
+            exitStatus = 1
+    sys.exit(exitStatus)
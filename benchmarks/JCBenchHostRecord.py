@@ -0,0 +1,125 @@
+"""
+Memory benchmark of parameters held for many hosts, dictionary per host compared to JCHostRecord
+
+Makes parameters of each host the way those are read, host name, site names, OS facts, IP address, component,
+  environment and paths, each value a new string as read from a file, and measures with tracemalloc
+    dictBytesPerHost.<hosts> - bytes per host when each host has a dictionary
+    recordBytesPerHost.<hosts> - bytes per host when each host has a JCHostRecord sharing one schema
+    recordMakeSecondsPerHost.<hosts> - time taken to make a record of a host, measured with tracemalloc on
+
+Memory saved by records is printed as percent of dictionary memory.
+Results are saved in JSON form so that runs can be compared to a saved baseline.
+
+Parameters passed:
+    [-s <hosts>] - number of hosts in CSV form, defaults to 10000,100000
+    [-r <resultsFileName>] - file where results are saved, defaults to JCBenchHostRecord.results.json in temp directory
+    [-b <baselineFileName>] - results saved before, when passed, results are compared to it
+    [-p <maxRegressionPercent>] - fail if any metric is worse than baseline by more than this, defaults to 20
+
+    Exits with status 1 when a metric regressed by more than maxRegressionPercent.
+
+Example:
+    python3 benchmarks/JCBenchHostRecord.py -r hostrecord.json
+    python3 benchmarks/JCBenchHostRecord.py -s 100000 -b hostrecord.json
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+benchmarkPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchmarkPath))
+sys.path.insert(0, benchmarkPath)
+import JCGlobalLib
+import JCBenchLib
+import JCHostRecord
+
+### sites, components and environments of the synthetic fleet
+siteNames = ['dfw', 'lax', 'ord', 'iad', 'sjc']
+componentNames = ['WS', 'AS', 'DB', 'MQ']
+environmentNames = ['Dev', 'Test', 'UAT', 'Prod']
+
+def JCBenchHostParameters(hostIndex:int):
+    """
+    Returns parameters of a host, values are new strings like those read from inventory and environment spec
+    """
+    siteName = siteNames[hostIndex % len(siteNames)]
+    componentName = componentNames[hostIndex % len(componentNames)]
+    environmentName = environmentNames[(hostIndex // 7) % len(environmentNames)]
+    hostName = "{0}{1}{2:06d}".format(siteName, componentName.lower(), hostIndex)
+    return {
+        'JCHostName': hostName,
+        'JCSiteName': hostName[:5],
+        'JCSiteName3Chars': hostName[:3],
+        'JCSiteName4Chars': hostName[:4],
+        'JCSiteName5Chars': hostName[:5],
+        'JCSiteName6Chars': hostName[:6],
+        'JCOSType': ''.join(['Li', 'nux']),
+        'JCOSName': ''.join(['Red Hat Enterprise ', 'Linux']),
+        'JCOSVersion': ''.join(['8.', '9']),
+        'IPAddress': "10.{0}.{1}.{2}".format(hostIndex // 65536, (hostIndex // 256) % 256, hostIndex % 256),
+        'Component': ''.join([componentName]),
+        'Environment': ''.join([environmentName]),
+        'JCCommandShell': ''.join(['/bin/bash ', '-c']),
+        'JCConfigPath': "/var/www/JaaduConfig/{0}/conf".format(componentName),
+        'JCTemplatePath': "/var/www/JaaduConfig/{0}/templates".format(componentName),
+        'JCLogFilePath': ''.join(['/var/www/JaaduConfig/', 'logs']),
+        'JCHTTPPort': int(''.join(['80', '80'])),
+        'JCDebug': False,
+        }
+
+def JCBenchMeasure(hostCount:int, makeRecord):
+    """
+    Makes parameters of hostCount hosts, keeps makeRecord(parameters) of each host
+    Returns bytes per host held after the parameters made are released, seconds per host
+    """
+    gc.collect()
+    tracemalloc.start()
+    startBytes = tracemalloc.get_traced_memory()[0]
+    startTime = time.perf_counter()
+    hostRecords = {}
+    for hostIndex in range(hostCount):
+        parameters = JCBenchHostParameters(hostIndex)
+        hostRecords[parameters['JCHostName']] = makeRecord(parameters)
+    elapsedSeconds = time.perf_counter() - startTime
+    gc.collect()
+    usedBytes = tracemalloc.get_traced_memory()[0] - startBytes
+    tracemalloc.stop()
+    del hostRecords
+    return usedBytes / hostCount, elapsedSeconds / hostCount
+
+if __name__ == '__main__':
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    hostCounts = [ int(hostCount) for hostCount in argsPassed.get('-s', '10000,100000').split(',') ]
+
+    metrics = {}
+    rows = []
+    for hostCount in hostCounts:
+        sizeName = "{0}k".format(hostCount // 1000) if hostCount % 1000 == 0 else str(hostCount)
+        dictBytes, dictSeconds = JCBenchMeasure(hostCount, lambda parameters: parameters)
+        ### new schema per run so that values interned by earlier run are not counted as shared
+        schema = JCHostRecord.JCHostSchema()
+        recordBytes, recordSeconds = JCBenchMeasure(hostCount,
+            lambda parameters: JCHostRecord.JCHostRecordMake(schema, parameters))
+        metrics['dictBytesPerHost.{0}'.format(sizeName)] = round(dictBytes, 1)
+        metrics['recordBytesPerHost.{0}'.format(sizeName)] = round(recordBytes, 1)
+        metrics['recordMakeSecondsPerHost.{0}'.format(sizeName)] = round(recordSeconds, 8)
+        rows.append([ hostCount, round(dictBytes), round(recordBytes),
+            round(100 * (dictBytes - recordBytes) / dictBytes, 1), round(recordSeconds * 1000000, 2) ])
+
+    print("Bytes per host of parameters held for many hosts")
+    JCBenchLib.JCBenchPrintTable(rows, ['hosts', 'dict bytes', 'record bytes', 'saving %', 'us per record'])
+    results = JCBenchLib.JCBenchMakeResults('hostRecord', {'hosts': hostCounts}, metrics)
+
+    resultsFileName = argsPassed.get('-r', os.path.join(tempfile.gettempdir(), 'JCBenchHostRecord.results.json'))
+    if JCBenchLib.JCBenchSaveResults(resultsFileName, results) == True:
+        print("Results saved to:{0}".format(resultsFileName))
+
+    exitStatus = 0
+    if '-b' in argsPassed:
+        if JCBenchLib.JCBenchCheckBaseline(results, argsPassed['-b'], float(argsPassed.get('-p', 20))) == False:
+            exitStatus = 1
+    sys.exit(exitStatus)
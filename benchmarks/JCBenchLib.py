@@ -0,0 +1,150 @@
+"""
+This module contains functions shared by the benchmarks
+
+    JCBenchTime(function, repeat, number) - returns best time per call in seconds
+    JCBenchSaveResults(fileName, results) - saves benchmark results in JSON form
+    JCBenchLoadResults(fileName) - reads benchmark results saved before
+    JCBenchCompare(results, baselineResults, maxRegressionPercent) - compares results to baseline, returns regressions
+    JCBenchPrintTable(rows, columnNames) - prints rows as a table
+
+Benchmark results are stored in the form
+    {
+      "benchmark": <benchmark name>,
+      "parameters": { <parameters used> },
+      "python": <python version>, "platform": <platform>, "dateTime": <UTC date time>,
+      "results": { <metric name>: <value>, ... }
+    }
+
+Metric names ending with PerSecond are better when higher, all other metrics (time, memory) are better when lower.
+"""
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import JCGlobalLib
+
+def JCBenchTime(function, repeat=5, number=1):
+    """
+    Calls function() number times in a loop, repeats the loop repeat times
+    Returns best time per call in seconds
+    """
+    bestTime = None
+    for count in range(repeat):
+        startTime = time.perf_counter()
+        for index in range(number):
+            function()
+        elapsedTime = (time.perf_counter() - startTime) / number
+        if bestTime == None or elapsedTime < bestTime:
+            bestTime = elapsedTime
+    return bestTime
+
+def JCBenchMakeResults(benchmarkName:str, parameters:dict, results:dict):
+    """
+    Returns results dictionary in the form stored by JCBenchSaveResults()
+    """
+    return {
+        'benchmark': benchmarkName,
+        'parameters': parameters,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dateTime': JCGlobalLib.UTCDateTime(),
+        'results': results,
+        }
+
+def JCBenchSaveResults(fileName:str, results:dict):
+    """
+    Saves benchmark results to fileName in JSON form
+    Returns True on success, False on failure
+    """
+    try:
+        with open(fileName, "w") as resultsFile:
+            json.dump(results, resultsFile, indent=2, sort_keys=True)
+            resultsFile.write('\n')
+    except OSError as err:
+        print("ERROR JCBenchSaveResults() Can not write results file:{0}, OS error:{1}".format(fileName, err))
+        return False
+    return True
+
+def JCBenchLoadResults(fileName:str):
+    """
+    Reads benchmark results saved by JCBenchSaveResults()
+    Returns results dictionary, None if file could not be read
+    """
+    try:
+        with open(fileName, "r") as resultsFile:
+            return json.load(resultsFile)
+    except (OSError, ValueError) as err:
+        print("ERROR JCBenchLoadResults() Can not read results file:{0}, error:{1}".format(fileName, err))
+        return None
+
+def JCBenchIsHigherBetter(metricName:str):
+    """
+    Returns True if higher value of the metric is better
+    """
+    return metricName.endswith('PerSecond')
+
+def JCBenchCompare(results:dict, baselineResults:dict, maxRegressionPercent:float):
+    """
+    Compares each metric in results['results'] to the same metric in baselineResults['results']
+
+    Returns list of rows [ metricName, baselineValue, currentValue, changePercent, status ]
+        changePercent is +ve when the metric got worse
+        status is REGRESSION when the metric got worse by more than maxRegressionPercent, else PASS
+        metrics not present in baseline are reported with status NEW
+    """
+    rows = []
+    baselineMetrics = baselineResults.get('results', {})
+    for metricName, currentValue in sorted(results.get('results', {}).items()):
+        if not isinstance(currentValue, (int, float)):
+            continue
+        baselineValue = baselineMetrics.get(metricName)
+        if not isinstance(baselineValue, (int, float)):
+            rows.append([metricName, '', currentValue, '', 'NEW'])
+            continue
+        if baselineValue == 0:
+            changePercent = 0.0
+        elif JCBenchIsHigherBetter(metricName):
+            changePercent = (baselineValue - currentValue) * 100.0 / baselineValue
+        else:
+            changePercent = (currentValue - baselineValue) * 100.0 / baselineValue
+        if changePercent > maxRegressionPercent:
+            status = 'REGRESSION'
+        else:
+            status = 'PASS'
+        rows.append([metricName, baselineValue, currentValue, round(changePercent, 2), status])
+    return rows
+
+def JCBenchFormatValue(value):
+    if isinstance(value, float):
+        return "{0:.6g}".format(value)
+    return str(value)
+
+def JCBenchPrintTable(rows, columnNames):
+    """
+    Prints rows as a table with left aligned columns
+    """
+    tableRows = [ list(map(str, columnNames)) ] + [ list(map(JCBenchFormatValue, row)) for row in rows ]
+    columnWidths = [ max(len(row[index]) for row in tableRows) for index in range(len(columnNames)) ]
+    for rowIndex, row in enumerate(tableRows):
+        print('  '.join(value.ljust(columnWidths[index]) for index, value in enumerate(row)).rstrip())
+        if rowIndex == 0:
+            print('  '.join('-' * width for width in columnWidths))
+
+def JCBenchCheckBaseline(results:dict, baselineFileName:str, maxRegressionPercent:float):
+    """
+    Compares results to the baseline stored in baselineFileName, prints the comparison table
+    Returns True when no metric regressed by more than maxRegressionPercent, else False
+    """
+    baselineResults = JCBenchLoadResults(baselineFileName)
+    if baselineResults == None:
+        return False
+    rows = JCBenchCompare(results, baselineResults, maxRegressionPercent)
+    print("\nComparison to baseline:{0}, max regression allowed:{1}%".format(baselineFileName, maxRegressionPercent))
+    JCBenchPrintTable(rows, ['metric', 'baseline', 'current', 'worse by %', 'status'])
+    for row in rows:
+        if row[4] == 'REGRESSION':
+            return False
+    return True
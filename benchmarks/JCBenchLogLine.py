@@ -0,0 +1,66 @@
+"""
+Microbenchmark of JCGlobalLib.LogLine() for diff output
+
+Formats a synthetic diff output of N lines (default 10000) in one LogLine() call with diffLine=True,
+  the way compare output is logged, and prints the time taken per call and per line.
+Lines are written to an in memory output file, nothing is printed to the terminal while timing.
+
+Parameters passed:
+    [-n <numberOfLines>] - number of lines in diff output, defaults to 10000
+    [-r <repeat>] - number of timed calls, best time is reported, defaults to 20
+    [-c <colorIndex>] - 0 no color, 1 VT100 colors, 2 HTML, defaults to 1
+
+Example:
+    python3 benchmarks/JCBenchLogLine.py -n 10000 -r 20
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import JCGlobalLib
+
+myColors = {
+    'red':      ['',"\033[31m",'<font color="red">'],
+    'green':    ['',"\033[32m",'<font color="green">'],
+    'yellow':   ['',"\033[33m",'<font color="yellow">'],
+    'blue':     ['',"\033[34m",'<font color="blue">'],
+    'magenta':  ['',"\033[35m",'<font color="magenta">'],
+    'cyan':     ['',"\033[36m",'<font color="cyan">'],
+    'clear':    ['',"\033[0m",'</font>'],
+    }
+
+def JCMakeDiffOutput(numberOfLines:int):
+    """
+    Returns diff command output with numberOfLines lines, mix of change markers, < and > lines
+    """
+    lines = ["DIFF JCCompare() differences seen in config file"]
+    index = 0
+    while len(lines) < numberOfLines:
+        lines.append("{0}c{0}".format(index))
+        lines.append("< <logFileSize>{0}</logFileSize>".format(index))
+        lines.append("---")
+        lines.append("> <logFileSize>{0}</logFileSize>".format(index + 1))
+        index += 1
+    return '\n'.join(lines[:numberOfLines])
+
+if __name__ == '__main__':
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    numberOfLines = int(argsPassed.get('-n', 10000))
+    repeat = int(argsPassed.get('-r', 20))
+    colorIndex = int(argsPassed.get('-c', 1))
+
+    diffOutput = JCMakeDiffOutput(numberOfLines)
+    bestTime = None
+    for count in range(repeat):
+        outputFile = io.StringIO()
+        startTime = time.perf_counter()
+        JCGlobalLib.LogLine(diffOutput, False, myColors, colorIndex, outputFile, '', True, 'Linux')
+        elapsedTime = time.perf_counter() - startTime
+        if bestTime == None or elapsedTime < bestTime:
+            bestTime = elapsedTime
+
+    print("LogLine() diffLine=True, lines:{0}, colorIndex:{1}, best of {2}: {3:.3f} ms per call, {4:.3f} us per line".format(
+        numberOfLines, colorIndex, repeat, bestTime * 1000, bestTime * 1000000 / numberOfLines))
@@ -0,0 +1,145 @@
+"""
+Startup benchmark of JCConfigGen
+
+Runs JCConfigGen.py -V in new processes with python -X importtime and measures
+    versionSeconds - median wall time of JCConfigGen.py -V, process start to exit
+    helpSeconds - median wall time of JCConfigGen.py -H help
+    importSeconds - median of total import time reported by -X importtime for JCConfigGen.py -V
+
+Slowest imports of the last -V run are printed so that a module added to the startup path can be spotted.
+Results are saved in JSON form so that runs can be compared to a saved baseline.
+
+Parameters passed:
+    [-n <runs>] - number of runs of each command, defaults to 10
+    [-B <budgetMilliseconds>] - fail if versionSeconds is more than this budget, defaults to 150
+    [-I <importBudgetMilliseconds>] - fail if importSeconds is more than this budget, defaults to 50
+    [-m <modules>] - modules in CSV form that must not be imported by JCConfigGen.py -V, defaults to jinja2,yaml,socket,subprocess,uuid
+    [-r <resultsFileName>] - file where results are saved, defaults to JCBenchStartup.results.json in temp directory
+    [-b <baselineFileName>] - results saved before, when passed, results are compared to it
+    [-p <maxRegressionPercent>] - fail if any metric is worse than baseline by more than this, defaults to 20
+
+    Exits with status 1 when a budget is exceeded, a listed module is imported or a metric regressed.
+
+Example:
+    python3 benchmarks/JCBenchStartup.py -r startup.json
+    python3 benchmarks/JCBenchStartup.py -B 100 -b startup.json
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+benchmarkPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchmarkPath))
+sys.path.insert(0, benchmarkPath)
+import JCGlobalLib
+import JCBenchLib
+
+JCConfigGenFileName = os.path.join(os.path.dirname(benchmarkPath), 'JCConfigGen.py')
+
+def JCBenchRun(arguments, importTime=False, workDir=None):
+    """
+    Runs JCConfigGen.py with given arguments in a new process
+    Returns wall time in seconds, stderr output
+    """
+    command = [ sys.executable ]
+    if importTime == True:
+        command += [ '-X', 'importtime' ]
+    command += [ JCConfigGenFileName ] + arguments
+    startTime = time.perf_counter()
+    result = subprocess.run(command, cwd=workDir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    return time.perf_counter() - startTime, result.stderr
+
+def JCBenchParseImportTime(importTimeOutput:str):
+    """
+    Parses -X importtime output lines in the form
+        import time: <self us> | <cumulative us> | <indent><moduleName>
+
+    Returns
+        totalSeconds - sum of cumulative time of top level imports
+        imports - list of (moduleName, selfMicroseconds, cumulativeMicroseconds)
+    """
+    totalMicroseconds = 0
+    imports = []
+    for line in importTimeOutput.splitlines():
+        if line.startswith('import time:') == False:
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or fields[0].strip().isdigit() == False:
+            ### header line
+            continue
+        selfTime = int(fields[0])
+        cumulativeTime = int(fields[1])
+        moduleName = fields[2].rstrip()
+        ### top level imports are indented by one space, nested imports by 2 more spaces per level
+        if len(moduleName) - len(moduleName.lstrip()) == 1:
+            totalMicroseconds += cumulativeTime
+        imports.append((moduleName.strip(), selfTime, cumulativeTime))
+    return totalMicroseconds / 1000000, imports
+
+def JCBenchMedian(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+if __name__ == '__main__':
+    argsPassed = {}
+    JCGlobalLib.JCParseArgs(argsPassed)
+    runs = max(1, int(argsPassed.get('-n', 10)))
+    budgetSeconds = float(argsPassed.get('-B', 150)) / 1000
+    importBudgetSeconds = float(argsPassed.get('-I', 50)) / 1000
+    forbiddenModules = list(map(str.strip, argsPassed.get('-m', 'jinja2,yaml,socket,subprocess,uuid').split(',')))
+
+    ### run in empty directory so that nothing in current directory is read or written
+    workDir = tempfile.mkdtemp(prefix='JCBenchStartup.')
+
+    versionTimes = []
+    helpTimes = []
+    importTimes = []
+    imports = []
+    for count in range(runs):
+        versionTimes.append(JCBenchRun(['-V'], workDir=workDir)[0])
+        helpTimes.append(JCBenchRun(['-H', 'help'], workDir=workDir)[0])
+        importSeconds, imports = JCBenchParseImportTime(JCBenchRun(['-V'], True, workDir)[1])
+        importTimes.append(importSeconds)
+    os.rmdir(workDir)
+
+    metrics = {
+        'versionSeconds': round(JCBenchMedian(versionTimes), 5),
+        'helpSeconds': round(JCBenchMedian(helpTimes), 5),
+        'importSeconds': round(JCBenchMedian(importTimes), 5),
+        }
+    results = JCBenchLib.JCBenchMakeResults('startup', {'runs': runs}, metrics)
+
+    print("JCConfigGen startup benchmark, runs:{0}".format(runs))
+    JCBenchLib.JCBenchPrintTable(sorted(metrics.items()), ['metric', 'value'])
+    print("\nSlowest imports of JCConfigGen.py -V")
+    slowestImports = sorted(imports, key=lambda item: item[1], reverse=True)[:10]
+    JCBenchLib.JCBenchPrintTable(slowestImports, ['module', 'self us', 'cumulative us'])
+
+    resultsFileName = argsPassed.get('-r', os.path.join(tempfile.gettempdir(), 'JCBenchStartup.results.json'))
+    if JCBenchLib.JCBenchSaveResults(resultsFileName, results) == True:
+        print("Results saved to:{0}".format(resultsFileName))
+
+    exitStatus = 0
+    if metrics['versionSeconds'] > budgetSeconds:
+        print("ERROR JCBenchStartup() versionSeconds:{0} is more than budget:{1}".format(metrics['versionSeconds'], budgetSeconds))
+        exitStatus = 1
+    else:
+        print("PASS JCBenchStartup() versionSeconds:{0} is within budget:{1}".format(metrics['versionSeconds'], budgetSeconds))
+    if metrics['importSeconds'] > importBudgetSeconds:
+        print("ERROR JCBenchStartup() importSeconds:{0} is more than budget:{1}".format(metrics['importSeconds'], importBudgetSeconds))
+        exitStatus = 1
+    else:
+        print("PASS JCBenchStartup() importSeconds:{0} is within budget:{1}".format(metrics['importSeconds'], importBudgetSeconds))
+    importedModules = set(item[0] for item in imports)
+    for moduleName in forbiddenModules:
+        if moduleName in importedModules:
+            print("ERROR JCBenchStartup() module:{0} is imported by JCConfigGen.py -V".format(moduleName))
+            exitStatus = 1
+
+    if '-b' in argsPassed:
+        if JCBenchLib.JCBenchCheckBaseline(results, argsPassed['-b'], float(argsPassed.get('-p', 20))) == False:
+            exitStatus = 1
+    sys.exit(exitStatus)